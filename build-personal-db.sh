@@ -1,44 +1,62 @@
 #!/usr/bin/env bash
 # Build personal food database from Lose It CSV export
+#   ./build-personal-db.sh             read data/export/food-logs.csv
+#   ./build-personal-db.sh --zip [ZIP] stream food-logs.csv from the export zip
 
 set -e
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 EXPORT_DIR="$HOME/clawd/integrations/loseit/data/export"
+ZIP_FILE="$HOME/clawd/integrations/loseit/data/loseit-export.zip"
 OUTPUT_FILE="$HOME/clawd/integrations/loseit/data/personal-food-db.json"
 
-if [ ! -f "$EXPORT_DIR/food-logs.csv" ]; then
-    echo "❌ food-logs.csv not found"
+SOURCE="$EXPORT_DIR"
+if [ "${1:-}" = "--zip" ]; then
+    SOURCE="${2:-$ZIP_FILE}"
+fi
+
+# Exit 3 = no food-logs.csv; anything else non-zero is a Python error (shown above)
+rc=0
+PYTHONPATH="$SCRIPT_DIR" python3 -c \
+    'import sys; from loseit_export import has_csv; sys.exit(0 if has_csv(sys.argv[1], "food-logs.csv") else 3)' \
+    "$SOURCE" || rc=$?
+if [ "$rc" -eq 3 ]; then
+    echo "❌ food-logs.csv not found in $SOURCE"
     echo "   Run loseit-sync.sh first to download your data"
     exit 1
+elif [ "$rc" -ne 0 ]; then
+    echo "❌ Could not read $SOURCE (see the error above)"
+    exit "$rc"
 fi
+export PYTHONPATH="$SCRIPT_DIR${PYTHONPATH:+:$PYTHONPATH}"
 
 echo "🔨 Building personal food database from CSV export..."
 
-python3 << 'EOF'
-import csv
+python3 - "$SOURCE" << 'EOF'
 import json
 import os
+import sys
 
-EXPORT_DIR = os.path.expanduser("~/clawd/integrations/loseit/data/export")
+from loseit_export import iter_csv
+
+SOURCE = sys.argv[1]  # export dir or zip
 OUTPUT_FILE = os.path.expanduser("~/clawd/integrations/loseit/data/personal-food-db.json")
 
 # Build personal food database
 food_db = {}
 
-with open(os.path.join(EXPORT_DIR, 'food-logs.csv'), 'r') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        name = row['Name'].strip()
-        unit = row['Units'].strip()
-        qty = float(row['Quantity'])
-        cal = row['Calories'].replace(',', '')
-        
-        if cal and cal != 'n/a' and name not in food_db:
-            food_db[name] = {
-                "unit": unit,
-                "typical_qty": qty,
-                "calories": float(cal)
-            }
+for row in iter_csv(SOURCE, 'food-logs.csv'):
+    name = row['Name'].strip()
+    unit = row['Units'].strip()
+    qty = float(row['Quantity'])
+    cal = row['Calories'].replace(',', '')
+
+    if cal and cal != 'n/a' and name not in food_db:
+        food_db[name] = {
+            "unit": unit,
+            "typical_qty": qty,
+            "calories": float(cal)
+        }
 
 # Save to JSON
 with open(OUTPUT_FILE, 'w') as f:
@@ -52,25 +70,24 @@ echo ""
 echo "📊 Your top 20 most-logged foods:"
 echo ""
 
-python3 << 'EOF'
-import csv
+python3 - "$SOURCE" << 'EOF'
+import sys
 from collections import defaultdict
-import os
 
-EXPORT_DIR = os.path.expanduser("~/clawd/integrations/loseit/data/export")
+from loseit_export import iter_csv
+
+SOURCE = sys.argv[1]
 
 food_counts = defaultdict(lambda: {"count": 0, "unit": "", "qty": 0})
 
-with open(os.path.join(EXPORT_DIR, 'food-logs.csv'), 'r') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        name = row['Name'].strip()
-        unit = row['Units'].strip()
-        qty = float(row['Quantity'])
-        
-        food_counts[name]["count"] += 1
-        food_counts[name]["unit"] = unit
-        food_counts[name]["qty"] = qty
+for row in iter_csv(SOURCE, 'food-logs.csv'):
+    name = row['Name'].strip()
+    unit = row['Units'].strip()
+    qty = float(row['Quantity'])
+
+    food_counts[name]["count"] += 1
+    food_counts[name]["unit"] = unit
+    food_counts[name]["qty"] = qty
 
 # Sort by count
 sorted_foods = sorted(food_counts.items(), key=lambda x: x[1]["count"], reverse=True)
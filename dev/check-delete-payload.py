@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Check that build_delete_food_log_entry_payload reproduces data/delete-payload.txt.
+
+The captured request carries the FoodLogEntry being deleted. It is read back
+with parse_diary_response (the same reader diary responses go through), the
+payload is rebuilt from that entry, and the two must match byte for byte.
+
+    python3 dev/check-delete-payload.py        # exit 0 = identical
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CAPTURE = ROOT / "data" / "delete-payload.txt"
+
+
+def load_client():
+    sys.path.insert(0, str(ROOT))
+    spec = importlib.util.spec_from_file_location("loseit_log", ROOT / "loseit-log.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def request_tokens(payload):
+    """(data tokens, string table) of a GWT-RPC request, typed like parse_gwt_response's."""
+    parts = payload.split("|")
+    n = int(parts[2])
+    tokens = []
+    for tok in parts[3 + n:-1]:
+        try:
+            tokens.append(float(tok) if "." in tok else int(tok))
+        except ValueError:
+            tokens.append(tok)
+    return tokens, parts[3:3 + n]
+
+
+def main():
+    client = load_client()
+    captured = CAPTURE.read_text(encoding="utf-8").strip()
+    tokens, strings = request_tokens(captured)
+    # parse_diary_response reads response order, i.e. reversed
+    entries = client.parse_diary_response(list(reversed(tokens)), strings)
+    if len(entries) != 1 or "wire" not in entries[0]:
+        print(f"❌ Could not read the captured entry ({len(entries)} entries parsed)")
+        return 1
+    entry = entries[0]
+    rebuilt = client.build_delete_food_log_entry_payload(entry)
+    if rebuilt == captured:
+        print(f"✅ Rebuilt {CAPTURE.name} byte for byte ({len(captured)} bytes): "
+              f"{entry['name']} [{entry['entry_pk']}]")
+        return 0
+    for i, (a, b) in enumerate(zip(rebuilt, captured)):
+        if a != b:
+            break
+    else:
+        i = min(len(rebuilt), len(captured))
+    print(f"❌ Differs at byte {i}:")
+    print(f"   captured: …{captured[max(0, i - 60):i + 60]}")
+    print(f"   rebuilt:  …{rebuilt[max(0, i - 60):i + 60]}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""Local stand-in for Lose It! endpoints, for exercising the sync tools offline.
+
+    python3 dev/mock-loseit.py --port 8765 --size-mb 200 --drop-after 5000000
+    LOSEIT_EXPORT_URL=http://127.0.0.1:8765/export/data ./loseit-sync.sh
+
+GET /export/data serves a zip (--zip FILE, or a synthetic one of --size-mb)
+with ETag/Last-Modified, honours Range/If-Range, and with --drop-after cuts
+every response after that many bytes to simulate a flaky connection.
+With --cookie NAME=VALUE, requests without that cookie get an HTML login page.
+
+For the sync scheduler: If-None-Match/If-Modified-Since get a 304 while the
+export is unchanged, --rotate-every N regenerates the export every N
+requests, --fail-first N answers the first N requests with 503, and
+--no-validators omits ETag/Last-Modified (forcing the content-hash check).
+
+    python3 dev/mock-loseit.py --size-mb 1 --rotate-every 3 --fail-first 2
+    LOSEIT_EXPORT_URL=http://127.0.0.1:8765/export/data \\
+        ./loseit-sync.sh --schedule --interval 2 --retry-delay 1 --runs 8
+
+POST /web/service speaks enough GWT-RPC for loseit-log.py: searchFoods over a
+small catalog, getUnsavedFoodLogEntry, updateFoodLogEntry (kept in memory,
+keyed by entry PK), deleteFoodLogEntry and the diary read, which returns a
+few deterministic entries per day plus whatever was logged, minus deletions. --gwt-latency adds per-call
+delay; other methods get //EX.
+To exercise retries and hedging, --gwt-fail-first N / --gwt-fail-rate P
+answer 503, and --gwt-slow-rate P stalls that share of calls --gwt-slow s.
+--gwt-lose-reply-rate P stores that share of updates but answers them 503.
+
+    python3 dev/mock-loseit.py --gwt-latency 0.2
+    python3 dev/mock-loseit.py --gwt-fail-rate 0.2 --gwt-slow-rate 0.1 --gwt-slow 5
+    LOSEIT_TOKEN=x LOSEIT_SERVICE_URL=http://127.0.0.1:8765/web/service \\
+        python3 loseit-log.py --range 2026-01-01 2026-01-31
+"""
+
+import argparse
+import email.utils
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def synthetic_zip(size_mb):
+    """A valid export-shaped zip of roughly size_mb (stored, incompressible)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("food-logs.csv", "Date,Name,Meal,Quantity,Units,Calories,Deleted\n"
+                                     "02/01/2026,Banana,Breakfast,1,Each,105,false\n")
+        zf.writestr("padding.bin", os.urandom(int(size_mb * 1024 * 1024)))
+    return buf.getvalue()
+
+
+# ─── GWT-RPC ─────────────────────────────────────────────────────────────────
+
+DIARY_METHOD = "getFoodLogEntries"
+
+_DIARY_STRINGS = [
+    "com.loseit.core.client.model.FoodLogEntry/264522954",
+    "com.loseit.core.client.model.FoodIdentifier/2763145970",
+    "en-US",
+    "com.loseit.core.client.model.interfaces.FoodLogEntryType/1152459170",
+    "com.loseit.core.client.model.FoodServing/1858865662",
+    "com.loseit.core.client.model.FoodNutrients/1097231324",
+    "java.util.HashMap/1797211028",
+    "com.loseit.healthdata.model.shared.food.FoodMeasurement/2371921172",
+    "java.lang.Double/858496421",
+    "com.loseit.core.client.model.SimplePrimaryKey/3621315060",
+    "[B/3308590456",
+    "java.util.ArrayList/4159755760",
+    "com.loseit.core.client.model.interfaces.FoodProductType/2860616120",
+    "com.loseit.core.client.model.FoodLogEntryContext/4082213671",
+    "com.loseit.core.shared.model.DayDate/1611136587",
+    "java.util.Date/3385151746",
+    "com.loseit.core.client.model.interfaces.FoodLogEntryTypeExtra/4048538730",
+    "com.loseit.core.client.model.FoodServingSize/63998910",
+    "com.loseit.core.client.model.FoodMeasure/1457474932",
+]
+_STAMP, _VERSION = "ZwdIXWQ", "C4iwQL"     # GWT longs from data/delete-payload.txt
+
+_FOODS = [
+    ("Fruit", "Banana", "", 105.0),
+    ("Dairy", "Greek Yogurt", "Chobani", 120.0),
+    ("Meat", "Chicken Breast", "", 165.0),
+    ("Grains", "Brown Rice", "", 216.0),
+    ("Snacks", "Almonds", "Blue Diamond", 170.0),
+    ("Fruit", "Honeycrisp Apple", "", 95.0),
+    ("Eggs", "Scrambled Eggs", "", 182.0),
+    ("Beverages", "Coffee Black", "Starbucks", 5.0),
+]
+
+
+def _signed(data):
+    return [b - 256 if b >= 128 else b for b in data]
+
+
+def food_pk(name):
+    """Serialized (reversed, signed) PK bytes for a catalog food."""
+    return _signed(reversed(uuid.uuid5(uuid.NAMESPACE_OID, "food/" + name).bytes))
+
+
+def _strings_of(payload):
+    parts = payload.split("|")
+    n = int(parts[2])
+    return parts[3:3 + n], parts[3 + n:]
+
+
+def search_response(payload):
+    strings, data = _strings_of(payload)
+    query = strings[10].lower()     # ... UserId | user name | query | locale
+    limit = int(data[-4])           # ... query | locale | max results | Z | Z |
+    words = re.findall(r"\w+", query)
+    # Incremental search: every query word must start a word of the name or brand
+    hits = [f for f in _FOODS
+            if words and all(any(fw.startswith(w) for fw in re.findall(r"\w+", f"{f[1]} {f[2]}".lower()))
+                             for w in words)][:limit]
+    table = ["java.util.ArrayList/4159755760",
+             "com.loseit.core.client.model.SearchResultFood/1556491234",
+             "com.loseit.core.client.model.SimplePrimaryKey/3621315060", "[B/3308590456"]
+
+    def ref(s):
+        if s not in table:
+            table.append(s)
+        return table.index(s) + 1
+
+    tokens = [-1]
+    for category, name, brand, _ in hits:
+        tokens += [ref(category), ref(name)] + ([ref(brand)] if brand else [])
+        tokens += food_pk(name) + [16, ref("[B/3308590456"),
+                                   ref("com.loseit.core.client.model.SimplePrimaryKey/3621315060"),
+                                   ref("com.loseit.core.client.model.SearchResultFood/1556491234")]
+    tokens += [len(hits), 1]
+    return f"//OK[{','.join(map(str, tokens))},{json.dumps(table)},0,7]"
+
+
+def unsaved_response(payload):
+    strings, data = _strings_of(payload)
+    i = data.index("10")    # SimplePrimaryKey | [B | 16 | bytes (serialized order)
+    pk = [int(b) for b in data[i + 3:i + 19]]
+    requested = list(reversed(pk))
+    food = next((f for f in _FOODS if food_pk(f[1]) == requested), ("Food", strings[12], "", 100.0))
+    category, name, brand, cals = food
+    table = ["com.loseit.core.client.model.SimplePrimaryKey/3621315060", "[B/3308590456",
+             "com.loseit.healthdata.model.shared.food.FoodMeasurement/2371921172",
+             "java.lang.Double/858496421", "com.loseit.core.client.model.FoodServingSize/63998910",
+             "com.loseit.core.client.model.FoodMeasure/1457474932", category, name] + ([brand] if brand else [])
+    entry_pk = _signed(uuid.uuid4().bytes)
+    tokens = ['"ZwdImkw"']
+    tokens += entry_pk + [16, 2, 1]
+    tokens += requested + [16, 2, 1]
+    tokens += [cals, 4, 0, 3, round(cals / 20, 1), 4, 8, 3]
+    tokens += [45, 6, 1, 1.0, 5]
+    tokens += [7, 8] + ([9] if brand else [])
+    return f"//OK[{','.join(map(str, tokens))},{json.dumps(table)},0,7]"
+
+
+def record_update(server, payload):
+    """Store an updateFoodLogEntry in the server's diary → entry PK (serialized bytes)."""
+    strings, data = _strings_of(payload)
+    j = next(k for k in range(len(data) - 1) if data[k] == "19" and data[k + 1] == "20")
+    day_number = int(data[j + 3])
+    m = data.index("21", j)
+    meal = int(data[m + 1])
+    servings = float(data[m + 6])
+    nutrients = {}
+    k = m + 9
+    while k + 3 < len(data) and data[k] == "25":
+        nutrients[int(data[k + 1])] = float(data[k + 3])
+        k += 4
+    entry_pk = tuple(int(b) for b in data[-17:-1])
+    entry = {"category": strings[9], "name": strings[11], "brand": strings[12], "meal": meal,
+             "servings": servings, "calories": nutrients.get(0, 0.0), "pk": entry_pk}
+    with server.lock:
+        server.logged.setdefault(day_number, {})[entry_pk] = entry
+        server.deleted.discard(entry_pk)
+    return entry_pk
+
+
+def record_delete(server, payload):
+    """Drop the entry whose PK ends a deleteFoodLogEntry payload → whether it existed."""
+    strings, data = _strings_of(payload)
+    entry_pk = tuple(int(b) for b in data[-17:-1])
+    with server.lock:
+        known = entry_pk not in server.deleted
+        server.deleted.add(entry_pk)
+        for day in server.logged.values():
+            day.pop(entry_pk, None)
+    return known
+
+
+def diary_response(day_number, logged=(), deleted=()):
+    """//OK response with 2-4 entries for a day, stable across calls, plus logged ones.
+
+    Each FoodLogEntry is laid out like the one in data/delete-payload.txt.
+    """
+    strings = list(_DIARY_STRINGS)
+
+    def ref(s):
+        if s not in strings:
+            strings.append(s)
+        return strings.index(s) + 1
+
+    count = 2 + day_number % 3
+    rows = []
+    for i in range(count):
+        category, name, brand, cals = _FOODS[(day_number + i) % len(_FOODS[:5])]
+        servings = 1.0 + (day_number + i) % 2
+        pk = _signed(reversed(uuid.uuid5(uuid.NAMESPACE_OID, f"{day_number}/{i}").bytes))
+        if tuple(pk) not in deleted:
+            rows.append((category, name, brand, cals * servings, servings, i % 4, pk))
+    for e in logged:
+        rows.append((e["category"], e["name"], e["brand"], e["calories"], e["servings"], e["meal"],
+                     list(e["pk"])))
+    (entry, ident, _, type_, serving, nutrients, hashmap, fm, double, pk_, bytes_, _,
+     product, context, daydate, date_, extra, size, measure) = (ref(s) for s in _DIARY_STRINGS)
+    fwd = [ref("java.util.ArrayList/4159755760"), len(rows)]
+    for category, name, brand, cals, servings, meal, pk in rows:
+        fwd += [entry, ident, -1, ref(category), ref("en-US"), ref(name), ref(brand) if brand else 0,
+                product, 0, -1, 0, _STAMP, pk_, bytes_, 16] + food_pk(name) + [
+                context, 0, daydate, date_, _STAMP, day_number, -5, 0, -1, 1, 0, 0, 0,
+                type_, meal, extra, 3,
+                serving, nutrients, servings, float(servings),
+                hashmap, 2,
+                fm, 0, double, float(cals),
+                fm, 8, double, round(cals / 20, 1),
+                size, float(servings), 0, measure, 45, 2, 2, float(servings), 0, _VERSION, _STAMP,
+                pk_, bytes_, 16]
+        fwd += pk
+    tokens = ",".join(json.dumps(t) if isinstance(t, str) else str(t) for t in reversed(fwd))
+    return f"//OK[{tokens},{json.dumps(strings)},0,7]"
+
+
+def gwt_response(server, payload):
+    """Response body for a GWT-RPC payload."""
+    parts = payload.split("|")
+    method = parts[6] if len(parts) > 6 else ""
+    if method == DIARY_METHOD:
+        # ... DayDate | Date | key | day number | tz offset |
+        day_number = int(parts[-3])
+        with server.lock:
+            logged = list(server.logged.get(day_number, {}).values())
+            deleted = set(server.deleted)
+        return diary_response(day_number, logged, deleted)
+    if method == "searchFoods":
+        return search_response(payload)
+    if method == "getUnsavedFoodLogEntry":
+        return unsaved_response(payload)
+    if method == "updateFoodLogEntry":
+        record_update(server, payload)
+        return '//OK[1,["com.loseit.core.client.model.FoodLogEntry/264522954"],0,7]'
+    if method == "deleteFoodLogEntry":
+        if not record_delete(server, payload):
+            return '//EX[2,1,["com.loseit.core.client.service.ServiceException/1","entry already deleted"],0,7]'
+        return '//OK[0,[],0,7]'
+    if method == "getInitializationData":
+        return '//OK[-5,1,["com.loseit.core.client.service.InitializationData/1"],0,7]'
+    return '//EX[2,1,["com.google.gwt.user.client.rpc.IncompatibleRemoteServiceException/3936916533",' \
+           f'"mock-loseit: unsupported method {method}"],0,7]'
+
+
+class MockServer(ThreadingHTTPServer):
+    def set_export(self, data):
+        self.export = data
+        self.etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "mock-loseit"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _authorized(self):
+        want = self.server.cookie
+        return not want or want in (self.headers.get("Cookie") or "")
+
+    def _send_login_page(self):
+        body = b"<html><body>Please log in</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.endswith("/service"):
+            self.send_error(404)
+            return
+        payload = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        srv = self.server
+        srv.gwt_requests += 1
+        if srv.gwt_requests <= srv.gwt_fail_first or random.random() < srv.gwt_fail_rate:
+            self.send_error(503, "Service Unavailable")
+            return
+        delay = srv.gwt_latency
+        if random.random() < srv.gwt_slow_rate:
+            delay += srv.gwt_slow
+        if delay:
+            time.sleep(delay)
+        body = gwt_response(srv, payload).encode("utf-8")
+        if "|updateFoodLogEntry|" in payload and random.random() < srv.gwt_lose_reply_rate:
+            self.send_error(503, "Service Unavailable")     # handled, but the reply is lost
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self.path.startswith("/export/data"):
+            self.send_error(404)
+            return
+        if not self._authorized():
+            self._send_login_page()
+            return
+        srv = self.server
+        srv.export_requests += 1
+        if srv.export_requests <= srv.fail_first:
+            self.send_error(503, "Service Unavailable")
+            return
+        if srv.rotate_every and srv.export_requests % srv.rotate_every == 0:
+            srv.set_export(synthetic_zip(srv.size_mb))
+        if srv.validators and (
+                self.headers.get("If-None-Match") == srv.etag
+                or (not self.headers.get("If-None-Match")
+                    and self.headers.get("If-Modified-Since") == srv.last_modified)):
+            self.send_response(304)
+            self.send_header("ETag", srv.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = srv.export
+        start = 0
+        m = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if m and (not if_range or if_range in (srv.etag, srv.last_modified)):
+            start = int(m.group(1))
+        if start >= len(data):
+            start = 0
+
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(data) - start))
+        if srv.validators:
+            self.send_header("ETag", srv.etag)
+            self.send_header("Last-Modified", srv.last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.end_headers()
+
+        body = memoryview(data)[start:]
+        limit = self.server.drop_after
+        if limit and len(body) > limit:
+            self.wfile.write(body[:limit])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Lose It! endpoints")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--zip", help="Export zip to serve (default: synthetic)")
+    parser.add_argument("--size-mb", type=float, default=50, help="Synthetic export size (default: 50)")
+    parser.add_argument("--drop-after", type=int, default=0,
+                        help="Cut each export response after N bytes (0 = never)")
+    parser.add_argument("--cookie", default="", help="Require this NAME=VALUE cookie")
+    parser.add_argument("--rotate-every", type=int, default=0,
+                        help="Regenerate the synthetic export every N export requests (0 = never)")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N export requests with 503")
+    parser.add_argument("--no-validators", dest="validators", action="store_false",
+                        help="Send no ETag/Last-Modified and never answer 304")
+    parser.add_argument("--gwt-latency", type=float, default=0.0,
+                        help="Seconds to wait before answering each GWT-RPC call")
+    parser.add_argument("--gwt-fail-first", type=int, default=0, help="Answer the first N GWT-RPC calls with 503")
+    parser.add_argument("--gwt-fail-rate", type=float, default=0.0, help="Answer this share of GWT-RPC calls with 503")
+    parser.add_argument("--gwt-slow-rate", type=float, default=0.0,
+                        help="Share of GWT-RPC calls that stall for --gwt-slow seconds")
+    parser.add_argument("--gwt-slow", type=float, default=5.0, help="Stall for slow GWT-RPC calls (default: 5)")
+    parser.add_argument("--gwt-lose-reply-rate", type=float, default=0.0,
+                        help="Share of updateFoodLogEntry calls that are stored but answered with 503")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    server = MockServer(("127.0.0.1", args.port), Handler)
+    if args.zip:
+        with open(args.zip, "rb") as f:
+            server.set_export(f.read())
+    else:
+        server.set_export(synthetic_zip(args.size_mb))
+    server.size_mb = args.size_mb
+    server.rotate_every = args.rotate_every
+    server.fail_first = args.fail_first
+    server.validators = args.validators
+    server.drop_after = args.drop_after
+    server.cookie = args.cookie
+    server.verbose = args.verbose
+    server.export_requests = 0
+    server.gwt_latency = args.gwt_latency
+    server.gwt_requests = 0
+    server.lock = threading.Lock()
+    server.logged = {}
+    server.deleted = set()
+    server.gwt_fail_first = args.gwt_fail_first
+    server.gwt_fail_rate = args.gwt_fail_rate
+    server.gwt_slow_rate = args.gwt_slow_rate
+    server.gwt_slow = args.gwt_slow
+    server.gwt_lose_reply_rate = args.gwt_lose_reply_rate
+    print(f"[mock-loseit] Serving {len(server.export)} byte export on http://127.0.0.1:{args.port}/export/data")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
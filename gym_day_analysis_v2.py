@@ -5,10 +5,13 @@ Deeper analysis - tracking behavior patterns.
 
 import csv
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict
 from pathlib import Path
 
+from loseit_calendar import DaySet
+from loseit_stats import Quantiles, compare_means
+
 # Load gym check-in dates
 with open(Path.home() / 'clawd/integrations/lafitness/data/checkins.json') as f:
     gym_data = json.load(f)
@@ -61,31 +64,43 @@ print("="*70)
 gym_period_start = min(gym_dates)
 gym_period_end = max(gym_dates)
 
-# Generate all days in range
-start_dt = datetime.strptime(gym_period_start, '%Y-%m-%d')
-end_dt = datetime.strptime(gym_period_end, '%Y-%m-%d')
-all_days = []
-current = start_dt
-while current <= end_dt:
-    all_days.append(current.strftime('%Y-%m-%d'))
-    current += timedelta(days=1)
+# Day sets over the gym period as ordinal bitmasks
+period_start = datetime.strptime(gym_period_start, '%Y-%m-%d').date()
+period_end = datetime.strptime(gym_period_end, '%Y-%m-%d').date()
+
+def day_set(keys):
+    return DaySet.from_days([datetime.strptime(d, '%Y-%m-%d').date() for d in keys], period_start, period_end)
+
+gym_set = day_set(gym_dates)
+rest_set = ~gym_set
+logged_set = day_set(daily_stats)
 
 # Count tracking rates
-gym_days_total = [d for d in all_days if d in gym_dates]
-rest_days_total = [d for d in all_days if d not in gym_dates]
+gym_days_total = len(gym_set)
+rest_days_total = len(rest_set)
 
-gym_days_logged = [d for d in gym_days_total if d in daily_stats]
-rest_days_logged = [d for d in rest_days_total if d in daily_stats]
+gym_days_logged = len(gym_set & logged_set)
+rest_days_logged = len(rest_set & logged_set)
 
-gym_track_rate = len(gym_days_logged) / len(gym_days_total) * 100 if gym_days_total else 0
-rest_track_rate = len(rest_days_logged) / len(rest_days_total) * 100 if rest_days_total else 0
+gym_track_rate = gym_days_logged / gym_days_total * 100 if gym_days_total else 0
+rest_track_rate = rest_days_logged / rest_days_total * 100 if rest_days_total else 0
 
 print(f"\nTracking Rate Comparison:")
-print(f"  Gym days:  {len(gym_days_logged)}/{len(gym_days_total)} logged ({gym_track_rate:.1f}%)")
-print(f"  Rest days: {len(rest_days_logged)}/{len(rest_days_total)} logged ({rest_track_rate:.1f}%)")
+print(f"  Gym days:  {gym_days_logged}/{gym_days_total} logged ({gym_track_rate:.1f}%)")
+print(f"  Rest days: {rest_days_logged}/{rest_days_total} logged ({rest_track_rate:.1f}%)")
 print(f"  Difference: {gym_track_rate - rest_track_rate:+.1f} percentage points")
 
-if gym_track_rate > rest_track_rate + 5:
+# Bootstrap CI + permutation p-value for the difference (percentage points)
+tracking_test = compare_means(
+    logged_set.mask[gym_set.mask] * 100.0,
+    logged_set.mask[rest_set.mask] * 100.0,
+)
+if tracking_test:
+    print(f"  95% CI: [{tracking_test['ci_low']:+.1f}, {tracking_test['ci_high']:+.1f}] pp, "
+          f"p={tracking_test['p_value']:.4f}")
+tracking_bias = tracking_test is not None and tracking_test["ci_low"] > 0
+
+if tracking_bias:
     print("\n  ⚠️  Rich is MORE LIKELY to log food on gym days!")
     print("     This is a form of tracking bias - gym days are over-represented.")
 
@@ -128,17 +143,14 @@ print("="*70)
 gym_entry_counts = [daily_stats[d]['entries'] for d in daily_stats if d in gym_dates and gym_period_start <= d <= gym_period_end]
 rest_entry_counts = [daily_stats[d]['entries'] for d in daily_stats if d not in gym_dates and gym_period_start <= d <= gym_period_end]
 
-def percentile(lst, p):
-    if not lst:
-        return 0
-    sorted_lst = sorted(lst)
-    idx = int(len(sorted_lst) * p / 100)
-    return sorted_lst[min(idx, len(sorted_lst)-1)]
+# Sort each series once; every percentile below reads from it
+gym_entry_q = Quantiles(gym_entry_counts)
+rest_entry_q = Quantiles(rest_entry_counts)
 
 print(f"\n{'Percentile':<15} {'Gym Days':>15} {'Rest Days':>15}")
 print("-"*45)
 for p in [25, 50, 75, 90]:
-    print(f"{p}th%{'':<10} {percentile(gym_entry_counts, p):>15.0f} {percentile(rest_entry_counts, p):>15.0f}")
+    print(f"{p}th%{'':<10} {gym_entry_q.percentile(p):>15.0f} {rest_entry_q.percentile(p):>15.0f}")
 
 # Check for "complete" tracking days (3+ meals logged)
 print("\n" + "="*70)
@@ -164,11 +176,11 @@ Summary of findings:
 
 1. TRACKING FREQUENCY:
    - Rich tracks food on {gym_track_rate:.0f}% of gym days vs {rest_track_rate:.0f}% of rest days
-   - {'BIAS: More likely to log on gym days' if gym_track_rate > rest_track_rate + 5 else 'Similar tracking rates'}
+   - {'BIAS: More likely to log on gym days' if tracking_bias else 'Similar tracking rates (difference within noise)'}
 
 2. ENTRIES PER DAY (when tracking):
-   - Gym days: avg {sum(gym_entry_counts)/len(gym_entry_counts):.1f} entries, median {percentile(gym_entry_counts, 50):.0f}
-   - Rest days: avg {sum(rest_entry_counts)/len(rest_entry_counts):.1f} entries, median {percentile(rest_entry_counts, 50):.0f}
+   - Gym days: avg {sum(gym_entry_counts)/len(gym_entry_counts):.1f} entries, median {gym_entry_q.percentile(50):.0f}
+   - Rest days: avg {sum(rest_entry_counts)/len(rest_entry_counts):.1f} entries, median {rest_entry_q.percentile(50):.0f}
 
 3. CALORIES (when tracking):
    - Gym days: avg {sum([daily_stats[d]['total_cal'] for d in daily_stats if d in gym_dates and gym_period_start <= d <= gym_period_end])/len(gym_entry_counts):.0f} cal
@@ -178,9 +190,10 @@ CONCLUSION:
 """)
 
 # Calculate tracking bias impact
-if gym_track_rate > rest_track_rate + 10:
+if tracking_bias:
     print("📊 TRACKING BIAS DETECTED")
-    print(f"   Rich is {gym_track_rate - rest_track_rate:.0f} percentage points more likely to log on gym days.")
+    print(f"   Rich is {gym_track_rate - rest_track_rate:.0f} percentage points more likely to log on gym days "
+          f"(95% CI {tracking_test['ci_low']:+.0f} to {tracking_test['ci_high']:+.0f}, p={tracking_test['p_value']:.3f}).")
     print("   This means gym days are OVER-REPRESENTED in the food log data.")
     print("   The apparent similarity in calories may hide that rest days are under-logged.")
 else:
@@ -197,6 +210,10 @@ elif entry_diff_pct < -15:
     print(f"\n📝 LESS DETAILED TRACKING on gym days ({entry_diff_pct:.0f}% fewer entries)")
 else:
     print(f"\n📝 Similar tracking detail ({entry_diff_pct:+.0f}% difference in entries)")
+entry_test = compare_means(gym_entry_counts, rest_entry_counts)
+if entry_test:
+    print(f"   Entries/day difference {entry_test['diff']:+.1f} "
+          f"(95% CI {entry_test['ci_low']:+.1f} to {entry_test['ci_high']:+.1f}, p={entry_test['p_value']:.3f})")
 
 gym_cals = [daily_stats[d]['total_cal'] for d in daily_stats if d in gym_dates and gym_period_start <= d <= gym_period_end]
 rest_cals = [daily_stats[d]['total_cal'] for d in daily_stats if d not in gym_dates and gym_period_start <= d <= gym_period_end]
@@ -209,3 +226,7 @@ elif cal_diff > 0:
     print(f"\n🍽️  MORE CALORIES on gym days ({cal_diff:+.0f} cal)")
 else:
     print(f"\n🍽️  FEWER CALORIES on gym days ({cal_diff:+.0f} cal)")
+cal_test = compare_means(gym_cals, rest_cals)
+if cal_test:
+    print(f"   Calories/day difference {cal_test['diff']:+.0f} "
+          f"(95% CI {cal_test['ci_low']:+.0f} to {cal_test['ci_high']:+.0f}, p={cal_test['p_value']:.3f})")
@@ -1,40 +1,55 @@
 #!/usr/bin/env bash
 # loseit-analyze.sh — Analyze Lose It! export CSVs and produce a JSON report
+#   ./loseit-analyze.sh             read the extracted data/export/ directory
+#   ./loseit-analyze.sh --zip [ZIP] read CSVs straight from the export zip
 set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 EXPORT_DIR="$SCRIPT_DIR/data/export"
+ZIP_FILE="$SCRIPT_DIR/data/loseit-export.zip"
 REPORT_FILE="$SCRIPT_DIR/data/latest-report.json"
 VENV="$HOME/clawd/email-triage/venv"
 
-if [ ! -d "$EXPORT_DIR" ]; then
-    echo "[loseit-analyze] ERROR: No export data at $EXPORT_DIR — run loseit-sync.sh first"
+SOURCE="$EXPORT_DIR"
+if [ "${1:-}" = "--zip" ]; then
+    SOURCE="${2:-$ZIP_FILE}"
+fi
+
+if [ ! -e "$SOURCE" ]; then
+    echo "[loseit-analyze] ERROR: No export data at $SOURCE — run loseit-sync.sh first"
     exit 1
 fi
 
 echo "[loseit-analyze] Analyzing data..."
 
-"$VENV/bin/python3" - "$EXPORT_DIR" "$REPORT_FILE" <<'PYEOF'
-import sys, json, csv, os
+export PYTHONPATH="$SCRIPT_DIR${PYTHONPATH:+:$PYTHONPATH}"
+# Failures still show up in the analyze metrics (errors_total, last_run_success)
+trap '[ $? -eq 0 ] || "$VENV/bin/python3" "$SCRIPT_DIR/loseit_metrics.py" error analyze || true' EXIT
+
+"$VENV/bin/python3" - "$SOURCE" "$REPORT_FILE" <<'PYEOF'
+import sys, json, os, time
 from datetime import datetime, timedelta
-from collections import defaultdict
 from pathlib import Path
 
-export_dir = Path(sys.argv[1])
+import numpy as np
+from loseit_calendar import DaySet
+from loseit_export import load_food_log, ordinal_to_date, parse_date, read_csv as read_export_csv
+from loseit_metrics import RunMetrics
+
+source = Path(sys.argv[1])  # export dir or zip
+metrics = RunMetrics("analyze")
+t_phase = time.monotonic()
+
+def end_phase(name):
+    global t_phase
+    now = time.monotonic()
+    metrics.gauge("phase_duration_seconds", round(now - t_phase, 6), phase=name)
+    t_phase = now
 report_path = sys.argv[2]
 
 now = datetime.now()
 today = now.date()
 
-def parse_date(s):
-    """Try common date formats."""
-    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%m/%d/%y"):
-        try:
-            return datetime.strptime(s.strip(), fmt).date()
-        except (ValueError, AttributeError):
-            continue
-    return None
-
 def safe_float(v, default=0.0):
     try:
         return float(v)
@@ -42,14 +57,9 @@ def safe_float(v, default=0.0):
         return default
 
 def read_csv(name):
-    path = export_dir / name
-    if not path.exists():
-        return []
-    with open(path, "r", encoding="utf-8-sig") as f:
-        return list(csv.DictReader(f))
+    return read_export_csv(source, name)
 
 # ── Load data ──
-food_logs = read_csv("food-logs.csv")
 daily_cals = read_csv("daily-calorie-summary.csv")
 weights = read_csv("weights.csv")
 protein_log = read_csv("protein(g).csv")
@@ -66,49 +76,103 @@ for row in profile_rows:
         profile[name] = val
 
 # ── Food logs analysis ──
-# Filter out deleted
-active_food = [r for r in food_logs if r.get("Deleted", "").strip().lower() != "true"]
-
-# Group by date
-food_by_date = defaultdict(list)
-for r in active_food:
-    d = parse_date(r.get("Date", ""))
-    if d:
-        food_by_date[d].append(r)
+# All nutrient columns as one rows × nutrients matrix (deleted rows dropped)
+food_log = load_food_log(source)
+for name, rows in (("daily-calorie-summary.csv", daily_cals), ("weights.csv", weights),
+                   ("protein(g).csv", protein_log), ("fasting-logs.csv", fasting_logs),
+                   ("exercise-logs.csv", exercise_logs), ("profile.csv", profile_rows)):
+    metrics.gauge("csv_rows", len(rows), file=name)
+metrics.gauge("csv_rows", len(food_log), file="food-logs.csv")
+end_phase("load")
+CALORIES = food_log.find_column(0)
+PROTEIN = food_log.find_column(13)
+CARBS = food_log.find_column(10)
+FAT = food_log.find_column(2)
+
+def col(totals, key):
+    if key is None:
+        return np.zeros(len(totals))
+    return totals[:, food_log.columns.index(key)]
 
 def period_stats(days):
     cutoff = today - timedelta(days=days)
-    period_dates = {d: entries for d, entries in food_by_date.items() if d > cutoff}
-    if not period_dates:
+    window = food_log.window(cutoff)
+    day_ords, totals = window.daily_totals()
+    if len(day_ords) == 0:
         return {"days_logged": 0, "avg_calories": 0, "avg_protein": 0, "avg_carbs": 0, "avg_fat": 0, "total_days": days}
 
-    daily_totals = []
-    for d, entries in sorted(period_dates.items()):
-        cals = sum(safe_float(e.get("Calories")) for e in entries)
-        protein = sum(safe_float(e.get("Protein (g)")) for e in entries)
-        carbs = sum(safe_float(e.get("Carbohydrates (g)")) for e in entries)
-        fat = sum(safe_float(e.get("Fat (g)")) for e in entries)
-        daily_totals.append({"date": str(d), "calories": round(cals), "protein": round(protein, 1),
-                             "carbs": round(carbs, 1), "fat": round(fat, 1)})
+    cals = np.round(col(totals, CALORIES))
+    protein = np.round(col(totals, PROTEIN), 1)
+    carbs = np.round(col(totals, CARBS), 1)
+    fat = np.round(col(totals, FAT), 1)
+    daily_totals = [{"date": str(ordinal_to_date(o)), "calories": int(cals[i]), "protein": float(protein[i]),
+                     "carbs": float(carbs[i]), "fat": float(fat[i])}
+                    for i, o in enumerate(day_ords)]
 
-    n = len(daily_totals)
+    n = len(day_ords)
     return {
         "days_logged": n,
         "total_days": days,
         "consistency_pct": round(n / days * 100, 1),
-        "avg_calories": round(sum(t["calories"] for t in daily_totals) / n),
-        "avg_protein": round(sum(t["protein"] for t in daily_totals) / n, 1),
-        "avg_carbs": round(sum(t["carbs"] for t in daily_totals) / n, 1),
-        "avg_fat": round(sum(t["fat"] for t in daily_totals) / n, 1),
+        "avg_calories": round(float(cals.mean())),
+        "avg_protein": round(float(protein.mean()), 1),
+        "avg_carbs": round(float(carbs.mean()), 1),
+        "avg_fat": round(float(fat.mean()), 1),
         "daily_breakdown": daily_totals[-7:],  # last 7 entries for detail
+        "nutrients": {c: round(float(v), 1) for c, v in zip(food_log.columns, totals.mean(axis=0))},
+        "meals": meal_stats(window, n),
     }
 
+def meal_stats(window, n_days):
+    """Average per-logged-day totals for each meal."""
+    _days, meal_idx, totals = window.meal_totals()
+    out = {}
+    for m, name in enumerate(window.meal_names):
+        sums = totals[meal_idx == m].sum(axis=0)
+        out[name or "Unknown"] = {
+            "days": int((meal_idx == m).sum()),
+            "avg_calories": round(float(col(sums[None, :], CALORIES)[0]) / n_days),
+        }
+    return out
+
 stats_7d = period_stats(7)
 stats_30d = period_stats(30)
-
-# Days since last food log
-food_dates = sorted(food_by_date.keys())
-days_since_food = (today - food_dates[-1]).days if food_dates else None
+stats_90d = period_stats(90)
+
+def nutrient_trends():
+    """7d vs 30d vs 90d per-logged-day averages for every nutrient column."""
+    trends = {}
+    for c, header, ordinal in zip(food_log.columns, food_log.headers, food_log.ordinals):
+        a7 = stats_7d.get("nutrients", {}).get(c, 0)
+        a30 = stats_30d.get("nutrients", {}).get(c, 0)
+        a90 = stats_90d.get("nutrients", {}).get(c, 0)
+        trends[c] = {
+            "header": header,
+            "measurement_ordinal": ordinal,
+            "avg_7d": a7,
+            "avg_30d": a30,
+            "avg_90d": a90,
+            "change_7d_vs_30d_pct": round((a7 - a30) / a30 * 100, 1) if a30 else None,
+        }
+    return trends
+
+# Logging coverage, streaks and gaps over day ordinals
+food_days = DaySet.from_days(food_log.days, end=max(today.toordinal(), int(food_log.days.max()))) \
+    if len(food_log) else None
+food_dates = food_days.dates() if food_days else []
+days_since_food = food_days.days_since_last(today) if food_days else None
+logging_streaks = {"current": 0, "longest": 0, "longest_start": None, "recent_gaps": []}
+if food_days:
+    longest, longest_start = food_days.longest_streak()
+    recent = food_days.clip(today - timedelta(days=90), today)
+    logging_streaks = {
+        "current": food_days.current_streak(today),
+        "longest": longest,
+        "longest_start": str(ordinal_to_date(longest_start)) if longest_start else None,
+        "coverage_90d_pct": round(recent.coverage() * 100, 1),
+        "recent_gaps": [{"start": str(ordinal_to_date(s)), "days": int(n)}
+                        for s, n in recent.gaps(min_length=2)[-5:]],
+    }
 
 # ── Calorie trend from daily summary ──
 cal_summary_by_date = {}
@@ -192,6 +256,7 @@ report = {
     "profile": profile,
     "summary": {
         "days_since_last_food_log": days_since_food,
+        "logging_streak_days": logging_streaks["current"],
         "days_since_last_weighin": days_since_weighin,
         "latest_weight": weight_entries[-1]["weight"] if weight_entries else None,
         "weight_change_30d": weight_change_30d,
@@ -218,32 +283,44 @@ report = {
             "avg_fat_g": stats_30d["avg_fat"],
         },
         "protein_goal_pct": protein_goal_pct_30d,
+        "meals": stats_30d.get("meals", {}),
     },
+    "nutrient_trends": nutrient_trends(),
     "protein_tracking": {
         "daily_target_g": PROTEIN_TARGET,
         "avg_7d": protein_7d_avg,
         "avg_30d": protein_30d_avg,
         "on_track": protein_30d_avg >= PROTEIN_TARGET * 0.9,
     },
+    "logging_streaks": logging_streaks,
     "weight_trend": recent_weights,
     "fasting": fasting_stats,
     "data_range": {
         "first_food_log": str(food_dates[0]) if food_dates else None,
         "last_food_log": str(food_dates[-1]) if food_dates else None,
-        "total_food_log_days": len(food_by_date),
+        "total_food_log_days": len(food_dates),
         "total_weight_entries": len(weight_entries),
     },
 }
 
+end_phase("analyze")
 with open(report_path, "w") as f:
     json.dump(report, f, indent=2)
+end_phase("write")
+metrics.finish()
 
 print(f"[loseit-analyze] Report saved to {report_path}")
 print(f"  Last food log: {days_since_food} days ago" if days_since_food is not None else "  No food logs found")
 print(f"  Last weigh-in: {days_since_weighin} days ago" if days_since_weighin is not None else "  No weight entries found")
+print(f"  Logging streak: {logging_streaks['current']} days (longest {logging_streaks['longest']})")
 print(f"  30d avg calories: {stats_30d['avg_calories']}")
 print(f"  30d avg protein: {protein_30d_avg}g / {PROTEIN_TARGET}g target ({protein_goal_pct_30d}%)")
 print(f"  30d consistency: {stats_30d.get('consistency_pct', 0)}%")
+for ordinal, label in ((9, "sodium"), (11, "fiber"), (12, "sugar"), (8, "cholesterol")):
+    key = food_log.find_column(ordinal)
+    if key:
+        t = report["nutrient_trends"][key]
+        print(f"  30d avg {label}: {t['avg_30d']} ({key}, 7d {t['avg_7d']})")
 if weight_entries:
     print(f"  Current weight: {weight_entries[-1]['weight']} lbs")
 if weight_change_30d is not None:
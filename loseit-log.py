@@ -5,10 +5,20 @@ Unofficial CLI for logging foods to Lose It via reverse-engineered GWT-RPC API.
 
 Usage:
     python loseit-log.py "banana" --search            # Search for food
+    python loseit-log.py --search "banana" "brown rice" "eggs"  # Several, concurrently
     python loseit-log.py "banana" -m snacks --pick 1  # Log to snacks, 1st result
     python loseit-log.py "eggs" -m breakfast --pick 1 --servings 2
     python loseit-log.py "salmon" -m dinner --pick 1 --date 2026-02-01
+    python loseit-log.py "chili" -m lunch --pick 1 --date 2026-02-02..2026-02-06  # Meal prep
     python loseit-log.py --replay                     # Test auth with Chobani yogurt
+    python loseit-log.py --diary --date 2026-02-01    # Show a day's diary (cached)
+    python loseit-log.py --range 2025-01-01 2025-12-31  # Fetch a year of diaries
+    python loseit-log.py "eggs" -m breakfast --pick 1 --queue  # Journal, send later
+    python loseit-log.py --flush                      # Send journaled entries
+    python loseit-log.py --delete-range 2026-02-02 2026-02-08 -m dinner --match eggs --dry-run
+    python loseit-log.py "eggs" -m breakfast --pick 1 --key run-42  # Idempotent log
+    python loseit-log.py "eggs" -m breakfast --pick 1 --add-to-template bfast
+    python loseit-log.py --meal-template bfast --date 2026-02-01  # Log the whole meal
 
 Authentication:
     Requires JWT token saved to ~/.config/loseit/token
@@ -31,9 +41,14 @@ Notes:
 import argparse
 import json
 import os
+import queue
+import random
 import re
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta, date
 
 try:
@@ -43,10 +58,17 @@ except ImportError:
     if os.path.exists(venv_path):
         sys.path.insert(0, venv_path)
     import requests
+from urllib3.exceptions import NewConnectionError     # ships with requests
+
+from loseit_catalog import FoodCatalog
+from loseit_journal import Journal, JournalBusy, KeyStore
+from loseit_metrics import RunMetrics
+from loseit_search_cache import SearchCache
 
 # ─── Constants ───────────────────────────────────────────────────────────────
 
-SERVICE_URL = "https://www.loseit.com/web/service"
+# LOSEIT_SERVICE_URL points the client at a local stand-in (dev/mock-loseit.py)
+SERVICE_URL = os.environ.get("LOSEIT_SERVICE_URL", "https://www.loseit.com/web/service")
 BASE_URL = "https://d3hsih69yn4d89.cloudfront.net/web/"
 POLICY_HASH = "5ED2771F63B26294E45551B2D697E7B0"
 STRONG_NAME = "24BBC590737D4E7508A96609A56E11F3"
@@ -87,33 +109,375 @@ def load_token():
     sys.exit(1)
 
 
-def make_session(token):
+def make_session(token, pool=None):
+    """Session for the GWT service; pool sizes its connection pool for that many threads."""
     s = requests.Session()
     s.headers.update(HEADERS)
     s.cookies.set("liauth", token, domain="www.loseit.com", path="/")
+    if pool:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
     s.cookies.set("fn_auth", token, domain="www.loseit.com", path="/")
     return s
 
 
 # ─── GWT-RPC Core ───────────────────────────────────────────────────────────
 
-def gwt_call(session, payload, debug=False):
-    """Send GWT-RPC call, return raw response text or None on error."""
+# Per-call budget: each attempt times out after GWT_TIMEOUT, and retries stop
+# once GWT_DEADLINE has passed since the call started (env overrides, seconds)
+GWT_TIMEOUT = float(os.environ.get("LOSEIT_GWT_TIMEOUT", 20))
+GWT_CONNECT_TIMEOUT = 5.0
+GWT_DEADLINE = float(os.environ.get("LOSEIT_GWT_DEADLINE", 60))
+GWT_RETRIES = 3                  # retries after the first attempt
+GWT_BACKOFF = 0.5                # first retry waits up to this, doubling
+GWT_MAX_BACKOFF = 8.0
+# Reads get a second, racing request if the first is slower than this (0 = off)
+GWT_HEDGE_AFTER = float(os.environ.get("LOSEIT_GWT_HEDGE", 0))
+
+# Safe to repeat: retried on any transport error or 5xx, and hedged
+IDEMPOTENT_METHODS = {"searchFoods", "getUnsavedFoodLogEntry", "getInitializationData",
+                      "getFoodLogEntries"}
+READ_RETRY_STATUS = {429, 500, 502, 503, 504}
+# Unkeyed writes are only retried when the request never left this machine:
+# a connect timeout or a refused/unresolvable connection. No status counts —
+# a 502/503/504 can come from a gateway that gave up after the service had
+# already saved the entry, and resending would log it twice.
+
+# Shared by every thread's calls (see GwtLimiter). LOSEIT_GWT_RATE=0 lifts the rate cap
+GWT_RATE = float(os.environ.get("LOSEIT_GWT_RATE", 20))    # requests/second
+GWT_BURST = 20
+GWT_CONCURRENCY = 8              # starting in-flight limit, adjusted by AIMD
+GWT_MIN_CONCURRENCY = 2
+GWT_MAX_CONCURRENCY = 32
+GWT_LATENCY_SPIKE = 3.0          # latency > this × smoothed latency counts as congestion
+BREAKER_FAILURES = 5             # consecutive failures that open the circuit
+BREAKER_COOLDOWN = 30.0          # seconds open before a single probe is let through
+
+# Per-method call stats for this process, emitted as metrics by main()
+GWT_STATS = {}
+_GWT_STATS_LOCK = threading.Lock()
+
+# Idle (source session, copy) pairs for hedged attempts
+_hedge_sessions = []
+_hedge_lock = threading.Lock()
+
+
+def gwt_method(payload):
+    """Method name from a GWT-RPC payload ('7|0|N|base|policy|service|method|...')."""
+    parts = payload.split("|", 7)
+    return parts[6] if len(parts) > 6 else "unknown"
+
+
+def _record_gwt(payload, started, ok, **counts):
+    with _GWT_STATS_LOCK:
+        st = GWT_STATS.setdefault(gwt_method(payload), {
+            "calls": 0, "errors": 0, "seconds": 0.0,
+            "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0,
+        })
+        st["calls"] += 1
+        st["errors"] += 0 if ok else 1
+        st["seconds"] += time.monotonic() - started
+        for key, n in counts.items():
+            st[key] += n
+
+
+class GwtUnavailable(Exception):
+    """The client refused to send: circuit open, or no slot before the deadline."""
+
+
+class GwtServiceError(Exception):
+    """The service answered //EX (raised by gwt_call(raise_ex=True))."""
+
+
+class GwtLimiter:
+    """Client-side flow control for www.loseit.com/web/service.
+
+    Every request takes a token from a bucket (GWT_RATE/s, GWT_BURST deep)
+    and an in-flight slot. The slot limit is AIMD: +1/limit per success,
+    halved on a 429/5xx or transport error and cut by a quarter on a
+    latency spike — once per window, i.e. only by requests sent after the
+    previous cut. BREAKER_FAILURES failures in a row open the
+    circuit: calls fail fast for BREAKER_COOLDOWN, then one probe decides
+    whether it closes again.
+    """
+
+    def __init__(self, rate=GWT_RATE, burst=GWT_BURST, concurrency=GWT_CONCURRENCY,
+                 max_concurrency=GWT_MAX_CONCURRENCY, failures=BREAKER_FAILURES,
+                 cooldown=BREAKER_COOLDOWN):
+        self._cond = threading.Condition()
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self.limit = float(concurrency)
+        self.max_limit = max_concurrency
+        self.in_flight = 0
+        self._latency = None
+        self._last_decrease = 0.0
+        self.failures, self.cooldown = failures, cooldown
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probe = None         # start time of the request holding the half-open probe slot
+        self.stats = {"waited": 0.0, "trips": 0, "rejected": 0, "decreases": 0,
+                      "min_limit": self.limit}
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _reject(self, reason):
+        self.stats["rejected"] += 1
+        raise GwtUnavailable(reason)
+
+    def acquire(self, timeout):
+        """Wait for a token and a slot → start time. Raises GwtUnavailable."""
+        t0 = time.monotonic()
+        give_up = t0 + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.state == "open":
+                    left = self.cooldown - (now - self._opened_at)
+                    if left > 0:
+                        self._reject(f"circuit open after {self._consecutive} failures, "
+                                     f"next probe in {left:.0f}s")
+                    self.state = "half_open"
+                if self.state == "half_open" and self._probe is not None:
+                    self._reject("circuit half-open, waiting on probe")
+                self._refill(now)
+                has_token = self.rate <= 0 or self._tokens >= 1
+                if has_token and self.in_flight < int(self.limit):
+                    break
+                wait = give_up - now
+                if wait <= 0:
+                    self._reject("no request slot before the deadline")
+                if not has_token:
+                    wait = min(wait, (1 - self._tokens) / self.rate)
+                self._cond.wait(wait)
+            if self.rate > 0:
+                self._tokens -= 1
+            self.in_flight += 1
+            if self.state == "half_open":
+                self._probe = now
+            self.stats["waited"] += now - t0
+            return now
+
+    def release(self, started, status):
+        """Record how a request went (status None = transport error).
+
+        `started` is acquire()'s return value; it also identifies the probe.
+        """
+        now = time.monotonic()
+        latency = now - started
+        failed = status is None or status == 429 or status >= 500
+        with self._cond:
+            self.in_flight -= 1
+            # Only the probe decides a half-open circuit; late replies from
+            # requests sent before it opened don't
+            probe = self._probe is not None and started == self._probe
+            if probe:
+                self._probe = None
+            if failed:
+                self._consecutive += 1
+                self._decrease(started, 0.5)
+                if probe or (self.state == "closed" and self._consecutive >= self.failures):
+                    self.state = "open"
+                    self._opened_at = now
+                    self.stats["trips"] += 1
+            else:
+                self._consecutive = 0
+                if probe:
+                    self.state = "closed"
+                spike = self._latency is not None and latency > GWT_LATENCY_SPIKE * self._latency
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+                if spike:
+                    self._decrease(started, 0.75)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, started, factor):
+        # Requests already in flight at the last cut saw the old limit
+        if started < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        self.limit = max(GWT_MIN_CONCURRENCY, self.limit * factor)
+        self.stats["decreases"] += 1
+        self.stats["min_limit"] = min(self.stats["min_limit"], self.limit)
+
+    def snapshot(self):
+        with self._cond:
+            return {"state": self.state, "limit": round(self.limit, 2), "in_flight": self.in_flight,
+                    "latency": round(self._latency, 4) if self._latency is not None else None,
+                    **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()}}
+
+
+GWT_LIMITER = GwtLimiter()
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def limiter_summary():
+    lim = GWT_LIMITER.snapshot()
+    return (f"⚖️  Limiter: concurrency {lim['limit']:g} (low {lim['min_limit']:g}), "
+            f"{lim['waited']:.2f}s queued (all threads), circuit {lim['state']} "
+            f"({lim['trips']} trips, {lim['rejected']} rejected)")
+
+
+def _post(session, payload, timeout):
+    """One attempt → (status, text); raises requests.RequestException or GwtUnavailable."""
+    t0 = time.monotonic()
+    started = GWT_LIMITER.acquire(timeout)
+    status = None
+    try:
+        timeout = max(0.1, timeout - (started - t0))
+        resp = session.post(SERVICE_URL, data=payload,
+                            timeout=(min(GWT_CONNECT_TIMEOUT, timeout), timeout))
+        status = resp.status_code
+        return resp.status_code, resp.text
+    finally:
+        GWT_LIMITER.release(started, status)
+
+
+def _borrow_session(session):
+    """An idle copy of `session` for a hedged attempt (sessions aren't shared across threads)."""
+    with _hedge_lock:
+        for i, (source, copy) in enumerate(_hedge_sessions):
+            if source is session:
+                return _hedge_sessions.pop(i)[1]
+    copy = requests.Session()
+    copy.headers.update(session.headers)
+    copy.cookies.update(session.cookies)
+    return copy
+
+
+def _hedged_post(session, payload, timeout, hedge_after):
+    """Send a read; if no answer within hedge_after, race a second copy.
+
+    Returns ((status, text), hedged, hedge_won). Both attempts run on daemon
+    threads with borrowed session copies, so an abandoned attempt neither
+    blocks exit nor shares the caller's session. The first 200 wins.
+    """
+    results = queue.Queue()
+
+    def attempt(tag):
+        copy = _borrow_session(session)
+        try:
+            results.put((tag, _post(copy, payload, timeout), None))
+        except (requests.RequestException, GwtUnavailable) as e:
+            results.put((tag, None, e))
+        finally:
+            with _hedge_lock:
+                _hedge_sessions.append((session, copy))
+
+    threading.Thread(target=attempt, args=("primary",), daemon=True).start()
+    try:
+        _, result, error = results.get(timeout=hedge_after)
+        if error is not None:
+            raise error
+        return result, False, False
+    except queue.Empty:
+        pass
+    threading.Thread(target=attempt, args=("hedge",), daemon=True).start()
+    result = error = None
+    for _ in range(2):
+        tag, res, err = results.get()
+        if err is not None:
+            error = err
+            continue
+        result = res
+        if res[0] == 200:
+            return res, True, tag == "hedge"
+    if result is None:
+        raise error
+    return result, True, False
+
+
+def _retryable(idempotent, status, error):
+    if isinstance(error, GwtUnavailable):
+        return False
+    if error is not None:
+        return idempotent or _never_sent(error)
+    return idempotent and status in READ_RETRY_STATUS
+
+
+def _never_sent(error):
+    """Whether a transport error happened before any request bytes were sent."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def gwt_call(session, payload, debug=False, quiet=False, deadline=None, idempotent=None, raise_ex=False):
+    """Send GWT-RPC call, return raw response text or None on error.
+
+    Transport errors and 5xx are retried with jittered exponential backoff
+    until GWT_RETRIES or the deadline (seconds, default GWT_DEADLINE) runs
+    out; see IDEMPOTENT_METHODS for what reads vs writes retry on. //EX
+    replies are the service rejecting the call and are never retried, and
+    neither are calls GWT_LIMITER refuses (open circuit).
+    idempotent=True opts a write into the read policy (keyed updates).
+    quiet suppresses error output (background prefetches). raise_ex raises
+    GwtServiceError on //EX instead of returning None.
+    """
     if debug:
         print(f"  📤 Payload ({len(payload)} chars): {payload[:180]}...")
-    resp = session.post(SERVICE_URL, data=payload)
-    if debug:
-        print(f"  📥 HTTP {resp.status_code}, {len(resp.text)} chars")
-    if resp.status_code != 200:
-        print(f"❌ HTTP {resp.status_code}: {resp.text[:300]}")
+    method = gwt_method(payload)
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    started = time.monotonic()
+    deadline_at = started + (deadline or GWT_DEADLINE)
+    counts = {"retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+    attempt = 0
+    while True:
+        timeout = max(0.1, min(GWT_TIMEOUT, deadline_at - time.monotonic()))
+        status, text, error = None, "", None
+        try:
+            if idempotent and GWT_HEDGE_AFTER > 0:
+                (status, text), hedged, won = _hedged_post(session, payload, timeout, GWT_HEDGE_AFTER)
+                counts["hedges"] += hedged
+                counts["hedge_wins"] += won
+            else:
+                status, text = _post(session, payload, timeout)
+        except (requests.RequestException, GwtUnavailable) as e:
+            error = e
+            counts["timeouts"] += isinstance(e, requests.Timeout)
+        if debug:
+            print(f"  📥 HTTP {status}, {len(text)} chars" if error is None else f"  📥 {error!r}")
+
+        delay = random.uniform(0, min(GWT_MAX_BACKOFF, GWT_BACKOFF * 2 ** attempt))
+        if (not _retryable(idempotent, status, error) or attempt >= GWT_RETRIES
+                or time.monotonic() + delay >= deadline_at):
+            break
+        attempt += 1
+        counts["retries"] += 1
+        if debug:
+            print(f"  🔁 {method}: retry {attempt}/{GWT_RETRIES} in {delay:.1f}s")
+        time.sleep(delay)
+
+    ok = status == 200 and text.startswith("//OK")
+    _record_gwt(payload, started, ok, **counts)
+    if error is not None:
+        if not quiet:
+            print(f"❌ {method} failed after {attempt + 1} attempt(s): {error}")
+        return None
+    if status != 200:
+        if not quiet:
+            print(f"❌ HTTP {status}: {text[:300]}")
         return None
-    text = resp.text
     if text.startswith("//EX"):
         err = re.search(r'"([^"]*)"', text)
-        print(f"❌ GWT Error: {err.group(1) if err else text[:200]}")
+        message = err.group(1) if err else text[:200]
+        if raise_ex:
+            raise GwtServiceError(message)
+        if not quiet:
+            print(f"❌ GWT Error: {message}")
         return None
     if not text.startswith("//OK"):
-        print(f"❌ Unexpected: {text[:200]}")
+        if not quiet:
+            print(f"❌ Unexpected: {text[:200]}")
         return None
     return text
 
@@ -190,12 +554,60 @@ def day_number_for(d: date) -> int:
     return anchor_num + (d - anchor_date).days
 
 
+_GWT_LONG_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789$_"
+
+
+def gwt_long(n: int) -> str:
+    """Encode a long the way GWT-RPC does (base64 digits, e.g. 'ZwdImkw')."""
+    if n == 0:
+        return "A"
+    out = []
+    while n:
+        n, r = divmod(n, 64)
+        out.append(_GWT_LONG_ALPHABET[r])
+    return "".join(reversed(out))
+
+
+def gwt_long_value(s: str) -> int:
+    n = 0
+    for c in s:
+        n = n * 64 + _GWT_LONG_ALPHABET.index(c)
+    return n
+
+
+def day_key_for(d: date) -> str:
+    """DayDate key for a date: local midnight as GWT-encoded epoch millis.
+
+    Captured keys decode to java.util.Date millis on the same day
+    ('ZwdImkw' → 2026-02-02 01:55 local), so any day can be addressed
+    without a getInitializationData lookup.
+    """
+    midnight = datetime(d.year, d.month, d.day, tzinfo=timezone(timedelta(hours=HOURS_FROM_GMT)))
+    return gwt_long(int(midnight.timestamp() * 1000))
+
+
 def parse_date_arg(s: str | None) -> date:
     if not s:
         return datetime.now().date()
     return datetime.strptime(s, "%Y-%m-%d").date()
 
 
+def parse_dates_arg(s: str | None) -> list[date]:
+    """--date value → sorted dates: YYYY-MM-DD, START..END, or a comma list of either."""
+    if not s:
+        return [parse_date_arg(None)]
+    out = set()
+    for part in s.split(","):
+        if ".." in part:
+            start, end = (parse_date_arg(p.strip()) for p in part.split("..", 1))
+            if end < start:
+                raise ValueError(f"{part.strip()}: end is before start")
+            out.update(start + timedelta(days=i) for i in range((end - start).days + 1))
+        else:
+            out.add(parse_date_arg(part.strip()))
+    return sorted(out)
+
+
 # ─── Replay ──────────────────────────────────────────────────────────────────
 
 REPLAY_PAYLOAD = (
@@ -303,6 +715,12 @@ def do_delete_replay(session, debug=False, yes=False):
 
 # ─── Search ──────────────────────────────────────────────────────────────────
 
+SEARCH_LIMIT = 15               # searchFoods' max results; fewer back = the full match set
+
+SEARCH_CACHE = SearchCache()
+CATALOG = FoodCatalog()
+
+
 def build_search_payload(query):
     """Build searchFoods GWT-RPC payload (incremental search format)."""
     strings = [
@@ -321,24 +739,12 @@ def build_search_payload(query):
     ]
     n = len(strings)
     header = f"7|0|{n}|" + "|".join(strings) + "|"
-    data = f"1|2|3|4|6|5|6|6|7|8|8|5|0|9|{USER_ID}|10|{HOURS_FROM_GMT}|11|12|15|1|1|"
+    data = f"1|2|3|4|6|5|6|6|7|8|8|5|0|9|{USER_ID}|10|{HOURS_FROM_GMT}|11|12|{SEARCH_LIMIT}|1|1|"
     return header + data
 
 
-def extract_food_results(tokens, string_table):
-    """Extract food results from GWT search response.
-
-    Heuristic parser:
-    - Each SearchResultFood block ends with: <16 pk bytes> 16 [B_ref] SimplePrimaryKey_ref SearchResultFood_ref
-      In practice for our responses: ... <16 bytes>, 16, bytes_type_ref, pk_type_ref, food_type_ref
-    - We split on that delimiter and then recover name/brand/category by mapping
-      positive string refs in the chunk.
-
-    Returns list of dicts: {name, brand, category, pk_bytes}
-    """
-    foods = []
-
-    # Identify type refs
+def search_result_ends(tokens, string_table):
+    """Token index where each SearchResultFood block ends (one per result, parsed or not)."""
     food_type_ref = None
     pk_type_ref = None
     bytes_type_ref = None
@@ -353,15 +759,25 @@ def extract_food_results(tokens, string_table):
             bytes_type_ref = ref
 
     if not (food_type_ref and pk_type_ref and bytes_type_ref):
-        return foods
+        return []
 
     delimiter = [16, bytes_type_ref, pk_type_ref, food_type_ref]
+    return [i + 3 for i in range(len(tokens) - 3) if tokens[i:i+4] == delimiter]
+
+
+def extract_food_results(tokens, string_table):
+    """Extract food results from GWT search response.
+
+    Heuristic parser:
+    - Each SearchResultFood block ends with: <16 pk bytes> 16 [B_ref] SimplePrimaryKey_ref SearchResultFood_ref
+      In practice for our responses: ... <16 bytes>, 16, bytes_type_ref, pk_type_ref, food_type_ref
+    - We split on that delimiter and then recover name/brand/category by mapping
+      positive string refs in the chunk.
 
-    # Find all occurrences of delimiter
-    ends = []
-    for i in range(len(tokens) - 3):
-        if tokens[i:i+4] == delimiter:
-            ends.append(i+3)
+    Returns list of dicts: {name, brand, category, pk_bytes}
+    """
+    foods = []
+    ends = search_result_ends(tokens, string_table)
 
     # Find plausible start of first entry: after first negative backref marker
     start = 0
@@ -425,14 +841,28 @@ def extract_food_results(tokens, string_table):
     return foods
 
 
-def search_foods(session, query, debug=False):
-    """Search for foods, return list of {name, brand, category, pk_bytes}."""
+def search_foods(session, query, debug=False, quiet=False, use_cache=True):
+    """Search for foods, return list of {name, brand, category, pk_bytes}.
+
+    None (rather than []) means the call itself failed. Repeated queries and
+    refinements of a query whose full match set is cached are answered by
+    SEARCH_CACHE without a call; use_cache=False always asks the server.
+    """
+    if use_cache:
+        foods, source = SEARCH_CACHE.get(query)
+        if foods is not None:
+            if not quiet:
+                how = "cached" if source == "exact" else f"filtered from cached {source[7:]!r}"
+                print(f"🔍 Searching: {query} ({how})")
+            return foods
+
     payload = build_search_payload(query)
-    print(f"🔍 Searching: {query}")
+    if not quiet:
+        print(f"🔍 Searching: {query}")
 
-    result = gwt_call(session, payload, debug=debug)
+    result = gwt_call(session, payload, debug=debug, quiet=quiet)
     if not result:
-        return []
+        return None
 
     tokens, string_table = parse_gwt_response(result)
 
@@ -447,10 +877,75 @@ def search_foods(session, query, debug=False):
         return []
 
     foods = extract_food_results(tokens, string_table)
+    CATALOG.add_foods(foods)
+    SEARCH_CACHE.put(query, foods, complete=len(search_result_ends(tokens, string_table)) < SEARCH_LIMIT)
 
     return foods
 
 
+RRF_K = 60                      # reciprocal-rank fusion constant for --hybrid
+
+
+def merge_results(live, local, k=RRF_K):
+    """Reciprocal-rank fusion of live and local hits, one row per food PK.
+
+    A food scores 1/(k + rank) in each list it appears in, so foods both
+    lists agree on rise to the top. Ties keep the live result first.
+    """
+    scores, by_pk = {}, {}
+    for results in (live, local):
+        for rank, food in enumerate(results, 1):
+            pk = tuple(food.get("pk_bytes") or ()) or id(food)
+            scores[pk] = scores.get(pk, 0.0) + 1.0 / (k + rank)
+            by_pk.setdefault(pk, food)
+    return [by_pk[pk] for pk in sorted(scores, key=scores.get, reverse=True)]
+
+
+def find_foods(session, query, mode="live", debug=False, quiet=False, use_cache=True):
+    """search_foods, or the local CATALOG: mode is "live", "offline" or "hybrid".
+
+    offline never touches the network; hybrid merges live and local hits and
+    falls back to the local ones if the live search fails.
+    """
+    if mode == "offline":
+        t0 = time.monotonic()
+        foods = CATALOG.search(query, SEARCH_LIMIT)
+        if not quiet:
+            print(f"🔍 Searching: {query} (offline catalog, {(time.monotonic() - t0) * 1000:.1f} ms)")
+        return foods
+    live = search_foods(session, query, debug=debug, quiet=quiet, use_cache=use_cache)
+    if mode != "hybrid":
+        return live
+    local = CATALOG.search(query, SEARCH_LIMIT)
+    if live is None:
+        if local and not quiet:
+            print(f"  ⚠️  Live search failed — showing {len(local)} offline catalog matches")
+        return local or None
+    return merge_results(live, local)
+
+
+SEARCH_WORKERS = 8
+
+
+def search_many(session, queries, workers=SEARCH_WORKERS, debug=False, use_cache=True, mode="live"):
+    """Run several searches concurrently → [(query, foods or None, seconds)] in input order.
+
+    All workers share `session` (give it a pool of `workers` connections).
+    Each worker parses its response as soon as it arrives, while the
+    other requests are still in flight, so the wall time approaches that of
+    the slowest search. Repeated queries are only searched once.
+    """
+    def one(query):
+        t0 = time.monotonic()
+        foods = find_foods(session, query, mode, debug=debug, quiet=True, use_cache=use_cache)
+        return foods, time.monotonic() - t0
+
+    unique = list(dict.fromkeys(queries))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as pool:
+        results = dict(zip(unique, pool.map(one, unique)))
+    return [(q, *results[q]) for q in queries]
+
+
 def load_personal_db():
     """Load personal food database from CSV export"""
     import json
@@ -501,6 +996,8 @@ def display_results(foods, limit=15):
     for i, f in enumerate(foods[:limit]):
         name = (f.get('name') or '')[:50]
         brand = (f.get('brand') or '')[:20]
+        if f.get('source') == 'local':
+            name = f"{name[:48]} ·"
         if brand:
             print(f"{i+1:>3}  {name:50} {brand}")
         else:
@@ -515,6 +1012,9 @@ def display_results(foods, limit=15):
                 cal = match.get('calories', 0)
                 print(f"       📍 You usually log: {qty} {unit} = {cal:.0f} cal")
 
+    if any(f.get('source') == 'local' for f in foods[:limit]):
+        print("\n  · from the offline food catalog")
+
 
 # ─── getInitializationData (for DayDate key) ────────────────────────────────
 
@@ -534,14 +1034,14 @@ def build_get_initialization_data_payload():
     return header + data
 
 
-def get_daydate_key(session, target_daynum: int, debug=False) -> str | None:
+def get_daydate_key(session, target_daynum: int, debug=False, quiet=False) -> str | None:
     """Best-effort lookup of the DayDate key string for a day number.
 
     Uses getInitializationData, which returns recent DayDate keys.
     If target is outside returned range, returns None.
     """
     payload = build_get_initialization_data_payload()
-    resp = gwt_call(session, payload, debug=debug)
+    resp = gwt_call(session, payload, debug=debug, quiet=quiet)
     if not resp:
         return None
     tokens, _st = parse_gwt_response(resp)
@@ -724,21 +1224,27 @@ def parse_unsaved_food_log_entry(tokens, string_table):
     return out
 
 
-def get_unsaved_food_log_entry(session, food, debug=False):
+def get_unsaved_food_log_entry(session, food, debug=False, quiet=False):
     payload = build_get_unsaved_food_log_entry_payload(food)
-    resp = gwt_call(session, payload, debug=debug)
+    resp = gwt_call(session, payload, debug=debug, quiet=quiet)
     if not resp:
         return None
     tokens, st = parse_gwt_response(resp)
     if debug:
         print(f"  getUnsavedFoodLogEntry: string_table={len(st)} tokens={len(tokens)}")
-    return parse_unsaved_food_log_entry(tokens, st)
+    unsaved = parse_unsaved_food_log_entry(tokens, st)
+    CATALOG.add_unsaved(food, unsaved)
+    return unsaved
 
 
 # ─── updateFoodLogEntry ─────────────────────────────────────────────────────
 
-def build_update_food_log_entry_payload(unsaved, meal_ordinal: int, day_key: str, day_num: int, servings: float):
-    """Build updateFoodLogEntry payload from parsed unsaved entry."""
+def build_update_food_log_entry_payload(unsaved, meal_ordinal: int, day_key: str, day_num: int, servings: float,
+                                        entry_uuid: uuid.UUID | None = None):
+    """Build updateFoodLogEntry payload from parsed unsaved entry.
+
+    entry_uuid is the new entry's PK (random unless given, see entry_uuid_for).
+    """
 
     # Scale nutrients — server only accepts the core 9 ordinals
     CORE_NUTRIENT_ORDINALS = {0, 2, 3, 8, 9, 10, 11, 12, 13}
@@ -752,7 +1258,7 @@ def build_update_food_log_entry_payload(unsaved, meal_ordinal: int, day_key: str
     if not food_pk or len(food_pk) != 16:
         raise ValueError("missing food primary key bytes")
 
-    entry_uuid = uuid.uuid4()
+    entry_uuid = entry_uuid or uuid.uuid4()
     entry_pk = uuid_signed_bytes(entry_uuid)
 
     # String table matches replay payload (28 entries)
@@ -847,16 +1353,71 @@ def build_update_food_log_entry_payload(unsaved, meal_ordinal: int, day_key: str
     return header + "|".join(parts) + "|"
 
 
-def log_food(session, food, meal: str, when: date, servings: float, debug=False):
+# Namespace for deterministic entry PKs (uuid5 of user|food PK|date|meal|key)
+ENTRY_NAMESPACE = uuid.UUID("5b0c1e2a-7d4f-5e8b-9a61-3c2f4d8e1b70")
+
+KEYS = KeyStore()
+
+
+def entry_uuid_for(food_pk_bytes, when: date, meal: str, key: str) -> uuid.UUID:
+    """Entry PK for an idempotency key: the same request always maps to the same PK."""
+    food_hex = bytes(int(b) % 256 for b in food_pk_bytes).hex()
+    return uuid.uuid5(ENTRY_NAMESPACE, "|".join([USER_ID, food_hex, when.isoformat(), meal, key]))
+
+
+def auto_key():
+    """Idempotency key for a log command run without --key.
+
+    The first send then already uses a derived entry PK. If the server saved
+    the entry but the reply was lost, the journaled retry resends that same
+    PK instead of adding a second entry.
+    """
+    return f"auto:{uuid.uuid4().hex[:12]}"
+
+
+def key_conflict(key, food, when: date, meal: str):
+    """Why `key` can't be used for this entry, or None."""
+    if not food.get("pk_bytes"):
+        return "idempotent logging needs the food's PK"
+    prev = KEYS.get(key)
+    if prev and prev.get("entry_pk") != str(entry_uuid_for(food["pk_bytes"], when, meal, key)):
+        used = " ".join(filter(None, [prev.get("name"), prev.get("meal") and f"({prev['meal']})", prev.get("date")]))
+        return f"idempotency key {key!r} was already used for a different entry" + (f": {used}" if used else "")
+    return None
+
+
+def save_food_log(session, food, meal: str, when: date, servings: float, debug=False,
+                  unsaved=None, day_key=None, quiet=False, key=None):
+    """getUnsavedFoodLogEntry + updateFoodLogEntry → (saved entry or None, error or None).
+
+    unsaved/day_key (from a Prefetcher) skip their lookups. With an
+    idempotency key the entry PK is derived from it (entry_uuid_for) and the
+    key is tracked in KeyStore: a confirmed key is not sent again (the saved
+    entry comes back with "duplicate": True), and the update is retried like
+    a read since resending the same PK can't create a second entry.
+    """
     meal_ord = MEAL_TYPES[meal]
     day_num = day_number_for(when)
-    unsaved = get_unsaved_food_log_entry(session, food, debug=debug)
+    entry_uuid = None
+    if key:
+        error = key_conflict(key, food, when, meal)
+        if error:
+            return None, error
+        entry_uuid = entry_uuid_for(food["pk_bytes"], when, meal, key)
+        prev = KEYS.get(key)
+        if prev and prev["op"] == "confirmed":
+            return {**food, "entry_pk": prev["entry_pk"], "duplicate": True}, None
+
+    if unsaved:
+        unsaved = dict(unsaved)
+    else:
+        unsaved = get_unsaved_food_log_entry(session, food, debug=debug, quiet=quiet)
     if not unsaved:
-        print("❌ getUnsavedFoodLogEntry failed")
-        return False
+        return None, "getUnsavedFoodLogEntry failed"
 
     # Prefer day_key from unsaved response; fall back to getInitializationData
-    day_key = unsaved.get("day_key") or get_daydate_key(session, day_num, debug=debug) or ""
+    day_key = (unsaved.get("day_key") or day_key
+               or get_daydate_key(session, day_num, debug=debug, quiet=quiet) or "")
 
     # Prefer original selected metadata
     if food.get("name"):
@@ -868,11 +1429,34 @@ def log_food(session, food, meal: str, when: date, servings: float, debug=False)
     if food.get("pk_bytes"):
         unsaved["food_pk_bytes"] = food["pk_bytes"]
 
-    payload = build_update_food_log_entry_payload(unsaved, meal_ord, day_key, day_num, servings)
-    resp = gwt_call(session, payload, debug=debug)
+    payload = build_update_food_log_entry_payload(unsaved, meal_ord, day_key, day_num, servings,
+                                                  entry_uuid=entry_uuid)
+    if key:
+        KEYS.record(key, "sent", entry_pk=str(entry_uuid), date=when.isoformat(), meal=meal,
+                    name=unsaved.get("name"))
+    resp = gwt_call(session, payload, debug=debug, quiet=quiet, idempotent=bool(key) or None)
     if not resp:
+        return None, "updateFoodLogEntry failed"
+    if key:
+        KEYS.record(key, "confirmed", entry_pk=str(entry_uuid))
+    unsaved["entry_pk"] = str(entry_uuid) if entry_uuid else None
+    return unsaved, None
+
+
+def log_food(session, food, meal: str, when: date, servings: float, debug=False,
+             unsaved=None, day_key=None, key=None):
+    """Log a food and print what was saved → True on success."""
+    unsaved, error = save_food_log(session, food, meal, when, servings, debug=debug,
+                                   unsaved=unsaved, day_key=day_key, key=key)
+    if error:
+        print(f"❌ {error}")
         return False
+    if unsaved.get("duplicate"):
+        print(f"♻️  Already logged under key {key!r} (entry {unsaved['entry_pk']}); not sent again")
+        return True
 
+    meal_ord = MEAL_TYPES[meal]
+    day_num = day_number_for(when)
     print("✅ Logged successfully!")
     print(f"   📦 {unsaved.get('name','(food)')}")
     if unsaved.get("brand"):
@@ -888,9 +1472,789 @@ def log_food(session, food, meal: str, when: date, servings: float, debug=False)
     return True
 
 
+LOG_WORKERS = 4                 # concurrent updateFoodLogEntry calls for multi-date logging
+
+
+def log_food_dates(token, session, food, meal: str, dates, servings: float, unsaved=None,
+                   workers=LOG_WORKERS, key=None, debug=False):
+    """Log one food on several dates → {date: (saved entry or None, error or None)}.
+
+    The unsaved entry is fetched once (unless given) and shared by every
+    date. Each day's DayDate key and number are computed locally, so the
+    only per-day call is updateFoodLogEntry, sent on up to `workers`
+    threads with their own sessions. With a key, each date is keyed
+    "<key>:<date>".
+    """
+    unsaved = unsaved or get_unsaved_food_log_entry(session, food, debug=debug)
+    if not unsaved:
+        return {d: (None, "getUnsavedFoodLogEntry failed") for d in dates}
+    # The unsaved entry's own day key is for today; each date gets its own
+    shared = {k: v for k, v in unsaved.items() if k != "day_key"}
+    day_keys = {d: day_key_for(d) for d in dates}
+    local = threading.local()
+
+    def send(d):
+        if not hasattr(local, "session"):
+            local.session = make_session(token)
+        return d, save_food_log(local.session, food, meal, d, servings, debug=debug, unsaved=shared,
+                                day_key=day_keys[d], quiet=True,
+                                key=f"{key}:{d.isoformat()}" if key else None)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(dates)))) as pool:
+        return dict(fut.result() for fut in as_completed([pool.submit(send, d) for d in dates]))
+
+
+# ─── Prefetch ────────────────────────────────────────────────────────────────
+
+PREFETCH_TOP = 5
+PREFETCH_WORKERS = 3
+
+
+class Prefetcher:
+    """Fetch unsaved entries for the top results while the pick prompt waits.
+
+    The day key is requested first, then getUnsavedFoodLogEntry for each of
+    the first `top` results in display order, on a small pool whose threads
+    each have their own session. After the pick, get() returns what was
+    prefetched for it (waiting if still in flight) so logging takes one
+    updateFoodLogEntry call; close() drops the rest.
+    """
+
+    def __init__(self, token, foods, when: date, top=PREFETCH_TOP, workers=PREFETCH_WORKERS):
+        self._token = token
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._day_key = self._pool.submit(self._call, get_daydate_key, day_number_for(when))
+        self._entries = [self._pool.submit(self._call, get_unsaved_food_log_entry, food)
+                         for food in foods[:top]]
+
+    def _call(self, fn, arg):
+        if not hasattr(self._local, "session"):
+            self._local.session = make_session(self._token)
+        return fn(self._local.session, arg, quiet=True)
+
+    @staticmethod
+    def _result(fut):
+        try:
+            return fut.result()
+        except Exception:
+            return None
+
+    def get(self, idx):
+        """(unsaved entry or None, day key or None) for result `idx`."""
+        if idx >= len(self._entries):
+            return None, None
+        return self._result(self._entries[idx]), self._result(self._day_key)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ─── Journal ─────────────────────────────────────────────────────────────────
+
+FLUSH_BATCH = 20
+FLUSH_WORKERS = 8
+
+EXIT_QUEUED = 3
+
+
+def journal_entry(food, meal, when: date, servings, query=None, pick=None, key=None):
+    """Journal record for a log request; food None = resolve query/pick at flush."""
+    entry = {"meal": meal, "date": when.isoformat(), "servings": servings}
+    if key:
+        entry["key"] = key
+    if food:
+        entry["food"] = {k: food.get(k) for k in ("name", "brand", "category", "pk_bytes")}
+    else:
+        entry["query"], entry["pick"] = query, pick
+    return entry
+
+
+def describe_entry(entry):
+    food = entry.get("food") or {}
+    what = food.get("name") or f'"{entry.get("query")}" #{entry.get("pick")}'
+    servings = f" × {entry['servings']:g}" if entry.get("servings", 1) != 1 else ""
+    return f"{what}{servings} → {MEAL_NAMES[MEAL_TYPES[entry['meal']]]} {entry['date']}"
+
+
+def queue_entry(journal, entry, reason):
+    entry_id = journal.add(entry)
+    print(f"📥 Queued {describe_entry(entry)} [{entry_id}] ({reason})")
+    print("   Send it later with: loseit-log.py --flush")
+    return entry_id
+
+
+def flush_one(session, entry, debug=False):
+    """Log one journal entry → (saved entry or None, error or None).
+
+    Entries are always sent idempotently, keyed by their idempotency key or
+    else their journal id, so a flush interrupted between the server saving
+    an entry and the journal marking it done can't log it twice.
+    """
+    food = entry.get("food")
+    if not food:
+        foods = search_foods(session, entry["query"], debug=debug, quiet=True)
+        if not foods:
+            return None, f"search for {entry['query']!r} failed or found nothing"
+        if not 1 <= entry["pick"] <= len(foods):
+            return None, f"pick {entry['pick']} out of range (1..{len(foods)})"
+        food = foods[entry["pick"] - 1]
+    return save_food_log(session, food, entry["meal"], date.fromisoformat(entry["date"]),
+                         entry["servings"], debug=debug, quiet=True,
+                         key=entry.get("key") or f"journal:{entry['id']}")
+
+
+def flush_journal(token, journal, workers=FLUSH_WORKERS, batch=FLUSH_BATCH, debug=False):
+    """Send pending journal entries in batches → {"done", "failed", "remaining"}.
+
+    Each batch runs on up to `workers` threads (each with its own session);
+    GWT_LIMITER still paces the calls. If the circuit opens, the remaining
+    batches are left for the next flush. The journal is compacted at the end.
+    """
+    local = threading.local()
+
+    def send(entry):
+        if not hasattr(local, "session"):
+            local.session = make_session(token)
+        return entry, flush_one(local.session, entry, debug=debug)
+
+    done = failed = 0
+    with journal.flushing():
+        pending = journal.pending()
+        if pending:
+            print(f"📤 Flushing {len(pending)} queued entries ({workers} workers, batches of {batch})")
+        for start in range(0, len(pending), batch):
+            if GWT_LIMITER.state == "open":
+                print("⏸️  Circuit open — leaving the rest for the next flush")
+                break
+            chunk = pending[start:start + batch]
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunk)))) as pool:
+                for fut in as_completed([pool.submit(send, e) for e in chunk]):
+                    entry, (saved, error) = fut.result()
+                    if error:
+                        journal.mark_failed(entry["id"], error)
+                        failed += 1
+                        print(f"  ❌ [{entry['id']}] {describe_entry(entry)}: {error}")
+                    else:
+                        journal.mark_done(entry["id"], name=saved.get("name"), entry_pk=saved.get("entry_pk"))
+                        done += 1
+                        dup = " (already logged)" if saved.get("duplicate") else ""
+                        print(f"  ✅ [{entry['id']}] {describe_entry(entry)}{dup}")
+        remaining = journal.compact()
+    return {"done": done, "failed": failed, "remaining": remaining}
+
+
+def show_journal(journal):
+    pending = journal.pending()
+    if not pending:
+        print(f"📭 Journal empty ({journal.path})")
+        return
+    print(f"📬 {len(pending)} queued entries ({journal.path})")
+    for e in pending:
+        queued = datetime.fromtimestamp(e["queued_at"]).strftime("%Y-%m-%d %H:%M")
+        tries = f", {e['attempts']} failed attempts: {e.get('last_error')}" if e.get("attempts") else ""
+        print(f"  [{e['id']}] {describe_entry(e)} (queued {queued}{tries})")
+
+
+# ─── Meal Templates ──────────────────────────────────────────────────────────
+
+TEMPLATES_FILE = os.environ.get("LOSEIT_TEMPLATES") or os.path.expanduser(
+    "~/clawd/integrations/loseit/data/meal-templates.json")
+TEMPLATE_CACHE_DAYS = 30        # cached unsaved entries (nutrients, measure) reused this long
+TEMPLATE_WORKERS = 6
+
+
+def load_templates():
+    try:
+        with open(TEMPLATES_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_templates(templates):
+    os.makedirs(os.path.dirname(TEMPLATES_FILE), exist_ok=True)
+    tmp = f"{TEMPLATES_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(templates, f, indent=1)
+    os.replace(tmp, TEMPLATES_FILE)
+
+
+def _cacheable_unsaved(unsaved):
+    """The date-independent part of an unsaved entry, JSON-safe."""
+    out = {k: v for k, v in unsaved.items() if k not in ("day_key", "entry_pk", "nutrients")}
+    out["nutrients"] = {str(k): v for k, v in (unsaved.get("nutrients") or {}).items()}
+    return out
+
+
+def _cached_unsaved(item, max_age=TEMPLATE_CACHE_DAYS * 86400):
+    cached = item.get("unsaved")
+    if not cached or time.time() - item.get("cached_at", 0) > max_age:
+        return None
+    return {**cached, "nutrients": {int(k): v for k, v in cached["nutrients"].items()}}
+
+
+def add_to_template(name, food, meal, servings, unsaved=None):
+    """Append a resolved food to template `name` (created if new) → the template."""
+    templates = load_templates()
+    template = templates.setdefault(name, {"meal": meal, "items": []})
+    item = {"food": {k: food.get(k) for k in ("name", "brand", "category", "pk_bytes")},
+            "servings": servings}
+    if unsaved:
+        item["measure"] = unsaved.get("food_measure_ordinal")
+        item["unsaved"] = _cacheable_unsaved(unsaved)
+        item["cached_at"] = round(time.time(), 3)
+    template["items"].append(item)
+    save_templates(templates)
+    return template
+
+
+def prepare_template(token, template, refresh=False, workers=TEMPLATE_WORKERS, debug=False):
+    """Unsaved entry for every item → (list of unsaved or None, stats).
+
+    Cached entries are used as-is; the rest are fetched concurrently, each
+    thread with its own session, and written back to the template.
+    """
+    t0 = time.monotonic()
+    items = template["items"]
+    unsaved = [None if refresh else _cached_unsaved(item) for item in items]
+    missing = [i for i, u in enumerate(unsaved) if u is None]
+    local = threading.local()
+
+    def fetch(i):
+        if not hasattr(local, "session"):
+            local.session = make_session(token)
+        return i, get_unsaved_food_log_entry(local.session, items[i]["food"], debug=debug, quiet=True)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            for fut in as_completed([pool.submit(fetch, i) for i in missing]):
+                i, entry = fut.result()
+                unsaved[i] = entry
+                if entry:
+                    items[i]["unsaved"] = _cacheable_unsaved(entry)
+                    items[i]["cached_at"] = round(time.time(), 3)
+                    items[i].setdefault("measure", entry.get("food_measure_ordinal"))
+    stats = {"cached": len(items) - len(missing), "fetched": sum(1 for i in missing if unsaved[i]),
+             "failed": sum(1 for i in missing if not unsaved[i]),
+             "seconds": round(time.monotonic() - t0, 3)}
+    return unsaved, stats
+
+
+def log_template(token, session, name, when: date, meal=None, refresh=False, key=None, debug=False):
+    """Log every item of a meal template → {"meal", "logged", "failed", "stats"}.
+
+    logged holds (index, item, saved entry) and failed (index, item, error).
+
+    The unsaved entries are prepared concurrently (or come from the cache),
+    then the updates go out back-to-back on `session`, so the connection
+    stays warm. With an idempotency key, item n is keyed "<key>:<n>".
+    """
+    templates = load_templates()
+    template = templates[name]
+    meal = meal or template["meal"]
+    unsaved, stats = prepare_template(token, template, refresh=refresh, debug=debug)
+    if stats["fetched"]:
+        save_templates(templates)
+
+    t0 = time.monotonic()
+    logged, failed = [], []
+    day_key = day_key_for(when)
+    for n, (item, entry) in enumerate(zip(template["items"], unsaved)):
+        if entry is None:
+            failed.append((n, item, "getUnsavedFoodLogEntry failed"))
+            continue
+        # a fresh entry's own day key is for today; save_food_log would prefer it over `when`'s
+        entry = {k: v for k, v in entry.items() if k != "day_key"}
+        if item.get("measure") is not None:
+            entry["food_measure_ordinal"] = item["measure"]
+        saved, error = save_food_log(session, item["food"], meal, when, item["servings"], debug=debug,
+                                     unsaved=entry, day_key=day_key, quiet=True,
+                                     key=f"{key}:{n}" if key else None)
+        if error:
+            failed.append((n, item, error))
+        else:
+            logged.append((n, item, saved))
+    stats["log_seconds"] = round(time.monotonic() - t0, 3)
+    return {"meal": meal, "logged": logged, "failed": failed, "stats": stats}
+
+
+def show_templates(templates):
+    if not templates:
+        print(f"📭 No meal templates ({TEMPLATES_FILE})")
+        return
+    for name, t in sorted(templates.items()):
+        print(f"🍳 {name} → {MEAL_NAMES[MEAL_TYPES[t['meal']]]} ({len(t['items'])} items)")
+        for item in t["items"]:
+            servings = f" × {item['servings']:g}" if item["servings"] != 1 else ""
+            cached = "" if _cached_unsaved(item) else " (not cached)"
+            print(f"     • {item['food'].get('name')}{servings}{cached}")
+
+
+# ─── Diary ───────────────────────────────────────────────────────────────────
+
+# Diary read call. Signature (ServiceRequestToken, DayDate) mirrors the
+# captured calls, but no capture has confirmed the method name yet, and the
+# parser has only met dev/mock-loseit.py. --diary, --range and
+# --delete-range are experimental until a dev/capture-diary.py capture
+# confirms it; LOSEIT_DIARY_METHOD overrides the guess.
+DIARY_METHOD = os.environ.get("LOSEIT_DIARY_METHOD") or "getFoodLogEntries"
+DIARY_HINT = ("The diary RPC name is unconfirmed (experimental). Capture the real call with "
+              "dev/capture-diary.py and set LOSEIT_DIARY_METHOD to its method name.")
+DIARY_CACHE_DIR = os.path.expanduser("~/clawd/integrations/loseit/data/diary")
+
+# (max days ago, seconds a cached day stays fresh): recent days still change
+DIARY_FRESHNESS = ((1, 5 * 60), (7, 3600), (None, 7 * 86400))
+
+DIARY_WORKERS = 8
+
+
+def build_diary_payload(when: date):
+    strings = [
+        BASE_URL,
+        POLICY_HASH,
+        "com.loseit.core.client.service.LoseItRemoteService",
+        DIARY_METHOD,
+        "com.loseit.core.client.service.ServiceRequestToken/1076571655",
+        "com.loseit.core.shared.model.DayDate/1611136587",
+        "com.loseit.core.client.model.UserId/4281239478",
+        USER_NAME,
+        "java.util.Date/3385151746",
+    ]
+    n = len(strings)
+    header = f"7|0|{n}|" + "|".join(strings) + "|"
+    data = (f"1|2|3|4|2|5|6|5|0|7|{USER_ID}|8|{HOURS_FROM_GMT}|"
+            f"6|9|{day_key_for(when)}|{day_number_for(when)}|{HOURS_FROM_GMT}|")
+    return header + data
+
+
+def _wire(token):
+    """A parsed GWT token as it is written in a request (doubles without '.0')."""
+    if isinstance(token, float) and token.is_integer():
+        return str(int(token))
+    return str(token)
+
+
+def read_entry_wire(seg, refs):
+    """Fields deleteFoodLogEntry sends back for an entry, as wire text → dict or None.
+
+    seg is one FoodLogEntry in forward order, starting at its type ref. It is
+    read with the layout of data/delete-payload.txt (requests and responses
+    serialize the class the same way): identifier, product type, stamp, food
+    PK, context and DayDate, entry type (+ extra), serving, nutrient HashMap
+    in server order, serving size, measure, version and stamp, entry PK.
+    None if seg doesn't follow that layout.
+    """
+    def expect(i, key):
+        if key not in refs or seg[i] != refs[key]:
+            raise ValueError(key)
+
+    def skip_pk(i):
+        expect(i, "pk")
+        expect(i + 1, "bytes")
+        if seg[i + 2] != 16 or len(seg) < i + 19:
+            raise ValueError("pk")
+        return i + 19
+
+    try:
+        expect(7, "product")        # entry, ident, -1, category, locale, name, brand
+        if seg[9] != -1:
+            raise ValueError("product")
+        i = 12 if refs.get("verification") and seg[10] == refs["verification"] else 11
+        out = {"stamp": _wire(seg[i])}
+        i = skip_pk(i + 1)
+        expect(i, "context")
+        out["context"] = _wire(seg[i + 1])
+        expect(i + 2, "daydate")
+        expect(i + 3, "date")
+        out["day_key"], out["day_number"], out["tz"] = (_wire(t) for t in seg[i + 4:i + 7])
+        out["flags"] = [_wire(t) for t in seg[i + 7:i + 13]]
+        i += 13
+        expect(i, "type")
+        out["meal"] = _wire(seg[i + 1])
+        i += 2
+        if seg[i] == 0:
+            out["type_extra"] = None
+            i += 1
+        else:
+            expect(i, "extra")
+            out["type_extra"] = _wire(seg[i + 1])
+            i += 2
+        expect(i, "serving")
+        expect(i + 1, "nutrients")
+        out["serving"] = [_wire(t) for t in seg[i + 2:i + 4]]
+        expect(i + 4, "hashmap")
+        count = seg[i + 5]
+        i += 6
+        out["nutrients"] = []
+        for _ in range(count):
+            expect(i, "fm")
+            expect(i + 2, "double")
+            out["nutrients"].append([_wire(seg[i + 1]), _wire(seg[i + 3])])
+            i += 4
+        expect(i, "size")
+        out["serving_size"] = [_wire(t) for t in seg[i + 1:i + 3]]
+        expect(i + 3, "measure")
+        out["measure"] = [_wire(t) for t in seg[i + 4:i + 9]]
+        out["version"], out["stamp_tail"] = _wire(seg[i + 9]), _wire(seg[i + 10])
+        skip_pk(i + 11)
+    except (ValueError, IndexError, TypeError):
+        return None
+    return out
+
+
+def parse_diary_response(tokens, string_table):
+    """Parse a diary response into a list of entries.
+
+    GWT responses are serialized in reverse, so tokens are read back to
+    front and split at each FoodLogEntry ref. Within an entry the
+    layout matches updateFoodLogEntry: FoodIdentifier(-1, category, locale,
+    name, brand), the food's SimplePrimaryKey, FoodLogEntryType(meal),
+    FoodServing(…, servings), the nutrient HashMap, and the entry's
+    SimplePrimaryKey last. Entries that follow the captured layout exactly
+    also get "wire" (read_entry_wire), which deleting them needs.
+    """
+    refs = {}
+    for i, s in enumerate(string_table):
+        for key, marker in (("entry", "model.FoodLogEntry/"), ("ident", "FoodIdentifier/"),
+                            ("type", "FoodLogEntryType/"), ("serving", "model.FoodServing/"),
+                            ("fm", "FoodMeasurement/"), ("double", "java.lang.Double/"),
+                            ("bytes", "[B/"), ("pk", "SimplePrimaryKey/"),
+                            ("product", "FoodProductType/"), ("verification", "Verification/"),
+                            ("context", "FoodLogEntryContext/"), ("daydate", "DayDate/"),
+                            ("date", "java.util.Date/"), ("extra", "FoodLogEntryTypeExtra/"),
+                            ("nutrients", "FoodNutrients/"), ("hashmap", "java.util.HashMap/"),
+                            ("size", "FoodServingSize/"), ("measure", "model.FoodMeasure/")):
+            if marker in s:
+                refs[key] = i + 1
+    if "entry" not in refs:
+        return []
+
+    fwd = list(reversed(tokens))
+    # An entry starts with FoodLogEntry, FoodIdentifier, -1 (refs are always ints)
+    starts = [i for i in range(len(fwd) - 2)
+              if type(fwd[i]) is int and fwd[i] == refs["entry"]
+              and fwd[i + 1] == refs.get("ident") and fwd[i + 2] == -1]
+    entries = []
+    for n, start in enumerate(starts):
+        seg = fwd[start:starts[n + 1] if n + 1 < len(starts) else len(fwd)]
+        e = {"name": "", "brand": "", "category": "", "meal": None, "servings": None,
+             "nutrients": {}, "food_pk_bytes": None, "entry_pk": None}
+        pks = []
+        if len(seg) > 6:
+            e["category"] = str_ref(string_table, seg[3]) or ""
+            e["name"] = str_ref(string_table, seg[5]) or ""
+            e["brand"] = str_ref(string_table, seg[6]) or ""
+        # Walk the rest in order, consuming each field so values aren't mistaken for refs
+        i = 7
+        while i < len(seg):
+            t = seg[i]
+            if t == refs.get("type") and e["meal"] is None and i + 1 < len(seg):
+                e["meal"] = MEAL_NAMES.get(seg[i + 1], str(seg[i + 1]))
+                i += 2
+            elif t == refs.get("serving") and e["servings"] is None and i + 3 < len(seg):
+                e["servings"] = float(seg[i + 3])
+                i += 4
+            elif (t == refs.get("fm") and i + 3 < len(seg) and seg[i + 2] == refs.get("double")
+                  and isinstance(seg[i + 1], int)):
+                e["nutrients"][seg[i + 1]] = float(seg[i + 3])
+                i += 4
+            elif (t == refs.get("pk") and i + 18 < len(seg) and seg[i + 1] == refs.get("bytes")
+                  and seg[i + 2] == 16):
+                # byte arrays are serialized reversed
+                pks.append([int(b) for b in reversed(seg[i + 3:i + 19])])
+                i += 19
+            else:
+                i += 1
+        if pks:
+            e["entry_pk"] = str(uuid.UUID(bytes=bytes(b % 256 for b in pks[-1])))
+        if len(pks) > 1:
+            e["food_pk_bytes"] = pks[0]
+        e["calories"] = e["nutrients"].get(0)
+        wire = read_entry_wire(seg, refs)
+        if wire:
+            e["wire"] = wire
+        entries.append(e)
+    return entries
+
+
+class DiaryUnsupported(Exception):
+    """The service rejected the diary call: DIARY_METHOD or its payload is wrong."""
+
+
+def fetch_diary(session, when: date, debug=False):
+    """Fetch one day's diary from the server → {date, day_number, entries, fetched_at} or None.
+
+    Raises DiaryUnsupported on //EX rather than reporting a failed day.
+    """
+    try:
+        resp = gwt_call(session, build_diary_payload(when), debug=debug, raise_ex=True)
+    except GwtServiceError as e:
+        raise DiaryUnsupported(f"{DIARY_METHOD} was rejected: {e}") from None
+    if not resp:
+        return None
+    tokens, st = parse_gwt_response(resp)
+    return {
+        "date": when.isoformat(),
+        "day_number": day_number_for(when),
+        "fetched_at": time.time(),
+        "entries": parse_diary_response(tokens, st),
+    }
+
+
+def diary_cache_path(when: date):
+    return os.path.join(DIARY_CACHE_DIR, f"{when.isoformat()}.json")
+
+
+def load_cached_diary(when: date):
+    try:
+        with open(diary_cache_path(when), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_diary(diary):
+    os.makedirs(DIARY_CACHE_DIR, exist_ok=True)
+    path = diary_cache_path(date.fromisoformat(diary["date"]))
+    tmp = f"{path}.tmp.{threading.get_ident()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(diary, f, indent=1)
+    os.replace(tmp, path)
+
+
+def diary_max_age(when: date, today: date | None = None):
+    """Seconds a cached copy of `when` stays fresh (see DIARY_FRESHNESS)."""
+    days_ago = ((today or date.today()) - when).days
+    for limit, seconds in DIARY_FRESHNESS:
+        if limit is None or days_ago <= limit:
+            return seconds
+    return DIARY_FRESHNESS[-1][1]
+
+
+def is_fresh(cached, when: date, max_age=None):
+    if not cached:
+        return False
+    limit = diary_max_age(when) if max_age is None else max_age
+    return time.time() - cached.get("fetched_at", 0) < limit
+
+
+def get_diary(session, when: date, refresh=False, max_age=None, debug=False):
+    """One day's diary, from the cache when fresh → (diary or None, from_cache)."""
+    cached = None if refresh else load_cached_diary(when)
+    if is_fresh(cached, when, max_age):
+        return cached, True
+    diary = fetch_diary(session, when, debug=debug)
+    if diary is not None:
+        save_cached_diary(diary)
+    return diary, False
+
+
+def fetch_diary_range(token, start: date, end: date, workers=DIARY_WORKERS, refresh=False,
+                      max_age=None, debug=False):
+    """Diaries for every day in [start, end], fetching stale days concurrently.
+
+    Fresh cached days are read without a request; the rest go through a
+    pool of `workers` threads, each with its own session. Returns
+    (diaries by ISO date, stats).
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    diaries, stale = {}, []
+    for d in days:
+        cached = None if refresh else load_cached_diary(d)
+        if is_fresh(cached, d, max_age):
+            diaries[d.isoformat()] = cached
+        else:
+            stale.append(d)
+
+    local = threading.local()
+
+    def fetch(d):
+        if not hasattr(local, "session"):
+            local.session = make_session(token)
+        diary = fetch_diary(local.session, d, debug=debug)
+        if diary is not None:
+            save_cached_diary(diary)
+        return d, diary
+
+    failed = []
+    t0 = time.monotonic()
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(stale)))) as pool:
+            for fut in as_completed([pool.submit(fetch, d) for d in stale]):
+                d, diary = fut.result()
+                if diary is None:
+                    failed.append(d.isoformat())
+                else:
+                    diaries[d.isoformat()] = diary
+    stats = {
+        "days": len(days),
+        "cached": len(days) - len(stale),
+        "fetched": len(stale) - len(failed),
+        "failed": sorted(failed),
+        "fetch_seconds": round(time.monotonic() - t0, 3),
+        "limiter": GWT_LIMITER.snapshot(),
+    }
+    return dict(sorted(diaries.items())), stats
+
+
+def display_diary(diary):
+    entries = diary.get("entries") or []
+    total = sum(e.get("calories") or 0 for e in entries)
+    print(f"\n📅 {diary['date']} — {len(entries)} entries, {total:.0f} cal")
+    for meal in ("Breakfast", "Lunch", "Dinner", "Snacks"):
+        items = [e for e in entries if e.get("meal") == meal]
+        if not items:
+            continue
+        print(f"  🍽️  {meal}")
+        for e in items:
+            brand = f" ({e['brand']})" if e.get("brand") else ""
+            cals = f"{e['calories']:.0f} cal" if e.get("calories") is not None else "? cal"
+            servings = e.get("servings")
+            qty = f" × {servings:g}" if servings not in (None, 1) else ""
+            print(f"     • {e['name']}{brand}{qty} — {cals}")
+
+
+# ─── deleteFoodLogEntry ──────────────────────────────────────────────────────
+
+DELETE_WORKERS = 4
+
+
+def build_delete_food_log_entry_payload(entry):
+    """Build deleteFoodLogEntry payload for a diary entry (see parse_diary_response).
+
+    Captured signature: (ServiceRequestToken, FoodLogEntry). The whole entry
+    is sent back as the diary returned it: null locale and no Verification
+    as in data/delete-payload.txt, every other field from entry["wire"]
+    (read_entry_wire). dev/check-delete-payload.py rebuilds the capture
+    byte for byte. Raises ValueError for an entry without those fields.
+    """
+    wire = entry.get("wire")
+    if not entry.get("entry_pk") or not entry.get("food_pk_bytes") or not wire:
+        raise ValueError("diary entry wasn't read in the captured layout; can't echo it back")
+    entry_pk = uuid_signed_bytes(uuid.UUID(entry["entry_pk"]))
+
+    strings = [
+        BASE_URL,
+        POLICY_HASH,
+        "com.loseit.core.client.service.LoseItRemoteService",
+        "deleteFoodLogEntry",
+        "com.loseit.core.client.service.ServiceRequestToken/1076571655",
+        "com.loseit.core.client.model.FoodLogEntry/264522954",
+        "com.loseit.core.client.model.UserId/4281239478",
+        USER_NAME,
+        "com.loseit.core.client.model.FoodIdentifier/2763145970",
+        entry.get("category") or "",
+        entry.get("name") or "",
+        entry.get("brand") or "",
+        "com.loseit.core.client.model.interfaces.FoodProductType/2860616120",
+        "com.loseit.core.client.model.SimplePrimaryKey/3621315060",
+        "[B/3308590456",
+        "com.loseit.core.client.model.FoodLogEntryContext/4082213671",
+        "com.loseit.core.shared.model.DayDate/1611136587",
+        "java.util.Date/3385151746",
+        "com.loseit.core.client.model.interfaces.FoodLogEntryType/1152459170",
+        "com.loseit.core.client.model.interfaces.FoodLogEntryTypeExtra/4048538730",
+        "com.loseit.core.client.model.FoodServing/1858865662",
+        "com.loseit.core.client.model.FoodNutrients/1097231324",
+        "java.util.HashMap/1797211028",
+        "com.loseit.healthdata.model.shared.food.FoodMeasurement/2371921172",
+        "java.lang.Double/858496421",
+        "com.loseit.core.client.model.FoodServingSize/63998910",
+        "com.loseit.core.client.model.FoodMeasure/1457474932",
+    ]
+    n = len(strings)
+    header = f"7|0|{n}|" + "|".join(strings) + "|"
+
+    parts = ["1", "2", "3", "4", "2", "5", "6"]
+    # token
+    parts += ["5", "0", "7", USER_ID, "8", str(HOURS_FROM_GMT)]
+    # FoodLogEntry: FoodIdentifier(-1, category, null locale, name, brand), product type, stamp, food PK
+    parts += ["6", "9", "-1", "10", "0", "11", "12", "13", "0", "-1", "0", wire["stamp"], "14", "15", "16"]
+    parts += [str(int(b)) for b in reversed(entry["food_pk_bytes"])]
+    # context + daydate + flags
+    parts += ["16", wire["context"], "17", "18", wire["day_key"], wire["day_number"], wire["tz"]]
+    parts += wire["flags"]
+    # entry type (+ extra)
+    parts += ["19", wire["meal"]]
+    parts += ["0"] if wire["type_extra"] is None else ["20", wire["type_extra"]]
+    # serving + nutrients, in the order the server sent them
+    parts += ["21", "22", *wire["serving"], "23", str(len(wire["nutrients"]))]
+    for ord_, val in wire["nutrients"]:
+        parts += ["24", ord_, "25", val]
+    # serving size, measure, version, stamp, entry PK
+    parts += ["26", *wire["serving_size"], "27", *wire["measure"], wire["version"], wire["stamp_tail"],
+              "14", "15", "16"]
+    parts += [str(int(b)) for b in reversed(entry_pk)]
+    return header + "|".join(parts) + "|"
+
+
+def delete_food_log_entry(session, entry, debug=False, quiet=False):
+    """Delete one diary entry → error string or None.
+
+    Retried like a read: deleting the same entry PK twice can't remove
+    anything else.
+    """
+    try:
+        payload = build_delete_food_log_entry_payload(entry)
+    except ValueError as e:
+        return str(e)
+    resp = gwt_call(session, payload, debug=debug, quiet=quiet, idempotent=True)
+    return None if resp else "deleteFoodLogEntry failed"
+
+
+def select_entries(diaries, meal=None, match=None, entry_pks=None, logged_pks=None):
+    """(date, entry) pairs from diaries (by ISO date) that pass every given filter."""
+    meal_name = MEAL_NAMES[MEAL_TYPES[meal]] if meal else None
+    needle = match.lower() if match else None
+    out = []
+    for day, diary in diaries.items():
+        for e in diary.get("entries") or []:
+            if not e.get("entry_pk"):
+                continue
+            if meal_name and e.get("meal") != meal_name:
+                continue
+            if needle and needle not in f"{e.get('name')} {e.get('brand')}".lower():
+                continue
+            if entry_pks and e["entry_pk"] not in entry_pks:
+                continue
+            if logged_pks is not None and e["entry_pk"] not in logged_pks:
+                continue
+            out.append((date.fromisoformat(day), e))
+    return out
+
+
+def delete_entries(token, targets, workers=DELETE_WORKERS, debug=False):
+    """Delete (date, entry) pairs concurrently → [(date, entry, error or None)] in input order.
+
+    Each thread has its own session; GWT_LIMITER paces them. Deleted
+    entries' days are dropped from the diary cache and their idempotency
+    keys marked deleted, so logging them again isn't skipped.
+    """
+    local = threading.local()
+
+    def send(target):
+        if not hasattr(local, "session"):
+            local.session = make_session(token)
+        return delete_food_log_entry(local.session, target[1], debug=debug, quiet=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+        errors = list(pool.map(send, targets))
+    results = [(when, entry, error) for (when, entry), error in zip(targets, errors)]
+    deleted = [(when, entry) for when, entry, error in results if not error]
+    for when in {when for when, _ in deleted}:
+        try:
+            os.remove(diary_cache_path(when))
+        except FileNotFoundError:
+            pass
+    KEYS.mark_deleted({entry["entry_pk"] for _, entry in deleted})
+    return results
+
+
 # ─── Main ────────────────────────────────────────────────────────────────────
 
 def main():
+    global GWT_DEADLINE, GWT_HEDGE_AFTER
     parser = argparse.ArgumentParser(
         description="Log food to Lose It! via GWT-RPC",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -901,49 +2265,482 @@ def main():
   %(prog)s "dill pickles" -m dinner --pick 1 --servings 3
 """,
     )
-    parser.add_argument("food", nargs="?", help="Food to search for")
-    parser.add_argument("--meal", "-m", choices=list(MEAL_TYPES.keys()), default="snacks",
-                        help="Meal type (default: snacks)")
+    parser.add_argument("food", nargs="*", help="Food to search for (several with --search)")
+    parser.add_argument("--meal", "-m", choices=list(MEAL_TYPES.keys()), default=None,
+                        help="Meal type (default: snacks, or the template's meal)")
     parser.add_argument("--replay", action="store_true",
                         help="Replay captured Chobani yogurt save (auth test)")
     parser.add_argument("--delete", action="store_true",
                         help="Replay captured deleteFoodLogEntry payload (dangerous)")
+    parser.add_argument("--delete-range", nargs=2, metavar=("START", "END"),
+                        help="Delete diary entries on days START..END matching --meal/--match/--entry/--logged "
+                             "(experimental, see --diary)")
+    parser.add_argument("--match", metavar="TEXT",
+                        help="--delete-range: only entries whose name or brand contains TEXT")
+    parser.add_argument("--entry", action="append", metavar="PK",
+                        help="--delete-range: only this entry PK (repeatable)")
+    parser.add_argument("--logged", action="store_true",
+                        help="--delete-range: only entries this tool logged (recorded in log-keys.jsonl)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="--delete-range: list what would be deleted")
     parser.add_argument("--yes", action="store_true",
-                        help="Skip confirmation for --delete")
+                        help="Skip confirmation for --delete / --delete-range")
     parser.add_argument("--search", "-s", action="store_true",
-                        help="Search only, don't log")
+                        help="Search only, don't log (several queries run concurrently)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Search the local food catalog only (no network call)")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Merge local food catalog matches into live search results")
+    parser.add_argument("--queries-file", metavar="FILE",
+                        help="--search every query in FILE, one per line ('-' for stdin)")
     parser.add_argument("--servings", type=float, default=1.0,
                         help="Number of servings (default: 1)")
     parser.add_argument("--date", dest="date", default=None,
-                        help="Target date YYYY-MM-DD (default: today)")
+                        help="Target date YYYY-MM-DD, range START..END or comma list (default: today)")
     parser.add_argument("--pick", type=int, default=None,
                         help="Auto-pick Nth search result (1-indexed)")
     parser.add_argument("--debug", "-d", action="store_true",
                         help="Show debug output")
     parser.add_argument("--raw", action="store_true",
                         help="Show raw GWT response (search)")
+    parser.add_argument("--diary", action="store_true",
+                        help="Show the diary for --date (cached per day; experimental: unconfirmed RPC)")
+    parser.add_argument("--range", nargs=2, metavar=("START", "END"),
+                        help="Fetch diaries for every day START..END (YYYY-MM-DD) concurrently (experimental)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Concurrent requests for --range, --flush (default: {DIARY_WORKERS}) "
+                             f"and multi-date logging (default: {LOG_WORKERS})")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached diaries / template entries / searches and refetch")
+    parser.add_argument("--json", action="store_true",
+                        help="Print diaries / search results as JSON (--diary/--range/--search)")
+    parser.add_argument("--idempotency-key", "--key", dest="key", default=None,
+                        help="Derive the entry PK from this key so resending can't duplicate it")
+    parser.add_argument("--queue", action="store_true",
+                        help="Add the entry to the offline journal instead of sending it")
+    parser.add_argument("--no-queue", action="store_true",
+                        help="Fail instead of journaling an entry that couldn't be sent")
+    parser.add_argument("--flush", action="store_true",
+                        help="Send queued journal entries (uses --workers)")
+    parser.add_argument("--batch", type=int, default=FLUSH_BATCH,
+                        help=f"Entries per --flush batch (default: {FLUSH_BATCH})")
+    parser.add_argument("--journal", action="store_true",
+                        help="List queued journal entries")
+    parser.add_argument("--meal-template", metavar="NAME",
+                        help="Log every food in a saved meal template to --date")
+    parser.add_argument("--add-to-template", metavar="NAME",
+                        help="Add the picked food (with --servings) to a meal template instead of logging")
+    parser.add_argument("--templates", action="store_true",
+                        help="List saved meal templates")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help=f"Seconds per GWT call including retries (default: {GWT_DEADLINE:g})")
+    parser.add_argument("--hedge", type=float, default=None, metavar="SECONDS",
+                        help="Race a second request for reads slower than this (default: off)")
 
     args = parser.parse_args()
 
-    if not args.replay and not args.delete and not args.food:
+    args.queries = list(args.food)
+    if args.queries_file:
+        try:
+            with (sys.stdin if args.queries_file == "-" else open(args.queries_file, encoding="utf-8")) as f:
+                args.queries += [q.strip() for q in f if q.strip() and not q.lstrip().startswith("#")]
+        except OSError as e:
+            print(f"❌ Can't read --queries-file: {e}")
+            sys.exit(1)
+    args.food = args.queries[0] if args.queries else None
+
+    if args.deadline is not None:
+        GWT_DEADLINE = args.deadline
+    if args.hedge is not None:
+        GWT_HEDGE_AFTER = args.hedge
+
+    if not (args.replay or args.delete or args.food or args.diary or args.range
+            or args.flush or args.journal or args.meal_template or args.templates
+            or args.delete_range):
         parser.print_help()
         sys.exit(1)
+    if not (args.meal_template or args.delete_range):
+        args.meal = args.meal or "snacks"
+    if args.offline and args.hybrid:
+        print("❌ --offline and --hybrid are exclusive")
+        sys.exit(1)
+    args.search_mode = "offline" if args.offline else "hybrid" if args.hybrid else "live"
 
-    token = load_token()
+    # An offline search needs no account
+    token = "" if args.offline and args.search and not (args.diary or args.range) else load_token()
     session = make_session(token)
 
+    # Prometheus textfile metrics (data/metrics/loseit_log.prom)
+    metrics = RunMetrics("log")
+    GWT_STATS.clear()
+    code = 1
+    try:
+        if args.diary or args.range:
+            run_diary(args, token, session, metrics)
+        if args.delete_range:
+            run_delete(args, token, metrics)
+        run(args, token, session, metrics)
+        code = 0
+    except DiaryUnsupported as e:
+        print(f"❌ {e}\n   {DIARY_HINT}")
+        sys.exit(1)
+    except SystemExit as e:
+        code = e.code or 0
+        raise
+    finally:
+        for method, st in GWT_STATS.items():
+            metrics.inc("gwt_calls_total", st["calls"], method=method)
+            metrics.inc("gwt_errors_total", st["errors"], method=method)
+            for key in ("retries", "timeouts", "hedges", "hedge_wins"):
+                metrics.inc(f"gwt_{key}_total", st[key], method=method)
+            metrics.gauge("gwt_seconds", round(st["seconds"], 6), method=method)
+        for outcome, n in SEARCH_CACHE.stats.items():
+            if n:
+                metrics.inc("search_cache_total", n, outcome=outcome)
+        SEARCH_CACHE.save()
+        if any(SEARCH_CACHE.stats.values()):
+            metrics.gauge("search_cache_hit_ratio", round(SEARCH_CACHE.hit_ratio(), 4))
+            if args.debug:
+                print(f"🗂️  Search cache: {SEARCH_CACHE.stats} this run, "
+                      f"{SEARCH_CACHE.hit_ratio():.0%} hit ratio overall")
+        if CATALOG.touched:
+            metrics.gauge("catalog_foods", CATALOG.count())
+        if GWT_STATS:
+            if args.debug:
+                print(limiter_summary())
+            lim = GWT_LIMITER.snapshot()
+            metrics.gauge("gwt_concurrency_limit", lim["limit"])
+            metrics.gauge("gwt_concurrency_limit_min", lim["min_limit"])
+            metrics.gauge("gwt_limiter_wait_seconds", lim["waited"])
+            metrics.gauge("gwt_breaker_state", BREAKER_STATES[lim["state"]])
+            metrics.inc("gwt_breaker_trips_total", lim["trips"])
+            metrics.inc("gwt_rejected_total", lim["rejected"])
+        metrics.finish(success=code == 0)
+
+
+def run_diary(args, token, session, metrics):
+    if args.range:
+        start, end = parse_date_arg(args.range[0]), parse_date_arg(args.range[1])
+        if end < start:
+            print("❌ --range END is before START")
+            sys.exit(1)
+        with metrics.phase("diary_range"):
+            diaries, stats = fetch_diary_range(token, start, end, workers=args.workers or DIARY_WORKERS,
+                                               refresh=args.refresh, debug=args.debug)
+        metrics.gauge("diary_days", stats["cached"], source="cache")
+        metrics.gauge("diary_days", stats["fetched"], source="server")
+        if args.json:
+            print(json.dumps({"diaries": diaries, "stats": stats}, indent=2))
+        else:
+            for diary in diaries.values():
+                entries = diary.get("entries") or []
+                total = sum(e.get("calories") or 0 for e in entries)
+                print(f"  {diary['date']}  {len(entries):3} entries  {total:6.0f} cal")
+            print(f"\n📚 {stats['days']} days: {stats['cached']} cached, {stats['fetched']} fetched "
+                  f"in {stats['fetch_seconds']:.2f}s ({args.workers or DIARY_WORKERS} workers)")
+            print(limiter_summary())
+        if stats["failed"]:
+            print(f"❌ Failed: {', '.join(stats['failed'])}")
+            sys.exit(1)
+        sys.exit(0)
+
+    try:
+        when, = parse_dates_arg(args.date)
+    except ValueError:
+        print("❌ --diary takes a single YYYY-MM-DD --date (use --range START END for several)")
+        sys.exit(1)
+    with metrics.phase("diary"):
+        diary, from_cache = get_diary(session, when, refresh=args.refresh, debug=args.debug)
+    if diary is None:
+        print(f"❌ Could not fetch diary for {when.isoformat()}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(diary, indent=2))
+    else:
+        display_diary(diary)
+        if from_cache:
+            print(f"\n  (cached {time.time() - diary['fetched_at']:.0f}s ago; --refresh to refetch)")
+    sys.exit(0)
+
+
+def run_searches(args, token, metrics):
+    workers = args.workers or SEARCH_WORKERS
+    session = make_session(token, pool=workers)
+    t0 = time.monotonic()
+    with metrics.phase("search"):
+        results = search_many(session, args.queries, workers=workers, debug=args.debug,
+                              use_cache=not args.refresh, mode=args.search_mode)
+    wall = time.monotonic() - t0
+    failed = [q for q, foods, _ in results if foods is None]
+    if args.json:
+        print(json.dumps([{"query": q, "foods": foods, "seconds": round(sec, 3)}
+                          for q, foods, sec in results], indent=2))
+    else:
+        for q, foods, sec in results:
+            status = "❌ search failed" if foods is None else f"{len(foods)} results"
+            print(f"\n🔍 {q} — {status} ({sec:.2f}s)")
+            if foods is not None:
+                display_results(foods)
+        print(f"\n📚 {len(results)} searches in {wall:.2f}s (slowest {max(r[2] for r in results):.2f}s, "
+              f"sum {sum(r[2] for r in results):.2f}s, {min(workers, len(results))} workers)")
+    sys.exit(1 if failed else 0)
+
+
+def run_delete(args, token, metrics):
+    start, end = parse_date_arg(args.delete_range[0]), parse_date_arg(args.delete_range[1])
+    if end < start:
+        print("❌ --delete-range END is before START")
+        sys.exit(1)
+    # Always read the server's current diary: never delete from a stale cache
+    with metrics.phase("diary_range"):
+        diaries, stats = fetch_diary_range(token, start, end, workers=args.workers or DIARY_WORKERS,
+                                           refresh=True, debug=args.debug)
+    if stats["failed"]:
+        print(f"❌ Could not read the diary for: {', '.join(stats['failed'])}")
+        sys.exit(1)
+    targets = select_entries(diaries, meal=args.meal, match=args.match,
+                             entry_pks=set(args.entry) if args.entry else None,
+                             logged_pks=KEYS.confirmed_pks() if args.logged else None)
+    if not targets:
+        print(f"📭 No matching entries {start.isoformat()} … {end.isoformat()}")
+        sys.exit(0)
+
+    print(f"🗑️  {len(targets)} entries {start.isoformat()} … {end.isoformat()}:")
+    for when, e in targets:
+        cals = f" — {e['calories']:.0f} cal" if e.get("calories") is not None else ""
+        print(f"  {when.isoformat()}  {e.get('meal') or '?':9} {e.get('name')}{cals}  [{e['entry_pk'][:8]}]")
+    if args.dry_run:
+        print("\n(dry run — nothing deleted)")
+        sys.exit(0)
+    if not args.yes:
+        try:
+            ans = input(f"\nThis will DELETE {len(targets)} food log entries. Type 'delete' to continue: ")
+        except (EOFError, KeyboardInterrupt):
+            print("\nCancelled.")
+            sys.exit(1)
+        if ans.strip().lower() != "delete":
+            print("Cancelled.")
+            sys.exit(1)
+
+    t0 = time.monotonic()
+    with metrics.phase("delete"):
+        results = delete_entries(token, targets, workers=args.workers or DELETE_WORKERS, debug=args.debug)
+    failed = 0
+    for when, e, error in results:
+        if error:
+            failed += 1
+            print(f"  ❌ {when.isoformat()} {e.get('name')} [{e['entry_pk'][:8]}]: {error}")
+        else:
+            print(f"  ✅ {when.isoformat()} {e.get('name')} [{e['entry_pk'][:8]}]")
+    metrics.inc("deleted_total", len(results) - failed)
+    metrics.inc("errors_total", failed, phase="delete")
+    print(f"\n🗑️  Deleted {len(results) - failed}/{len(results)} in {time.monotonic() - t0:.2f}s")
+    print(limiter_summary())
+    sys.exit(1 if failed else 0)
+
+
+def run_template(args, token, session, journal, dates, metrics):
+    templates = load_templates()
+    if args.meal_template not in templates:
+        print(f"❌ No meal template {args.meal_template!r} (see --templates)")
+        sys.exit(1)
+    template = templates[args.meal_template]
+    meal = args.meal or template["meal"]
+    if not args.key and all(item["food"].get("pk_bytes") for item in template["items"]):
+        args.key = auto_key()
+
+    def key_for(when, n=None):
+        """Template key: K:n for one date, K:<date>:n across several."""
+        if not args.key:
+            return None
+        key = args.key if len(dates) == 1 else f"{args.key}:{when.isoformat()}"
+        return key if n is None else f"{key}:{n}"
+
+    if args.queue:
+        for when in dates:
+            for n, item in enumerate(template["items"]):
+                queue_entry(journal, journal_entry(item["food"], meal, when, item["servings"],
+                                                   key=key_for(when, n)), "--queue")
+                metrics.inc("queued_total")
+        sys.exit(0)
+
+    failed = []
+    for when in dates:
+        print(f"🍳 {args.meal_template} → {MEAL_NAMES[MEAL_TYPES[meal]]} {when.isoformat()} "
+              f"({len(template['items'])} items)")
+        with metrics.phase("template"):
+            # Only the first date can need fetching; later ones hit the cache
+            result = log_template(token, session, args.meal_template, when, meal=meal,
+                                  refresh=args.refresh and when == dates[0], key=key_for(when),
+                                  debug=args.debug)
+        stats = result["stats"]
+        metrics.gauge("template_items", stats["cached"], source="cache")
+        metrics.gauge("template_items", stats["fetched"], source="server")
+        print(f"   ⚡ Prepared in {stats['seconds']:.2f}s ({stats['cached']} cached, "
+              f"{stats['fetched']} fetched)")
+        total = 0.0
+        for _, item, saved in result["logged"]:
+            cals = (saved.get("nutrients") or {}).get(0)
+            total += (cals or 0) * item["servings"]
+            servings = f" × {item['servings']:g}" if item["servings"] != 1 else ""
+            dup = " (already logged)" if saved.get("duplicate") else ""
+            cal_str = f" — {cals * item['servings']:.0f} cal" if cals is not None else ""
+            print(f"  ✅ {item['food'].get('name')}{servings}{cal_str}{dup}")
+        for _, item, error in result["failed"]:
+            print(f"  ❌ {item['food'].get('name')}: {error}")
+        metrics.inc("entries_total", len(result["logged"]))
+        print(f"\n📗 Logged {len(result['logged'])}/{len(template['items'])} ({total:.0f} cal) "
+              f"in {stats['seconds'] + stats['log_seconds']:.2f}s\n")
+        failed += [(when, n, item) for n, item, _ in result["failed"]]
+    if not failed:
+        sys.exit(0)
+    metrics.inc("errors_total", len(failed), phase="template")
+    if args.no_queue:
+        sys.exit(1)
+    queued = 0
+    for when, n, item in failed:
+        if key_for(when) and key_conflict(key_for(when, n), item["food"], when, meal):
+            continue    # resending can't fix a reused key
+        queue_entry(journal, journal_entry(item["food"], meal, when, item["servings"],
+                                           key=key_for(when, n)), "send failed")
+        metrics.inc("queued_total")
+        queued += 1
+    sys.exit(EXIT_QUEUED if queued else 1)
+
+
+def run_dates(args, token, session, journal, food, dates, unsaved, metrics):
+    """Log the selected food on every date in `dates` (multi-date --date)."""
+    keys = {d: f"{args.key}:{d.isoformat()}" if args.key else None for d in dates}
+    for d in dates:
+        if keys[d] and key_conflict(keys[d], food, d, args.meal):
+            print(f"❌ {key_conflict(keys[d], food, d, args.meal)}")
+            sys.exit(1)
+    if args.queue:
+        for d in dates:
+            queue_entry(journal, journal_entry(food, args.meal, d, args.servings, key=keys[d]), "--queue")
+            metrics.inc("queued_total")
+        sys.exit(0)
+
+    workers = args.workers or LOG_WORKERS
+    print(f"\n📅 Logging to {MEAL_NAMES[MEAL_TYPES[args.meal]]} on {len(dates)} days "
+          f"({min(workers, len(dates))} workers)")
+    t0 = time.monotonic()
+    with metrics.phase("log"):
+        results = log_food_dates(token, session, food, args.meal, dates, args.servings, unsaved=unsaved,
+                                 workers=workers, key=args.key, debug=args.debug)
+    failed = []
+    for d in dates:
+        saved, error = results[d]
+        if error:
+            failed.append(d)
+            print(f"  ❌ {d.isoformat()}: {error}")
+        else:
+            dup = " (already logged)" if saved.get("duplicate") else ""
+            print(f"  ✅ {d.isoformat()}{dup}")
+    metrics.inc("entries_total", len(dates) - len(failed))
+    print(f"\n📗 Logged {len(dates) - len(failed)}/{len(dates)} days in {time.monotonic() - t0:.2f}s")
+    if not failed:
+        sys.exit(0)
+    metrics.inc("errors_total", len(failed), phase="log")
+    if args.no_queue:
+        sys.exit(1)
+    for d in failed:
+        queue_entry(journal, journal_entry(food, args.meal, d, args.servings, key=keys[d]), "send failed")
+        metrics.inc("queued_total")
+    sys.exit(EXIT_QUEUED)
+
+
+def prompt_pick(foods, meal):
+    """Ask which result to log → index; exits on quit or a bad choice."""
+    meal_name = MEAL_NAMES[MEAL_TYPES[meal]]
+    print(f"\n🍽️  Target meal: {meal_name}")
+    try:
+        choice = input("\nSelect food # (or 'q' to quit): ").strip()
+        if choice.lower() in ('q', 'quit', ''):
+            sys.exit(0)
+        idx = int(choice) - 1
+        if idx < 0 or idx >= len(foods):
+            print(f"Pick 1-{min(len(foods), 15)}")
+            sys.exit(1)
+    except (ValueError, EOFError, KeyboardInterrupt):
+        print("\nCancelled.")
+        sys.exit(0)
+    return idx
+
+
+def run(args, token, session, metrics):
     # ── Replay save mode ──
     if args.replay:
-        success = do_replay(session, debug=args.debug)
+        with metrics.phase("replay"):
+            success = do_replay(session, debug=args.debug)
+        if success:
+            metrics.inc("entries_total")
+        else:
+            metrics.inc("errors_total", phase="replay")
         sys.exit(0 if success else 1)
 
     # ── Replay delete mode ──
     if args.delete:
-        success = do_delete_replay(session, debug=args.debug, yes=args.yes)
+        with metrics.phase("delete"):
+            success = do_delete_replay(session, debug=args.debug, yes=args.yes)
+        if not success:
+            metrics.inc("errors_total", phase="delete")
         sys.exit(0 if success else 1)
 
+    # ── Offline journal ──
+    journal = Journal()
+    if args.journal:
+        show_journal(journal)
+        sys.exit(0)
+    if args.flush:
+        with metrics.phase("flush"):
+            try:
+                result = flush_journal(token, journal, workers=args.workers or FLUSH_WORKERS, batch=args.batch,
+                                       debug=args.debug)
+            except JournalBusy as e:
+                print(f"⏳ {e}")
+                sys.exit(1)
+        metrics.inc("entries_total", result["done"])
+        metrics.inc("errors_total", result["failed"], phase="flush")
+        metrics.gauge("journal_pending", result["remaining"])
+        print(f"\n📬 Flushed {result['done']}, failed {result['failed']}, "
+              f"{result['remaining']} still queued")
+        sys.exit(1 if result["failed"] or result["remaining"] else 0)
+
+    try:
+        dates = parse_dates_arg(args.date)
+    except ValueError as e:
+        print(f"❌ Bad --date: {e}")
+        sys.exit(1)
+    when = dates[0]
+
+    # ── Meal templates ──
+    if args.templates:
+        show_templates(load_templates())
+        sys.exit(0)
+    if args.meal_template:
+        run_template(args, token, session, journal, dates, metrics)
+
     # ── Search ──
-    foods = search_foods(session, args.food, debug=args.debug)
+    if len(args.queries) > 1:
+        if not args.search:
+            print("❌ Several foods given: add --search to search them all, or quote a multi-word food")
+            sys.exit(1)
+        run_searches(args, token, metrics)
+    if args.search and args.json:
+        run_searches(args, token, metrics)
+    with metrics.phase("search"):
+        foods = find_foods(session, args.food, args.search_mode, debug=args.debug, use_cache=not args.refresh)
+
+    if foods is None and args.pick is not None and not args.search and not args.no_queue:
+        # Can't resolve the food now; journal the query and resolve it at flush
+        for d in dates:
+            key = args.key and (args.key if len(dates) == 1 else f"{args.key}:{d.isoformat()}")
+            queue_entry(journal, journal_entry(None, args.meal, d, args.servings,
+                                               query=args.food, pick=args.pick, key=key),
+                        "search failed")
+            metrics.inc("queued_total")
+        sys.exit(EXIT_QUEUED)
 
     if args.raw:
         payload = build_search_payload(args.food)
@@ -960,28 +2757,24 @@ def main():
         print("❌ No results to log.")
         sys.exit(1)
 
-    when = parse_date_arg(args.date)
-
     # ── Selection ──
+    prefetch = None
+    unsaved = day_key = None
     if args.pick is not None:
         idx = args.pick - 1
         if idx < 0 or idx >= len(foods):
             print(f"❌ --pick must be 1..{len(foods)}")
             sys.exit(1)
+    elif args.queue:
+        idx = prompt_pick(foods, args.meal)
     else:
-        meal_name = MEAL_NAMES[MEAL_TYPES[args.meal]]
-        print(f"\n🍽️  Target meal: {meal_name}")
+        # Warm up the save while the prompt waits
+        prefetch = Prefetcher(token, foods, when)
         try:
-            choice = input("\nSelect food # (or 'q' to quit): ").strip()
-            if choice.lower() in ('q', 'quit', ''):
-                sys.exit(0)
-            idx = int(choice) - 1
-            if idx < 0 or idx >= len(foods):
-                print(f"Pick 1-{min(len(foods), 15)}")
-                sys.exit(1)
-        except (ValueError, EOFError, KeyboardInterrupt):
-            print("\nCancelled.")
-            sys.exit(0)
+            idx = prompt_pick(foods, args.meal)
+        except BaseException:
+            prefetch.close()
+            raise
 
     selected = foods[idx]
     brand_str = f" ({selected['brand']})" if selected.get('brand') else ""
@@ -989,8 +2782,46 @@ def main():
     if selected.get('pk_bytes'):
         print(f"  PK bytes: {selected['pk_bytes']}")
 
-    ok = log_food(session, selected, args.meal, when, args.servings, debug=args.debug)
-    sys.exit(0 if ok else 1)
+    if prefetch:
+        with metrics.phase("prefetch_wait"):
+            unsaved, day_key = prefetch.get(idx)
+        prefetch.close()
+        metrics.inc("prefetch_total", outcome="hit" if unsaved else "miss")
+
+    if args.add_to_template:
+        if not unsaved:
+            unsaved = get_unsaved_food_log_entry(session, selected, debug=args.debug)
+        template = add_to_template(args.add_to_template, selected, args.meal, args.servings, unsaved)
+        print(f"🍳 Added to template {args.add_to_template!r} "
+              f"({len(template['items'])} items, logs to {template['meal']})")
+        sys.exit(0)
+
+    if not args.key and selected.get("pk_bytes"):
+        args.key = auto_key()
+    if len(dates) > 1:
+        run_dates(args, token, session, journal, selected, dates, unsaved, metrics)
+
+    if args.key and key_conflict(args.key, selected, when, args.meal):
+        print(f"❌ {key_conflict(args.key, selected, when, args.meal)}")
+        sys.exit(1)
+    entry = journal_entry(selected, args.meal, when, args.servings, key=args.key)
+    if args.queue:
+        queue_entry(journal, entry, "--queue")
+        metrics.inc("queued_total")
+        sys.exit(0)
+
+    with metrics.phase("log"):
+        ok = log_food(session, selected, args.meal, when, args.servings, debug=args.debug,
+                      unsaved=unsaved, day_key=day_key, key=args.key)
+    if ok:
+        metrics.inc("entries_total")
+        sys.exit(0)
+    metrics.inc("errors_total", phase="log")
+    if args.no_queue:
+        sys.exit(1)
+    queue_entry(journal, entry, "send failed")
+    metrics.inc("queued_total")
+    sys.exit(EXIT_QUEUED)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Lose It! export analytics CLI
+
+Usage:
+    python loseit.py cohort --dates gym=~/clawd/integrations/lafitness/data/checkins.json
+    python loseit.py cohort --dates gym=checkins.json --weekends --json
+    python loseit.py cohort --dates gym=checkins.json --bootstrap 20000
+    python loseit.py --export-dir data/loseit-export.zip snapshot save
+    python loseit.py snapshot list
+    python loseit.py snapshot restore 2026-01-31 /tmp/export-jan.zip
+    python loseit.py diff @2026-01-31 data/loseit-export.zip
+    python loseit.py diff @latest data/export --json > changes.json
+
+Works on the CSV export downloaded by loseit-sync.sh (data/export/, or the
+zip itself with --export-dir data/loseit-export.zip).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import loseit_cohorts
+import loseit_diff
+from loseit_export import EXPORT_DIR, load_food_log, parse_date
+from loseit_snapshots import SNAPSHOT_DIR, SnapshotStore
+
+
+def _date_ordinal(s):
+    d = parse_date(s)
+    if not d:
+        raise argparse.ArgumentTypeError(f"bad date: {s}")
+    return d.toordinal()
+
+
+def _labelled_dates(spec):
+    label, sep, path = spec.partition("=")
+    if not sep or not label or not path:
+        raise argparse.ArgumentTypeError(f"expected LABEL=FILE, got: {spec}")
+    return label, path
+
+
+# ─── cohort ──────────────────────────────────────────────────────────────────
+
+def cmd_cohort(args):
+    food_log = load_food_log(args.export_dir)
+    if not len(food_log):
+        print(f"❌ No food logs in {args.export_dir}")
+        return 1
+    agg = loseit_cohorts.daily_aggregates(food_log, complete_meals=args.complete_meals)
+
+    cohorts = {}
+    for label, path in args.dates:
+        try:
+            cohorts[label] = loseit_cohorts.load_date_set(path)
+        except OSError as e:
+            print(f"❌ Cannot read {path}: {e}")
+            return 1
+    if args.weekends:
+        labelled = [o for ords in cohorts.values() for o in ords]
+        start = args.start or (min(labelled) if labelled else int(agg["days"][0]))
+        end = args.end or (max(labelled) if labelled else int(agg["days"][-1]))
+        cohorts["weekend"] = loseit_cohorts.weekend_days(start, end)
+    if not cohorts:
+        print("❌ Give at least one --dates LABEL=FILE or --weekends")
+        return 1
+
+    result = loseit_cohorts.compare(agg, cohorts, start=args.start, end=args.end, default=args.default)
+    if args.bootstrap:
+        result["differences"] = [
+            loseit_cohorts.differences(agg, cohorts, label, args.default, start=args.start, end=args.end,
+                                       default=args.default, n_resamples=args.bootstrap,
+                                       confidence=args.confidence, seed=args.seed)
+            for label in cohorts
+        ]
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        loseit_cohorts.print_comparison(result)
+        for diffs in result.get("differences", []):
+            loseit_cohorts.print_differences(diffs)
+    return 0
+
+
+# ─── snapshot ────────────────────────────────────────────────────────────────
+
+def _mb(n):
+    return f"{n / 1e6:.2f} MB"
+
+
+def cmd_snapshot(args):
+    store = SnapshotStore(args.store)
+    if args.action == "save":
+        if not Path(args.export_dir).exists():
+            print(f"❌ No export at {args.export_dir}")
+            return 1
+        snap = store.save(args.export_dir, label=args.label)
+        st = snap["stats"]
+        if snap["new"]:
+            print(f"📸 Snapshot {snap['id']}: {st['files']} files, {_mb(st['bytes'])} "
+                  f"→ {st['new_chunks']} new chunks, {_mb(st['stored_bytes'])} stored ({st['seconds']:.2f}s)")
+        else:
+            print(f"✓ Unchanged since snapshot {snap['id']}, nothing stored")
+        return 0
+
+    if args.action == "list":
+        ids = store.ids()
+        if not ids:
+            print(f"No snapshots in {store.root}")
+            return 0
+        for sid in ids:
+            snap = store.load(sid)
+            label = f"  [{snap['label']}]" if snap.get("label") else ""
+            print(f"{sid}  {len(snap['files']):3} files  {_mb(snap['bytes']):>10} "
+                  f"(+{_mb(snap['stored_bytes'])} stored){label}")
+        print(f"\nStore size: {_mb(store.disk_usage())} for {len(ids)} snapshots")
+        return 0
+
+    try:
+        sid = store.resolve(args.snapshot)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+    try:
+        snap = store.restore(sid, args.dest)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Restored snapshot {sid} ({len(snap['files'])} files) to {args.dest}")
+    return 0
+
+
+# ─── diff ────────────────────────────────────────────────────────────────────
+
+def cmd_diff(args):
+    try:
+        old = loseit_diff.resolve_source(args.old, SnapshotStore(args.store))
+        new = loseit_diff.resolve_source(args.new, SnapshotStore(args.store))
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+    for src in (old, new):
+        if isinstance(src, Path) and not src.exists():
+            print(f"❌ No export at {src}")
+            return 1
+    result = loseit_diff.diff_exports(old, new, files=args.file or loseit_diff.DIFF_FILES)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        loseit_diff.print_diff(result, limit=args.limit)
+    return 0
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a Lose It! CSV export")
+    parser.add_argument("--export-dir", type=Path, default=EXPORT_DIR,
+                        help=f"Export directory or loseit-export.zip (default: {EXPORT_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("cohort", help="Compare tracking/calories across labelled date sets")
+    p.add_argument("--dates", type=_labelled_dates, action="append", default=[], metavar="LABEL=FILE",
+                   help="Labelled date set (JSON list/object or one date per line); repeatable")
+    p.add_argument("--weekends", action="store_true", help="Add a 'weekend' cohort")
+    p.add_argument("--default", default="rest", help="Label for unlabelled days (default: rest)")
+    p.add_argument("--start", type=_date_ordinal, help="Range start (default: first labelled date)")
+    p.add_argument("--end", type=_date_ordinal, help="Range end (default: last labelled date)")
+    p.add_argument("--complete-meals", type=int, default=3,
+                   help="Distinct meals for a 'complete' tracking day (default: 3)")
+    p.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                   help="Bootstrap CIs / permutation p-values vs. the default cohort with N resamples")
+    p.add_argument("--confidence", type=float, default=0.95, help="CI confidence level (default: 0.95)")
+    p.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible resampling")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of tables")
+    p.set_defaults(func=cmd_cohort)
+
+    p = sub.add_parser("snapshot", help="Save, list or restore deduplicated export snapshots")
+    p.add_argument("--store", type=Path, default=SNAPSHOT_DIR, help=f"Snapshot store (default: {SNAPSHOT_DIR})")
+    actions = p.add_subparsers(dest="action", required=True)
+    a = actions.add_parser("save", help="Snapshot --export-dir (directory or zip)")
+    a.add_argument("--label", help="Free-form note stored with the snapshot")
+    actions.add_parser("list", help="List snapshots")
+    a = actions.add_parser("restore", help="Rebuild a snapshot into a directory or .zip")
+    a.add_argument("snapshot", help="Snapshot id, id prefix, YYYY-MM-DD, 'latest' or -N (Nth newest, -1 = latest)")
+    a.add_argument("dest", type=Path)
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("diff", help="Rows added/edited/deleted between two exports")
+    p.add_argument("old", help="Export dir, zip, or @SNAPSHOT (id, YYYY-MM-DD, latest, -N)")
+    p.add_argument("new", help="Export dir, zip, or @SNAPSHOT")
+    p.add_argument("--file", action="append", metavar="NAME",
+                   help=f"CSV to diff; repeatable (default: {', '.join(loseit_diff.DIFF_FILES)})")
+    p.add_argument("--store", type=Path, default=SNAPSHOT_DIR, help="Snapshot store for @SNAPSHOT")
+    p.add_argument("--limit", type=int, default=10, help="Rows shown per change type (default: 10)")
+    p.add_argument("--json", action="store_true", help="Print the full diff as JSON")
+    p.set_defaults(func=cmd_diff)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
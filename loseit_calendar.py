@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Integer-ordinal calendar: day sets, coverage masks, streaks and gaps.
+
+Days are date.toordinal() integers. A DaySet is a contiguous range
+[start, end] plus a boolean mask over it, so membership, coverage,
+streaks, gaps and set operations are array operations — a year-scale
+range is a few hundred bytes (packed) and takes microseconds.
+"""
+
+from datetime import date
+
+import numpy as np
+
+
+def to_ordinal(d):
+    """date | datetime | int → day ordinal."""
+    if isinstance(d, (int, np.integer)):
+        return int(d)
+    return d.toordinal()
+
+
+def day_range(start, end):
+    """All day ordinals in [start, end] as an int64 array."""
+    return np.arange(to_ordinal(start), to_ordinal(end) + 1, dtype=np.int64)
+
+
+def weekdays(days):
+    """Weekday (Mon=0 … Sun=6) for an array of ordinals."""
+    # date.fromordinal(1) is a Monday
+    return (np.asarray(days, dtype=np.int64) - 1) % 7
+
+
+def _runs(mask):
+    """Start/end indices (end exclusive) of each run of True in mask."""
+    edges = np.diff(np.r_[0, mask.view(np.int8), 0])
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class DaySet:
+    """Set of days over a fixed range [start, end], stored as a bool mask."""
+
+    def __init__(self, start, end, mask=None):
+        self.start = to_ordinal(start)
+        self.end = to_ordinal(end)
+        n = max(self.end - self.start + 1, 0)
+        self.mask = np.zeros(n, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        if len(self.mask) != n:
+            raise ValueError(f"mask length {len(self.mask)} != range length {n}")
+
+    @classmethod
+    def from_days(cls, days, start=None, end=None):
+        """DaySet of `days` (ordinals/dates); range defaults to their span."""
+        if isinstance(days, np.ndarray) and days.dtype.kind in "iu":
+            ords = np.unique(days.astype(np.int64))
+        else:
+            ords = np.unique(np.fromiter((to_ordinal(d) for d in days), dtype=np.int64))
+        if start is None:
+            start = int(ords[0]) if len(ords) else date.today().toordinal()
+        if end is None:
+            end = int(ords[-1]) if len(ords) else to_ordinal(start)
+        ds = cls(start, end)
+        ds.add(ords)
+        return ds
+
+    @classmethod
+    def from_bits(cls, start, end, packed):
+        n = to_ordinal(end) - to_ordinal(start) + 1
+        return cls(start, end, np.unpackbits(np.asarray(packed, dtype=np.uint8), count=n).astype(bool))
+
+    def to_bits(self):
+        """Packed bitset (1 bit per day)."""
+        return np.packbits(self.mask)
+
+    # ── Membership ──
+
+    def add(self, days):
+        ords = np.atleast_1d(np.asarray(days, dtype=np.int64)) - self.start
+        ords = ords[(ords >= 0) & (ords < len(self.mask))]
+        self.mask[ords] = True
+        return self
+
+    def contains(self, days):
+        """Vectorized membership for an array of ordinals."""
+        ords = np.asarray(days, dtype=np.int64) - self.start
+        inside = (ords >= 0) & (ords < len(self.mask))
+        out = np.zeros(ords.shape, dtype=bool)
+        out[inside] = self.mask[ords[inside]]
+        return out
+
+    def __contains__(self, d):
+        return bool(self.contains([to_ordinal(d)])[0])
+
+    def __len__(self):
+        return int(self.mask.sum())
+
+    def days(self):
+        """Member day ordinals (sorted int64 array)."""
+        return np.flatnonzero(self.mask) + self.start
+
+    def dates(self):
+        return [date.fromordinal(int(o)) for o in self.days()]
+
+    def range_days(self):
+        return day_range(self.start, self.end)
+
+    # ── Set operations (result spans the union of both ranges) ──
+
+    def _coerce(self, other):
+        if isinstance(other, DaySet):
+            return other
+        return DaySet.from_days(other)
+
+    def _aligned(self, other):
+        other = self._coerce(other)
+        start, end = min(self.start, other.start), max(self.end, other.end)
+        return start, end, self._widen(start, end), other._widen(start, end)
+
+    def _widen(self, start, end):
+        out = np.zeros(end - start + 1, dtype=bool)
+        out[self.start - start:self.end - start + 1] = self.mask
+        return out
+
+    def __or__(self, other):
+        start, end, a, b = self._aligned(other)
+        return DaySet(start, end, a | b)
+
+    def __and__(self, other):
+        start, end, a, b = self._aligned(other)
+        return DaySet(start, end, a & b)
+
+    def __sub__(self, other):
+        start, end, a, b = self._aligned(other)
+        return DaySet(start, end, a & ~b)
+
+    def __invert__(self):
+        return DaySet(self.start, self.end, ~self.mask)
+
+    union, intersection, difference = __or__, __and__, __sub__
+
+    def clip(self, start, end):
+        """Same days restricted/extended to [start, end]."""
+        start, end = to_ordinal(start), to_ordinal(end)
+        out = DaySet(start, end)
+        lo, hi = max(start, self.start), min(end, self.end)
+        if lo <= hi:
+            out.mask[lo - start:hi - start + 1] = self.mask[lo - self.start:hi - self.start + 1]
+        return out
+
+    # ── Coverage, streaks, gaps ──
+
+    def coverage(self):
+        """Fraction of days in the range that are members."""
+        return float(self.mask.mean()) if len(self.mask) else 0.0
+
+    def runs(self):
+        """(start ordinal, length) of every run of consecutive member days."""
+        starts, ends = _runs(self.mask)
+        return np.c_[starts + self.start, ends - starts]
+
+    def longest_streak(self):
+        """→ (length, first day ordinal) of the longest run, or (0, None)."""
+        starts, ends = _runs(self.mask)
+        if not len(starts):
+            return 0, None
+        i = int(np.argmax(ends - starts))
+        return int(ends[i] - starts[i]), int(starts[i] + self.start)
+
+    def current_streak(self, today=None, grace=1):
+        """Length of the run ending at `today` (default: range end).
+
+        A run ending up to `grace` days earlier still counts, so the streak
+        isn't broken just because today hasn't been logged yet.
+        """
+        today = self.end if today is None else to_ordinal(today)
+        starts, ends = _runs(self.mask)
+        if not len(starts):
+            return 0
+        last_end = int(ends[-1]) + self.start - 1  # last member day of final run
+        if today - last_end > grace:
+            return 0
+        return int(ends[-1] - starts[-1])
+
+    def gaps(self, min_length=1):
+        """(start ordinal, length) of every run of non-member days ≥ min_length."""
+        starts, ends = _runs(~self.mask)
+        lengths = ends - starts
+        keep = lengths >= min_length
+        return np.c_[starts[keep] + self.start, lengths[keep]]
+
+    def last_day(self):
+        """Most recent member day ordinal, or None."""
+        idx = np.flatnonzero(self.mask)
+        return int(idx[-1] + self.start) if len(idx) else None
+
+    def days_since_last(self, today=None):
+        last = self.last_day()
+        if last is None:
+            return None
+        today = date.today().toordinal() if today is None else to_ordinal(today)
+        return today - last
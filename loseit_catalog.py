@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Local food catalog with full-text search (loseit-log.py --offline / --hybrid).
+
+Every food that passes through the client is upserted into a SQLite
+database, data/food-catalog.db. Search results add name, brand, category
+and PK. getUnsavedFoodLogEntry adds nutrients, serving size and measure.
+An FTS5 index over name, brand and category is kept in sync by triggers,
+so searches are ranked locally with bm25 (name weighted over brand over
+category) in milliseconds. Foods seen more often win ties.
+
+The catalog is best effort: if SQLite lacks FTS5 or the file can't be
+written, it switches itself off and logging carries on without it.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+CATALOG_FILE = Path(os.environ.get("LOSEIT_CATALOG") or DATA_DIR / "food-catalog.db")
+RANK_WEIGHTS = (10.0, 3.0, 1.0)     # bm25 weights: name, brand, category
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    id          INTEGER PRIMARY KEY,
+    pk          TEXT NOT NULL UNIQUE,       -- food PK bytes as hex
+    pk_bytes    TEXT NOT NULL,              -- JSON signed bytes, as search_foods returns them
+    name        TEXT NOT NULL,
+    brand       TEXT NOT NULL DEFAULT '',
+    category    TEXT NOT NULL DEFAULT '',
+    nutrients   TEXT,                       -- JSON {ordinal: value} for one serving
+    serving_qty REAL,
+    measure     INTEGER,
+    seen        INTEGER NOT NULL DEFAULT 1,
+    first_seen  REAL NOT NULL,
+    last_seen   REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+    name, brand, category, content='foods', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS foods_ai AFTER INSERT ON foods BEGIN
+    INSERT INTO foods_fts(rowid, name, brand, category) VALUES (new.id, new.name, new.brand, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_ad AFTER DELETE ON foods BEGIN
+    INSERT INTO foods_fts(foods_fts, rowid, name, brand, category)
+    VALUES ('delete', old.id, old.name, old.brand, old.category);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_au AFTER UPDATE OF name, brand, category ON foods BEGIN
+    INSERT INTO foods_fts(foods_fts, rowid, name, brand, category)
+    VALUES ('delete', old.id, old.name, old.brand, old.category);
+    INSERT INTO foods_fts(rowid, name, brand, category) VALUES (new.id, new.name, new.brand, new.category);
+END;
+"""
+
+_WORD = re.compile(r"\w+")
+
+
+def _pk_hex(pk_bytes):
+    return bytes(int(b) % 256 for b in pk_bytes).hex()
+
+
+def fts_query(query):
+    """FTS5 MATCH expression: every word of `query` as a prefix."""
+    return " ".join(f'"{w}"*' for w in _WORD.findall((query or "").lower()))
+
+
+class FoodCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = Path(path)
+        self.available = True
+        self.touched = False
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init(self):
+        """Create the schema once → whether the catalog can be used."""
+        if self._ready or not self.available:
+            return self.available
+        with self._lock:
+            if not self._ready:
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with self._connect() as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    self._ready = True
+                except (OSError, sqlite3.Error):
+                    self.available = False
+        return self.available
+
+    # ── Writes ──
+
+    def add_foods(self, foods):
+        """Upsert search results (name, brand, category, pk_bytes)."""
+        rows = [f for f in foods or () if f.get("name") and len(f.get("pk_bytes") or ()) == 16]
+        if not rows or not self._init():
+            return
+        now = round(time.time(), 3)
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    """INSERT INTO foods (pk, pk_bytes, name, brand, category, first_seen, last_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(pk) DO UPDATE SET
+                           name = excluded.name,
+                           brand = CASE WHEN excluded.brand != '' THEN excluded.brand ELSE brand END,
+                           category = CASE WHEN excluded.category != '' THEN excluded.category ELSE category END,
+                           seen = seen + 1,
+                           last_seen = excluded.last_seen""",
+                    [(_pk_hex(f["pk_bytes"]), json.dumps([int(b) for b in f["pk_bytes"]]), f["name"],
+                      f.get("brand") or "", f.get("category") or "", now, now) for f in rows])
+            self.touched = True
+        except sqlite3.Error:
+            pass
+
+    def add_unsaved(self, food, unsaved):
+        """Record the nutrients/serving of a food from its getUnsavedFoodLogEntry reply."""
+        pk_bytes = food.get("pk_bytes") or unsaved.get("food_pk_bytes")
+        if not pk_bytes or len(pk_bytes) != 16 or not self._init():
+            return
+        name = food.get("name") or unsaved.get("name")
+        if not name:
+            return
+        now = round(time.time(), 3)
+        nutrients = json.dumps({str(k): v for k, v in (unsaved.get("nutrients") or {}).items()})
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """INSERT INTO foods (pk, pk_bytes, name, brand, category, nutrients, serving_qty,
+                                          measure, first_seen, last_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(pk) DO UPDATE SET
+                           nutrients = excluded.nutrients,
+                           serving_qty = excluded.serving_qty,
+                           measure = excluded.measure,
+                           last_seen = excluded.last_seen""",
+                    (_pk_hex(pk_bytes), json.dumps([int(b) for b in pk_bytes]), name,
+                     food.get("brand") or "", food.get("category") or "", nutrients,
+                     unsaved.get("serving_qty"), unsaved.get("food_measure_ordinal"), now, now))
+            self.touched = True
+        except sqlite3.Error:
+            pass
+
+    # ── Reads ──
+
+    def search(self, query, limit=15):
+        """Ranked local matches for `query` → food dicts like search_foods returns."""
+        match = fts_query(query)
+        if not match or not self._init():
+            return []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"""SELECT f.name, f.brand, f.category, f.pk_bytes, f.nutrients, f.serving_qty, f.measure
+                        FROM foods_fts JOIN foods f ON f.id = foods_fts.rowid
+                        WHERE foods_fts MATCH ?
+                        ORDER BY bm25(foods_fts, {', '.join(map(str, RANK_WEIGHTS))}), f.seen DESC
+                        LIMIT ?""",
+                    (match, limit)).fetchall()
+        except sqlite3.Error:
+            return []
+        self.touched = True
+        out = []
+        for name, brand, category, pk_bytes, nutrients, serving_qty, measure in rows:
+            food = {"name": name, "brand": brand, "category": category, "pk_bytes": json.loads(pk_bytes),
+                    "source": "local"}
+            if nutrients:
+                food["nutrients"] = {int(k): v for k, v in json.loads(nutrients).items()}
+                food["serving_qty"], food["measure"] = serving_qty, measure
+            out.append(food)
+        return out
+
+    def count(self):
+        if not self._init():
+            return 0
+        try:
+            with self._connect() as conn:
+                return conn.execute("SELECT count(*) FROM foods").fetchone()[0]
+        except sqlite3.Error:
+            return 0
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Cohort comparison engine for labelled dates vs. food-log aggregates.
+
+Takes any number of labelled date sets (gym check-ins, weekends, travel...)
+and the per-day food aggregates, labels every day in the range, and computes
+all comparison metrics — tracking rate, entries/day, calories, cal/entry,
+complete-tracking share — per cohort and per month in one group-by pass.
+"""
+
+import json
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from loseit_calendar import day_range, weekdays
+from loseit_export import group_sum, parse_date
+from loseit_stats import compare_means, grouped_percentiles
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Metric columns summed in the single group-by pass
+_SUM_COLUMNS = ("days", "logged_days", "entries", "calories", "complete_days")
+
+# Distribution percentiles reported for entries and calories on logged days
+PERCENTILES = (25, 50, 75, 90)
+
+
+def daily_aggregates(food_log, complete_meals=3):
+    """Per-day aggregates from a FoodLog → dict of aligned arrays.
+
+    days      sorted unique day ordinals with at least one entry
+    entries   number of food entries that day
+    calories  total calories that day
+    meals     number of distinct meals logged that day
+    complete  bool, meals >= complete_meals
+    """
+    cal_key = food_log.find_column(0)
+    cal = food_log.column(cal_key) if cal_key else np.zeros(len(food_log))
+    days, sums = group_sum(food_log.days, np.column_stack([np.ones(len(food_log)), cal]))
+
+    stride = max(len(food_log.meal_names), 1)
+    day_meals = np.unique(food_log.days * stride + food_log.meals) // stride
+    meal_days, meal_counts = np.unique(day_meals, return_counts=True)
+    meals = np.zeros(len(days), dtype=np.int64)
+    meals[np.searchsorted(days, meal_days)] = meal_counts
+
+    return {
+        "days": days.astype(np.int64),
+        "entries": sums[:, 0].astype(np.int64),
+        "calories": sums[:, 1],
+        "meals": meals,
+        "complete": meals >= complete_meals,
+    }
+
+
+def load_date_set(path):
+    """Load a set of dates (as ordinals) from a JSON or plain-text file.
+
+    JSON may be a list of date strings or an object whose first list value
+    holds them (e.g. {"checkins": ["01/31/2026", ...]}). Text files hold one
+    date per line. Any format parse_date understands is accepted.
+    """
+    text = Path(path).expanduser().read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = text.splitlines()
+    if isinstance(data, dict):
+        data = data.get("checkins") or next((v for v in data.values() if isinstance(v, list)), [])
+    out = set()
+    for s in data:
+        d = parse_date(str(s))
+        if d:
+            out.add(d.toordinal())
+    return out
+
+
+def months_of(ordinals):
+    """Day ordinals → months since 1970-01 (int64)."""
+    d64 = (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]")
+    return d64.astype("datetime64[M]").astype(np.int64)
+
+
+def month_label(m):
+    return str(np.datetime64(int(m), "M"))
+
+
+def label_days(days, cohorts, default="rest"):
+    """Assign each day ordinal to a cohort index.
+
+    `cohorts` maps label → set of ordinals; earlier labels win on overlap.
+    Days in no cohort get `default` (the last index).
+    """
+    names = list(cohorts) + [default]
+    labels = np.full(len(days), len(names) - 1, dtype=np.int64)
+    for i in reversed(range(len(cohorts))):
+        ords = np.fromiter(cohorts[names[i]], dtype=np.int64)
+        labels[np.isin(days, ords)] = i
+    return names, labels
+
+
+def weekend_days(start, end):
+    """Set of Saturday/Sunday ordinals in [start, end]."""
+    days = day_range(start, end)
+    return set(days[weekdays(days) >= 5].tolist())
+
+
+def _metrics(row):
+    days, logged, entries, calories, complete = (float(x) for x in row)
+    return {
+        "days": int(days),
+        "logged_days": int(logged),
+        "tracking_rate_pct": round(logged / days * 100, 1) if days else 0.0,
+        "avg_entries": round(entries / logged, 2) if logged else 0.0,
+        "avg_calories": round(calories / logged, 1) if logged else 0.0,
+        "avg_cal_per_entry": round(calories / entries, 1) if entries else 0.0,
+        "complete_days": int(complete),
+        "complete_pct": round(complete / logged * 100, 1) if logged else 0.0,
+    }
+
+
+def _resolve_range(agg, cohorts, start, end):
+    labelled = [o for ords in cohorts.values() for o in ords]
+    if start is None:
+        start = min(labelled) if labelled else int(agg["days"][0])
+    if end is None:
+        end = max(labelled) if labelled else int(agg["days"][-1])
+    return start, end
+
+
+def align(agg, days):
+    """Per-day aggregates aligned to `days` (0 where nothing was logged).
+
+    Returns (logged, entries, calories, complete) arrays of len(days).
+    """
+    n = len(agg["days"])
+    if not n:
+        zeros = np.zeros(len(days))
+        return zeros.astype(bool), zeros, zeros, zeros.astype(bool)
+    pos = np.minimum(np.searchsorted(agg["days"], days), n - 1)
+    logged = agg["days"][pos] == days
+    return (
+        logged,
+        np.where(logged, agg["entries"][pos], 0),
+        np.where(logged, agg["calories"][pos], 0.0),
+        logged & agg["complete"][pos],
+    )
+
+
+def compare(agg, cohorts, start=None, end=None, default="rest"):
+    """Compare labelled cohorts over [start, end] (ordinals, inclusive).
+
+    The range defaults to the span of the labelled dates. Returns
+    {"range", "cohorts": {label: metrics}, "monthly": [{"month", label: metrics}]}.
+    """
+    start, end = _resolve_range(agg, cohorts, start, end)
+    days = day_range(start, end)
+    names, labels = label_days(days, cohorts, default)
+
+    logged, entries, calories, complete = align(agg, days)
+    matrix = np.column_stack([np.ones(len(days)), logged, entries, calories, complete])
+
+    # One group-by over (cohort, month); cohort totals fold the months back up
+    months = months_of(days)
+    m0 = months.min() if len(months) else 0
+    n_months = int(months.max() - m0 + 1) if len(months) else 1
+    keys, sums = group_sum(labels * n_months + (months - m0), matrix)
+    key_labels = keys // n_months
+    key_months = keys % n_months + m0
+
+    totals = np.zeros((len(names), len(_SUM_COLUMNS)))
+    np.add.at(totals, key_labels, sums)
+
+    monthly = {}
+    for lbl, m, row in zip(key_labels, key_months, sums):
+        monthly.setdefault(int(m), {})[names[lbl]] = _metrics(row)
+
+    cohort_metrics = {name: _metrics(totals[i]) for i, name in enumerate(names)}
+    for key, values in (("entries_percentiles", entries), ("calories_percentiles", calories)):
+        per_label = grouped_percentiles(labels[logged], values[logged], PERCENTILES)
+        for i, name in enumerate(names):
+            q = per_label.get(i, [0] * len(PERCENTILES))
+            cohort_metrics[name][key] = {f"p{p}": round(v, 1) for p, v in zip(PERCENTILES, q)}
+
+    return {
+        "range": {"start": str(date.fromordinal(int(start))), "end": str(date.fromordinal(int(end)))},
+        "cohorts": cohort_metrics,
+        "monthly": [dict(month=month_label(m), **monthly[m]) for m in sorted(monthly)],
+    }
+
+
+def differences(agg, cohorts, a, b, start=None, end=None, default="rest",
+                n_resamples=10000, confidence=0.95, seed=None):
+    """Bootstrap CIs and permutation p-values for cohort a minus cohort b.
+
+    Tracking rate is compared over all days (in percentage points); entries
+    and calories over logged days only.
+    """
+    start, end = _resolve_range(agg, cohorts, start, end)
+    days = day_range(start, end)
+    names, labels = label_days(days, cohorts, default)
+    logged, entries, calories, _complete = align(agg, days)
+    in_a = labels == names.index(a)
+    in_b = labels == names.index(b)
+
+    return {
+        "a": a,
+        "b": b,
+        "tracking_rate_pct": compare_means(logged[in_a] * 100.0, logged[in_b] * 100.0,
+                                           n_resamples, confidence, seed),
+        "entries": compare_means(entries[in_a & logged], entries[in_b & logged],
+                                 n_resamples, confidence, seed),
+        "calories": compare_means(calories[in_a & logged], calories[in_b & logged],
+                                  n_resamples, confidence, seed),
+    }
+
+
+def print_comparison(result):
+    names = list(result["cohorts"])
+    print(f"\nCohort comparison {result['range']['start']} → {result['range']['end']}")
+    print(f"\n{'Metric':<24}" + "".join(f"{n[:14]:>15}" for n in names))
+    print("-" * (24 + 15 * len(names)))
+    rows = [
+        ("Days", "days", "{:.0f}"),
+        ("Logged days", "logged_days", "{:.0f}"),
+        ("Tracking rate %", "tracking_rate_pct", "{:.1f}"),
+        ("Avg entries/day", "avg_entries", "{:.1f}"),
+        ("Avg calories/day", "avg_calories", "{:.0f}"),
+        ("Avg cal/entry", "avg_cal_per_entry", "{:.0f}"),
+        ("Complete days %", "complete_pct", "{:.0f}"),
+    ]
+    for label, key, fmt in rows:
+        print(f"{label:<24}" + "".join(f"{fmt.format(result['cohorts'][n][key]):>15}" for n in names))
+    for p in PERCENTILES:
+        print(f"{f'p{p} entries / cal':<24}" + "".join(
+            f"{result['cohorts'][n]['entries_percentiles'][f'p{p}']:>7.0f} /{result['cohorts'][n]['calories_percentiles'][f'p{p}']:>6.0f}"
+            for n in names))
+
+    print(f"\n{'Month':<10}" + "".join(f"{n[:10] + ' days':>16}{'ent':>6}{'cal':>7}" for n in names))
+    for row in result["monthly"]:
+        line = f"{row['month']:<10}"
+        for n in names:
+            m = row.get(n)
+            if m:
+                line += f"{m['logged_days']:>10}/{m['days']:<5}{m['avg_entries']:>6.1f}{m['avg_calories']:>7.0f}"
+            else:
+                line += f"{'-':>16}{'':>6}{'':>7}"
+        print(line)
+
+
+def print_differences(diffs):
+    print(f"\n{diffs['a']} − {diffs['b']} (bootstrap CI, permutation p-value)")
+    for label, key in (("Tracking rate (pp)", "tracking_rate_pct"), ("Entries/day", "entries"),
+                       ("Calories/day", "calories")):
+        d = diffs[key]
+        if not d:
+            print(f"  {label:<20} (not enough data)")
+            continue
+        pct = round(d["confidence"] * 100)
+        sig = "*" if d["p_value"] < 1 - d["confidence"] else ""
+        print(f"  {label:<20} {d['diff']:>+8.1f}   {pct}% CI [{d['ci_low']:+.1f}, {d['ci_high']:+.1f}]"
+              f"   p={d['p_value']:.4f}{sig}")
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Vectorized access to Lose It! export CSVs.
+
+Loads every nutrient column of food-logs.csv into a single float matrix
+(rows × nutrients) so per-day, per-meal and per-window totals are plain
+NumPy group-by reductions instead of per-cell Python sums.
+
+Nutrient columns are mapped to FoodMeasurement ordinals where the export
+header matches a name from data/food-measurement-enum.md.
+
+An export source is either the extracted directory (data/export/) or the
+downloaded zip (data/loseit-export.zip). Zip members are streamed straight
+out of the archive, and only the members an analysis asks for are opened.
+
+The CSV helpers (open_csv, iter_csv, has_csv, …) need only the standard
+library, so shell scripts can use them from any python3; NumPy is imported
+by the code that builds and reduces a FoodLog.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+EXPORT_DIR = DATA_DIR / "export"
+EXPORT_ZIP = DATA_DIR / "loseit-export.zip"
+
+# Columns in food-logs.csv that are never nutrients
+FOOD_LOG_META_COLUMNS = {"Date", "Name", "Icon", "Meal", "Quantity", "Units", "Deleted", "Type"}
+
+# Export header name (lowercased, unit stripped) → FoodMeasurement ordinal
+FOOD_MEASUREMENT_ORDINALS = {
+    "calories": 0, "energy": 0,
+    "fat": 2,
+    "saturated fat": 4,
+    "monounsaturated fat": 5,
+    "polyunsaturated fat": 6,
+    "trans fat": 7,
+    "cholesterol": 8,
+    "sodium": 9,
+    "carbohydrates": 10, "carbohydrate": 10, "carbs": 10,
+    "fiber": 11, "dietary fiber": 11,
+    "sugar": 12, "sugars": 12,
+    "protein": 13,
+    "vitamin a": 14,
+    "vitamin b-6": 15, "vitamin b6": 15,
+    "vitamin b-12": 16, "vitamin b12": 16,
+    "vitamin c": 17,
+    "calcium": 18,
+    "iron": 19,
+    "magnesium": 20,
+    "phosphorus": 21,
+    "potassium": 22,
+    "zinc": 23,
+    "thiamin": 24,
+    "riboflavin": 25,
+    "niacin": 26,
+    "folate": 27,
+    "caffeine": 28,
+}
+
+_UNIT_RE = re.compile(r"^(?P<name>.*?)\s*\((?P<unit>[^)]*)\)\s*$")
+
+
+def parse_date(s):
+    """Try common date formats."""
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%m/%d/%y"):
+        try:
+            return datetime.strptime(s.strip(), fmt).date()
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+def is_deleted(row):
+    return (row.get("Deleted") or "").strip().lower() in ("true", "1")
+
+
+def is_zip_source(source):
+    return Path(source).suffix.lower() == ".zip" and Path(source).is_file()
+
+
+def _zip_member(zf, name):
+    """Member called `name`, at the top level or in a single subfolder."""
+    try:
+        return zf.getinfo(name)
+    except KeyError:
+        pass
+    for info in zf.infolist():
+        if info.filename.rsplit("/", 1)[-1] == name:
+            return info
+    return None
+
+
+@contextmanager
+def open_csv(source, name):
+    """Text stream for CSV `name` from an export dir or zip, or None if absent."""
+    if is_zip_source(source):
+        with zipfile.ZipFile(source) as zf:
+            info = _zip_member(zf, name)
+            if info is None:
+                yield None
+                return
+            with zf.open(info) as raw:
+                yield io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        return
+    path = Path(source) / name
+    if not path.exists():
+        yield None
+        return
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield f
+
+
+def iter_csv(source, name):
+    """Stream rows of CSV `name` as dicts without loading the whole file."""
+    with open_csv(source, name) as f:
+        if f is not None:
+            yield from csv.DictReader(f)
+
+
+def read_csv(source, name):
+    with open_csv(source, name) as f:
+        return list(csv.DictReader(f)) if f is not None else []
+
+
+def has_csv(source, name):
+    if is_zip_source(source):
+        with zipfile.ZipFile(source) as zf:
+            return _zip_member(zf, name) is not None
+    return (Path(source) / name).exists()
+
+
+def nutrient_key(header):
+    """'Sodium (mg)' → 'sodium_mg', 'Calories' → 'calories'."""
+    return re.sub(r"[^a-z0-9]+", "_", header.lower()).strip("_")
+
+
+def nutrient_ordinal(header):
+    m = _UNIT_RE.match(header)
+    name = (m.group("name") if m else header).strip().lower()
+    return FOOD_MEASUREMENT_ORDINALS.get(name)
+
+
+def _float_column(values):
+    """Parse a column of strings to float64; blanks, 'n/a' and junk become 0."""
+    import numpy as np
+    cleaned = [v.replace(",", "").strip() if v else "0" for v in values]
+    try:
+        out = np.array(cleaned, dtype=np.float64)
+    except ValueError:
+        out = np.zeros(len(cleaned), dtype=np.float64)
+        for i, v in enumerate(cleaned):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+    return np.nan_to_num(out, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def group_sum(keys, values):
+    """Sum rows of `values` sharing a key → (unique_keys, sums).
+
+    One argsort + np.add.reduceat, regardless of the number of groups.
+    """
+    import numpy as np
+    keys = np.asarray(keys)
+    if keys.size == 0:
+        return keys, np.zeros((0,) + values.shape[1:], dtype=np.float64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    return sorted_keys[starts], np.add.reduceat(values[order], starts, axis=0)
+
+
+class FoodLog:
+    """Non-deleted food-logs.csv rows as parallel arrays.
+
+    Attributes:
+        days      int64 array of date ordinals (date.toordinal())
+        meals     int array of indices into `meal_names`
+        names     list of food names
+        columns   nutrient keys, e.g. ['calories', 'fat_g', ..., 'sodium_mg']
+        headers   original CSV headers for `columns`
+        ordinals  FoodMeasurement ordinal for each column (or None)
+        values    float64 matrix, rows × len(columns)
+    """
+
+    def __init__(self, days, meals, meal_names, names, headers, values):
+        self.days = days
+        self.meals = meals
+        self.meal_names = meal_names
+        self.names = names
+        self.headers = headers
+        self.columns = [nutrient_key(h) for h in headers]
+        self.ordinals = [nutrient_ordinal(h) for h in headers]
+        self.values = values
+
+    def __len__(self):
+        return len(self.days)
+
+    def column(self, key):
+        return self.values[:, self.columns.index(key)]
+
+    def find_column(self, ordinal):
+        """Column key for a FoodMeasurement ordinal, or None."""
+        for key, o in zip(self.columns, self.ordinals):
+            if o == ordinal:
+                return key
+        return None
+
+    def daily_totals(self):
+        """→ (day ordinals, day × nutrient totals)."""
+        return group_sum(self.days, self.values)
+
+    def meal_totals(self):
+        """→ (day ordinals, meal indices, (day, meal) × nutrient totals)."""
+        stride = max(len(self.meal_names), 1)
+        keys, sums = group_sum(self.days * stride + self.meals, self.values)
+        return keys // stride, keys % stride, sums
+
+    def window(self, start, end=None):
+        """Rows with start < day (<= end, if given); dates as date objects."""
+        mask = self.days > start.toordinal()
+        if end is not None:
+            mask &= self.days <= end.toordinal()
+        return self._subset(mask)
+
+    def _subset(self, mask):
+        import numpy as np
+        idx = np.flatnonzero(mask)
+        sub = FoodLog.__new__(FoodLog)
+        sub.days = self.days[idx]
+        sub.meals = self.meals[idx]
+        sub.meal_names = self.meal_names
+        sub.names = [self.names[i] for i in idx]
+        sub.headers = self.headers
+        sub.columns = self.columns
+        sub.ordinals = self.ordinals
+        sub.values = self.values[idx]
+        return sub
+
+
+def food_log_from_rows(rows):
+    """Build a FoodLog from csv.DictReader rows (deleted/undated rows dropped)."""
+    import numpy as np
+    headers = []
+    if rows:
+        headers = [h for h in rows[0].keys() if h and h not in FOOD_LOG_META_COLUMNS]
+
+    date_cache = {}
+    kept = []
+    days = []
+    for r in rows:
+        if is_deleted(r):
+            continue
+        s = r.get("Date") or ""
+        if s not in date_cache:
+            d = parse_date(s)
+            date_cache[s] = d.toordinal() if d else None
+        o = date_cache[s]
+        if o is None:
+            continue
+        kept.append(r)
+        days.append(o)
+
+    meal_names, meals = np.unique(
+        np.array([(r.get("Meal") or "").strip() for r in kept], dtype=object).astype(str),
+        return_inverse=True,
+    ) if kept else (np.array([], dtype=str), np.array([], dtype=np.int64))
+
+    if headers:
+        values = np.column_stack([_float_column([r.get(h) for r in kept]) for h in headers]) \
+            if kept else np.zeros((0, len(headers)))
+    else:
+        values = np.zeros((len(kept), 0))
+
+    return FoodLog(
+        days=np.array(days, dtype=np.int64),
+        meals=np.asarray(meals, dtype=np.int64).reshape(-1),
+        meal_names=[str(m) for m in meal_names],
+        names=[(r.get("Name") or "").strip() for r in kept],
+        headers=headers,
+        values=values,
+    )
+
+
+def load_food_log(source=EXPORT_DIR):
+    """FoodLog from an export directory or zip."""
+    return food_log_from_rows(read_csv(source, "food-logs.csv"))
+
+
+def ordinal_to_date(o):
+    return date.fromordinal(int(o))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Write-ahead journals for food logging (loseit-log.py --queue / --flush).
+
+data/log-journal.jsonl is append-only: an "add" record for every queued
+entry (resolved food PK, meal, date, servings), then "done" or "fail"
+records as flushes resolve them. Each record is one write followed by
+fsync, so a crash can at most leave a torn last line, which reads skip.
+
+After a flush, compact() rewrites the file with only the entries still
+pending (temp file, fsync, rename) so the journal doesn't grow forever.
+A flock on a sidecar lock file keeps appends, compaction and flushes
+from different processes from interleaving.
+
+data/log-keys.jsonl (KeyStore) uses the same format to remember which
+idempotency keys were submitted, under which entry PK, and whether the
+server confirmed them.
+"""
+
+import fcntl
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+JOURNAL_FILE = Path(os.environ.get("LOSEIT_JOURNAL") or DATA_DIR / "log-journal.jsonl")
+KEYS_FILE = Path(os.environ.get("LOSEIT_KEYS") or DATA_DIR / "log-keys.jsonl")
+KEY_RETENTION_DAYS = 90
+KEYS_COMPACT_BYTES = 1024 * 1024
+
+
+class JournalBusy(Exception):
+    """Another process is already flushing this journal."""
+
+
+class _AppendLog:
+    """JSONL file of records: fsync'd appends, torn-line tolerant reads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self, path, blocking=True):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                raise JournalBusy(f"{self.path} is being flushed by another process") from None
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # ── Records ──
+
+    def _append(self, record):
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._locked(self._lock_path):
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b"\n":
+                    line = b"\n" + line     # don't glue onto a torn line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def records(self):
+        """Every intact record, oldest first."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        out = []
+        for line in lines:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue    # torn write from a crash
+        return out
+
+    def _rewrite(self, records):
+        """Replace the file with `records` (caller holds the lock)."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        dir_fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class Journal(_AppendLog):
+    def __init__(self, path=JOURNAL_FILE):
+        super().__init__(path)
+        self._flush_path = self.path.with_name(self.path.name + ".flush")
+
+    def add(self, entry):
+        """Queue an entry → its journal id."""
+        entry_id = uuid.uuid4().hex[:12]
+        self._append({"op": "add", "id": entry_id, "queued_at": round(time.time(), 3), **entry})
+        return entry_id
+
+    def mark_done(self, entry_id, **fields):
+        self._append({"op": "done", "id": entry_id, "at": round(time.time(), 3), **fields})
+
+    def mark_failed(self, entry_id, error):
+        self._append({"op": "fail", "id": entry_id, "at": round(time.time(), 3), "error": error})
+
+    def pending(self):
+        """Entries not yet logged, in queue order, with attempts/last_error."""
+        entries = {}
+        for r in self.records():
+            op, entry_id = r.get("op"), r.get("id")
+            if op == "add":
+                entry = {k: v for k, v in r.items() if k != "op"}
+                entries[entry_id] = {**entry, "attempts": entry.get("attempts", 0)}
+            elif op == "done":
+                entries.pop(entry_id, None)
+            elif op == "fail" and entry_id in entries:
+                entries[entry_id]["attempts"] += 1
+                entries[entry_id]["last_error"] = r.get("error")
+        return list(entries.values())
+
+    # ── Maintenance ──
+
+    def compact(self):
+        """Rewrite the journal as just its pending entries → how many remain."""
+        with self._locked(self._lock_path):
+            pending = self.pending()
+            self._rewrite({"op": "add", **entry} for entry in pending)
+        return len(pending)
+
+    @contextmanager
+    def flushing(self):
+        """Hold the flush lock; raises JournalBusy if another flush holds it."""
+        with self._locked(self._flush_path, blocking=False):
+            yield
+
+
+class KeyStore(_AppendLog):
+    """Idempotency keys already submitted → their entry PK and status.
+
+    A key is recorded as "sent" before updateFoodLogEntry goes out and
+    "confirmed" once the server accepted it, so a rerun after a crash knows
+    to resend under the same entry PK rather than create a new entry.
+
+    Records are folded per key (later fields win), so a confirmed key still
+    carries the date, meal and name it was sent with. The file is read once
+    per run; record() keeps the in-memory view current.
+    """
+
+    def __init__(self, path=KEYS_FILE):
+        super().__init__(path)
+        self._keys = None
+
+    @staticmethod
+    def _fold(records):
+        keys = {}
+        for r in records:
+            keys[r.get("key")] = {**keys.get(r.get("key"), {}), **r}
+        return keys
+
+    def _by_key(self):
+        if self._keys is None:
+            self._keys = self._fold(self.records())
+        return self._keys
+
+    def get(self, key):
+        """Folded record for `key` (latest op, with the sent fields), or None."""
+        return self._by_key().get(key)
+
+    def confirmed_pks(self):
+        """Entry PKs whose latest record is a server confirmation."""
+        return {r["entry_pk"] for r in self._by_key().values() if r.get("op") == "confirmed" and r.get("entry_pk")}
+
+    def mark_deleted(self, entry_pks):
+        """Record that the entries under these PKs were deleted, so their keys can log again."""
+        for key, r in list(self._by_key().items()):
+            if r.get("entry_pk") in entry_pks and r.get("op") != "deleted":
+                self.record(key, "deleted", entry_pk=r["entry_pk"])
+
+    def record(self, key, status, **fields):
+        record = {"op": status, "key": key, "at": round(time.time(), 3), **fields}
+        self._append(record)
+        keys = self._by_key()
+        keys[key] = {**keys.get(key, {}), **record}
+        try:
+            if self.path.stat().st_size > KEYS_COMPACT_BYTES:
+                self.compact()
+        except OSError:
+            pass
+
+    def compact(self, retention_days=KEY_RETENTION_DAYS):
+        """Keep one folded record per key, dropping keys older than the retention."""
+        cutoff = time.time() - retention_days * 86400
+        with self._locked(self._lock_path):
+            kept = [r for r in self._fold(self.records()).values() if r.get("at", 0) >= cutoff]
+            self._rewrite(kept)
+        self._keys = {r.get("key"): r for r in kept}
+        return len(kept)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Prometheus textfile-collector metrics for the sync / analyze / log jobs.
+
+Each run rewrites <METRICS_DIR>/loseit_<job>.prom (temp file + rename, as
+node_exporter's textfile collector requires). Gauges describe the last run
+— phase durations, bytes, rows per CSV — and counters (runs, errors, bytes)
+accumulate across runs via a small state file next to it.
+
+Point node_exporter at the directory:
+
+    LOSEIT_METRICS_DIR=/var/lib/node_exporter/textfile_collector ./loseit-sync.sh
+    node_exporter --collector.textfile.directory=/var/lib/node_exporter/textfile_collector
+
+CLI (used by the shell scripts):
+
+    python3 loseit_metrics.py sync STATUS RUN_INFO_JSON [DURATION]
+    python3 loseit_metrics.py error JOB [PHASE]
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+METRICS_DIR = Path(os.environ.get("LOSEIT_METRICS_DIR") or DATA_DIR / "metrics")
+
+HELP = {
+    "phase_duration_seconds": "Duration of each phase of the last run",
+    "run_duration_seconds": "Wall time of the last run",
+    "last_run_timestamp_seconds": "Unix time the last run finished",
+    "last_run_success": "1 if the last run succeeded, else 0",
+    "runs_total": "Runs by outcome",
+    "errors_total": "Failed runs by phase",
+    "bytes_transferred": "Bytes downloaded by the last run",
+    "bytes_transferred_total": "Bytes downloaded across all runs",
+    "csv_rows": "Data rows per export CSV",
+    "files": "Export members by change status in the last run",
+    "entries_total": "Food log entries written",
+    "gwt_retries_total": "GWT-RPC attempts retried after a transport error or 5xx",
+    "gwt_timeouts_total": "GWT-RPC attempts that timed out",
+    "gwt_hedges_total": "GWT-RPC reads that raced a second request",
+    "gwt_hedge_wins_total": "Hedged reads answered first by the second request",
+    "gwt_concurrency_limit": "AIMD in-flight GWT-RPC limit at the end of the last run",
+    "gwt_concurrency_limit_min": "Lowest AIMD limit reached during the last run",
+    "gwt_limiter_wait_seconds": "Time requests spent queued for the limiter (summed over threads)",
+    "gwt_breaker_state": "Circuit breaker at exit: 0 closed, 1 half-open, 2 open",
+    "gwt_breaker_trips_total": "Times the circuit breaker opened",
+    "gwt_rejected_total": "GWT-RPC requests refused by the limiter or open circuit",
+    "queued_total": "Food log entries written to the offline journal instead of sent",
+    "journal_pending": "Journal entries still queued after the last flush",
+    "prefetch_total": "Interactive picks by whether their entry was prefetched",
+    "search_cache_total": "Food searches by cache outcome (exact, prefix, miss)",
+    "search_cache_hit_ratio": "Share of searches answered from the cache, across all runs",
+    "catalog_foods": "Foods in the offline search catalog",
+    "deleted_total": "Food log entries deleted by --delete-range",
+    "template_items": "Meal template items by where their unsaved entry came from",
+}
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+class RunMetrics:
+    """Metrics for one run of `job`; call finish() to write them."""
+
+    def __init__(self, job, metrics_dir=None):
+        self.job = job
+        self.dir = Path(metrics_dir or METRICS_DIR)
+        self.gauges = {}
+        self.counters = {}
+        self._t0 = time.monotonic()
+
+    def _key(self, name, labels):
+        return f"loseit_{self.job}_{name}", tuple(sorted(labels.items()))
+
+    def gauge(self, name, value, **labels):
+        if value is not None:
+            self.gauges[self._key(name, labels)] = float(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as phase_duration_seconds{phase=name}; count it in errors_total if it raises."""
+        t0 = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.inc("errors_total", phase=name)
+            raise
+        finally:
+            self.gauge("phase_duration_seconds", round(time.monotonic() - t0, 6), phase=name)
+
+    # ── Output ──
+
+    def _state_path(self):
+        return self.dir / f".loseit_{self.job}.counters.json"
+
+    def _merged_counters(self):
+        try:
+            with open(self._state_path(), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        totals = {}
+        for entry in state.get("counters", []):
+            totals[(entry["name"], tuple(tuple(p) for p in entry["labels"]))] = entry["value"]
+        for key, amount in self.counters.items():
+            totals[key] = totals.get(key, 0.0) + amount
+        return totals
+
+    def render(self, counters):
+        lines = []
+        series = sorted([(k, v, "gauge") for k, v in self.gauges.items()] +
+                        [(k, v, "counter") for k, v in counters.items()])
+        seen = set()
+        prefix = f"loseit_{self.job}_"
+        for (name, labels), value, kind in series:
+            if name not in seen:
+                seen.add(name)
+                short = name[len(prefix):]
+                if short in HELP:
+                    lines.append(f"# HELP {name} {HELP[short]}")
+                lines.append(f"# TYPE {name} {kind}")
+            text = str(int(value)) if float(value).is_integer() else repr(float(value))
+            lines.append(f"{_series(name, labels)} {text}")
+        return "\n".join(lines) + "\n"
+
+    def finish(self, success=True, error_phase=None, duration=None):
+        """Record run totals and write loseit_<job>.prom. Never raises."""
+        if not success and error_phase:
+            self.inc("errors_total", phase=error_phase)
+        if duration is None:
+            duration = round(time.monotonic() - self._t0, 6)
+        self.gauge("run_duration_seconds", duration)
+        self.gauge("last_run_timestamp_seconds", round(time.time(), 3))
+        self.gauge("last_run_success", 1 if success else 0)
+        self.inc("runs_total", outcome="success" if success else "error")
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            counters = self._merged_counters()
+            state = {"counters": [{"name": n, "labels": [list(p) for p in l], "value": v}
+                                  for (n, l), v in counters.items()]}
+            for path, text in ((self._state_path(), json.dumps(state)),
+                               (self.dir / f"loseit_{self.job}.prom", self.render(counters))):
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text(text, encoding="utf-8")
+                os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️  Could not write metrics to {self.dir}: {e}", file=sys.stderr)
+
+
+# ─── Sync ────────────────────────────────────────────────────────────────────
+
+# run-info key → phase label
+SYNC_PHASES = {
+    "probe_seconds": "auth_probe",
+    "browser_seconds": "browser_launch",
+    "auth_seconds": "auth",
+    "download_seconds": "download",
+    "extract_seconds": "extract",
+    "snapshot_seconds": "snapshot",
+}
+
+
+def record_sync(info, status, duration=None, metrics_dir=None):
+    """Write sync metrics from a loseit_sync run-info dict."""
+    m = RunMetrics("sync", metrics_dir)
+    for key, phase in SYNC_PHASES.items():
+        m.gauge("phase_duration_seconds", info.get(key), phase=phase)
+    m.gauge("bytes_transferred", info.get("bytes", 0))
+    m.inc("bytes_transferred_total", info.get("bytes", 0))
+    m.gauge("resumes", info.get("resumes", 0))
+    m.gauge("export_changed", 1 if info.get("changed") else 0)
+    for state, n in (info.get("members") or {}).items():
+        m.gauge("files", n, status=state)
+    for name, rows in (info.get("rows") or {}).items():
+        m.gauge("csv_rows", rows, file=name)
+    if info.get("auth"):
+        m.inc("auth_total", path=info["auth"])
+    m.finish(success=status != "error", error_phase=info.get("failed_phase", "sync"), duration=duration)
+    return m
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 3 and argv[0] == "sync":
+        try:
+            with open(argv[2], encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            info = {}
+        record_sync(info, argv[1], float(argv[3]) if len(argv) > 3 else None)
+        return 0
+    if len(argv) >= 2 and argv[0] == "error":
+        RunMetrics(argv[1]).finish(success=False, error_phase=argv[2] if len(argv) > 2 else argv[1])
+        return 0
+    print(__doc__.split("CLI (used by the shell scripts):")[1].strip(), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Prefix-aware cache of searchFoods results (loseit-log.py).
+
+Queries are normalized to their lowercase words joined by single spaces
+and kept in a character trie, in memory and in data/search-cache.json.
+
+A query that was asked before is an exact hit. Otherwise the deepest
+cached ancestor (a string prefix, e.g. "chick" for "chicken breast")
+can answer it if its result list was complete, i.e. the server returned
+fewer than its result limit. The assumption is that the server matches a
+food when every query word is a prefix of one of the words of its name or
+brand (matches()). If so, every refined match is also an ancestor match,
+and filtering the complete ancestor list with the same predicate gives
+exactly the refined result set, in the ancestor's ranking.
+
+Nothing documents the server's matching, so an ancestor is only used when
+its own results are evidence for it: a non-empty list in which every food
+satisfies matches() for the ancestor query. An answer that doesn't fit
+the predicate (a fuzzy or category hit, say) marks that entry as not
+filterable, and its refinements go to the server.
+
+The file is written once per run (save()), not on every put. Hits and
+misses are counted per run and cumulatively in the cache file;
+hit_ratio() is for tuning MAX_QUERIES / TTL.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+CACHE_FILE = Path(os.environ.get("LOSEIT_SEARCH_CACHE") or DATA_DIR / "search-cache.json")
+TTL = 7 * 86400                 # cached results older than this are ignored
+MAX_QUERIES = 2000              # oldest queries are dropped beyond this
+MATCH_FIELDS = ("name", "brand")
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD.findall((text or "").lower())
+
+
+def normalize(query):
+    return " ".join(words(query))
+
+
+def matches(food, query_words):
+    """Whether every query word is a prefix of some word of the food's MATCH_FIELDS."""
+    food_words = words(" ".join(food.get(f) or "" for f in MATCH_FIELDS))
+    return all(any(w.startswith(q) for w in food_words) for q in query_words)
+
+
+class _Node:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+
+class SearchCache:
+    """Trie of query → {"foods", "complete", "filterable", "at"}, persisted to `path`."""
+
+    def __init__(self, path=CACHE_FILE, ttl=TTL, max_queries=MAX_QUERIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._root = None
+        self._entries = {}
+        self._dirty = False
+        self.totals = {"exact": 0, "prefix": 0, "miss": 0}     # across runs
+        self.stats = {"exact": 0, "prefix": 0, "miss": 0}      # this run
+
+    # ── Trie ──
+
+    def _load(self):
+        if self._root is not None:
+            return
+        self._root = _Node()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.totals.update(data.get("stats") or {})
+        for key, entry in (data.get("queries") or {}).items():
+            self._insert(key, entry)
+
+    def _insert(self, key, entry):
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+        node.entry = entry
+        self._entries[key] = entry
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry["at"] <= self.ttl
+
+    # ── Lookup ──
+
+    def get(self, query):
+        """(foods, source) for a query, or (None, "miss").
+
+        source is "exact", or "prefix:<ancestor>" when filtered from a
+        complete ancestor's results.
+        """
+        key = normalize(query)
+        with self._lock:
+            self._load()
+            node, ancestor = self._root, None
+            for depth, ch in enumerate(key):
+                node = node.children.get(ch)
+                if node is None:
+                    break
+                if depth == len(key) - 1 and self._fresh(node.entry):
+                    self._count("exact")
+                    return [dict(f) for f in node.entry["foods"]], "exact"
+                if self._fresh(node.entry) and node.entry["complete"] and node.entry.get("filterable"):
+                    ancestor = (key[:depth + 1], node.entry)
+            if ancestor is None:
+                self._count("miss")
+                return None, "miss"
+            self._count("prefix")
+        query_words = key.split()
+        return [dict(f) for f in ancestor[1]["foods"] if matches(f, query_words)], f"prefix:{ancestor[0]}"
+
+    def _count(self, outcome):
+        self.stats[outcome] += 1
+        self.totals[outcome] += 1
+
+    def hit_ratio(self, cumulative=True):
+        """Share of lookups answered without a server call (None before any lookup)."""
+        s = self.totals if cumulative else self.stats
+        total = sum(s.values())
+        return (s["exact"] + s["prefix"]) / total if total else None
+
+    # ── Updates ──
+
+    def put(self, query, foods, complete):
+        """Cache a server answer; complete = the server returned all matches.
+
+        Kept in memory until save().
+        """
+        key = normalize(query)
+        if not key:
+            return
+        query_words = key.split()
+        filterable = bool(foods) and all(matches(f, query_words) for f in foods)
+        with self._lock:
+            self._load()
+            self._insert(key, {"foods": foods, "complete": bool(complete), "filterable": filterable,
+                               "at": round(time.time(), 3)})
+            self._dirty = True
+
+    def save(self):
+        """Write new answers and this run's stats, if there are any."""
+        with self._lock:
+            if self._root is not None and (self._dirty or sum(self.stats.values())):
+                self._save()
+                self._dirty = False
+
+    def _save(self):
+        """Write the cache (caller holds the lock); oldest queries beyond max_queries are dropped."""
+        live = sorted(((k, e) for k, e in self._entries.items() if self._fresh(e)),
+                      key=lambda kv: kv[1]["at"])[-self.max_queries:]
+        data = {"queries": dict(live), "stats": self.totals}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.tmp.{threading.get_ident()}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
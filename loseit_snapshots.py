@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Content-addressed snapshot store for Lose It! exports.
+
+Every export member is split into line-aligned, content-defined chunks: a
+chunk ends after a line whose CRC32 has its low bits all zero (average
+~CHUNK_LINES lines, bounded by MIN_/MAX_CHUNK_BYTES). Inserting or editing a
+row only changes the chunk around it, so the rest of the file dedupes
+against earlier snapshots.
+
+Layout under data/snapshots/:
+
+    objects/ab/cdef…   zlib-compressed chunk, named by SHA-256 of its bytes
+    index/<id>.json    snapshot manifest: member → size, sha256, chunk list
+
+A daily snapshot costs only the chunks that changed; any snapshot is
+rebuilt by concatenating its chunks (to a directory or a zip).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+
+CHUNK_LINES = 64                 # average lines per chunk (power of two)
+MIN_CHUNK_BYTES = 2 * 1024
+MAX_CHUNK_BYTES = 1024 * 1024
+_BOUNDARY_MASK = CHUNK_LINES - 1
+
+
+def chunk_lines(lines):
+    """Group an iterable of byte lines into content-defined chunks (bytes)."""
+    buf = []
+    size = 0
+    for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= MAX_CHUNK_BYTES or (size >= MIN_CHUNK_BYTES
+                                      and zlib.crc32(line) & _BOUNDARY_MASK == 0):
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def _members(source):
+    """Yield (name, binary file object) for every file in an export dir or zip."""
+    source = Path(source)
+    if source.suffix.lower() == ".zip":
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    with zf.open(info) as f:
+                        yield info.filename, f
+        return
+    for path in sorted(p for p in source.rglob("*") if p.is_file()):
+        with open(path, "rb") as f:
+            yield path.relative_to(source).as_posix(), f
+
+
+def _check_member(name, dest):
+    """Raise ValueError unless member `name` restores to a file inside `dest`.
+
+    Manifests are plain JSON, so a name like "../x" or "/etc/x" is resolved
+    and refused rather than trusted. Zip members are held to the same rule.
+    """
+    root = Path(dest).resolve()
+    target = (root / name).resolve()
+    if root not in target.parents:
+        raise ValueError(f"member {name!r} would restore outside {dest}")
+
+
+def _remove(path):
+    """Delete a file or directory tree if it exists."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index = self.root / "index"
+
+    # ── Objects ──
+
+    def _object_path(self, digest):
+        return self.objects / digest[:2] / digest[2:]
+
+    def put_chunk(self, data):
+        """Store a chunk if new → (digest, stored bytes or 0 if deduplicated)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        packed = zlib.compress(data, 6)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(packed)
+        os.replace(tmp, path)
+        return digest, len(packed)
+
+    def get_chunk(self, digest):
+        return zlib.decompress(self._object_path(digest).read_bytes())
+
+    # ── Snapshots ──
+
+    def ids(self):
+        """Snapshot ids, oldest first."""
+        if not self.index.exists():
+            return []
+        return sorted(p.stem for p in self.index.glob("*.json"))
+
+    def load(self, snapshot_id):
+        with open(self.index / f"{snapshot_id}.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def latest(self):
+        ids = self.ids()
+        return self.load(ids[-1]) if ids else None
+
+    def resolve(self, ref):
+        """Snapshot id from an id, unique id prefix, 'latest', -N (Nth newest) or YYYY-MM-DD (last that day)."""
+        ids = self.ids()
+        if not ref:
+            raise KeyError("empty snapshot reference")
+        if ref == "latest" and ids:
+            return ids[-1]
+        if ref in ids:
+            return ref
+        if re.fullmatch(r"-\d+", ref):
+            n = int(ref[1:])
+            if not 1 <= n <= len(ids):
+                raise KeyError(f"{ref!r} is out of range: {len(ids)} snapshots (-1 is the newest)")
+            return ids[-n]
+        day = ref.replace("-", "")
+        matches = [i for i in ids if i.startswith(ref) or i.startswith(day)]
+        if not matches:
+            raise KeyError(f"no snapshot matches {ref!r}")
+        return matches[-1]
+
+    def save(self, source, label=None):
+        """Snapshot an export dir or zip. Returns its manifest plus write stats.
+
+        If nothing changed since the latest snapshot, that snapshot is
+        returned (with "new": False) instead of writing a duplicate.
+        """
+        t0 = time.monotonic()
+        files = {}
+        new_chunks = stored_bytes = raw_bytes = 0
+        for name, f in _members(source):
+            h = hashlib.sha256()
+            chunks = []
+            size = 0
+            for chunk in chunk_lines(f):
+                h.update(chunk)
+                size += len(chunk)
+                digest, stored = self.put_chunk(chunk)
+                chunks.append(digest)
+                if stored:
+                    new_chunks += 1
+                    stored_bytes += stored
+            raw_bytes += size
+            files[name] = {"size": size, "sha256": h.hexdigest(), "chunks": chunks}
+
+        stats = {
+            "files": len(files),
+            "bytes": raw_bytes,
+            "new_chunks": new_chunks,
+            "stored_bytes": stored_bytes,
+            "seconds": round(time.monotonic() - t0, 3),
+        }
+        latest = self.latest()
+        if latest and {n: e["sha256"] for n, e in latest["files"].items()} == \
+                {n: e["sha256"] for n, e in files.items()}:
+            return {**latest, "new": False, "stats": stats}
+
+        snapshot_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        if (self.index / f"{snapshot_id}.json").exists():
+            n = 1
+            while (self.index / f"{snapshot_id}-{n}.json").exists():
+                n += 1
+            snapshot_id = f"{snapshot_id}-{n}"
+        manifest = {
+            "id": snapshot_id,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "label": label,
+            "source": str(Path(source).resolve()),
+            "bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "files": files,
+        }
+        self.index.mkdir(parents=True, exist_ok=True)
+        path = self.index / f"{snapshot_id}.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, path)
+        return {**manifest, "new": True, "stats": stats}
+
+    # ── Reconstruction ──
+
+    def iter_file(self, snapshot_id, name):
+        """Yield the bytes of one member of a snapshot, chunk by chunk."""
+        for digest in self.load(snapshot_id)["files"][name]["chunks"]:
+            yield self.get_chunk(digest)
+
+    def read_file(self, snapshot_id, name):
+        return b"".join(self.iter_file(snapshot_id, name))
+
+    def restore(self, snapshot_id, dest):
+        """Rebuild a snapshot into a directory, or a zip if dest ends in .zip.
+
+        Every member is checked against its recorded SHA-256, and member
+        names must stay inside dest (checked before anything is written).
+        The snapshot is rebuilt in a dest.tmp sibling first and only moved
+        into place once every member verified, so a bad chunk leaves dest
+        as it was.
+        """
+        manifest = self.load(snapshot_id)
+        dest = Path(dest)
+        for name in manifest["files"]:
+            _check_member(name, dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".tmp")
+        _remove(tmp)
+        try:
+            if dest.suffix.lower() == ".zip":
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+                    for name, entry in manifest["files"].items():
+                        with zf.open(name, "w") as out:
+                            self._write_member(snapshot_id, name, entry, out)
+                os.replace(tmp, dest)
+            else:
+                for name, entry in manifest["files"].items():
+                    target = tmp / name
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with open(target, "wb") as out:
+                        self._write_member(snapshot_id, name, entry, out)
+                # Files one by one, so anything else already in dest is kept
+                for name in manifest["files"]:
+                    (dest / name).parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp / name, dest / name)
+        finally:
+            _remove(tmp)
+        return manifest
+
+    def _write_member(self, snapshot_id, name, entry, out):
+        h = hashlib.sha256()
+        for digest in entry["chunks"]:
+            chunk = self.get_chunk(digest)
+            h.update(chunk)
+            out.write(chunk)
+        if h.hexdigest() != entry["sha256"]:
+            raise ValueError(f"{snapshot_id}/{name}: checksum mismatch")
+
+    def disk_usage(self):
+        """Bytes used by chunk objects (all snapshots together)."""
+        if not self.objects.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.objects.rglob("*") if p.is_file())
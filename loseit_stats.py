@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Resampling and quantile statistics for cohort comparisons.
+
+Bootstrap confidence intervals and permutation-test p-values for the
+difference in means between two samples. Resamples are drawn as NumPy
+matrices a block at a time — never one resample per Python iteration:
+
+- continuous samples (calories) use index matrices, resamples × n
+- samples with few distinct values (logged yes/no, entry counts) use
+  count matrices, resamples × distinct values, drawn from the equivalent
+  multinomial (bootstrap) or multivariate hypergeometric (permutation)
+
+so tens of thousands of resamples over multi-year histories stay well
+under a second.
+
+Quantiles sort a series once and answer any number of percentiles;
+KLLSketch summarizes streamed or very large series in a mergeable sketch.
+"""
+
+import numpy as np
+
+# Upper bound on resample-matrix elements per block (~32 MB of float32/int32)
+_BLOCK_ELEMENTS = 8_000_000
+
+# Samples with at most this many distinct values are resampled by counts
+_MAX_DISCRETE_VALUES = 64
+
+
+def _blocks(n_resamples, width):
+    per_block = max(1, _BLOCK_ELEMENTS // max(width, 1))
+    done = 0
+    while done < n_resamples:
+        k = min(per_block, n_resamples - done)
+        yield k
+        done += k
+
+
+def _discrete(x):
+    """(values, counts) if x has few distinct values, else None."""
+    values, counts = np.unique(x, return_counts=True)
+    if len(values) > _MAX_DISCRETE_VALUES:
+        return None
+    return values, counts
+
+
+def bootstrap_means(x, n_resamples, rng):
+    """Means of `n_resamples` bootstrap resamples of x → float64 array."""
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n_resamples)
+    discrete = _discrete(x)
+    pos = 0
+    if discrete:
+        values, counts = discrete
+        for k in _blocks(n_resamples, len(values)):
+            out[pos:pos + k] = rng.multinomial(n, counts / n, size=k) @ values / n
+            pos += k
+        return out
+    for k in _blocks(n_resamples, n):
+        idx = rng.integers(0, n, size=(k, n), dtype=np.int32)
+        out[pos:pos + k] = x[idx].mean(axis=1)
+        pos += k
+    return out
+
+
+def bootstrap_diff_ci(x, y, n_resamples=10000, confidence=0.95, rng=None):
+    """Percentile bootstrap CI for mean(x) - mean(y) → (low, high)."""
+    rng = rng if rng is not None else np.random.default_rng()
+    diffs = bootstrap_means(x, n_resamples, rng) - bootstrap_means(y, n_resamples, rng)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(diffs, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def _permuted_sums(pooled, n_x, n_resamples, rng):
+    """Sum of the first n_x items of `n_resamples` random shuffles of pooled."""
+    out = np.empty(n_resamples)
+    discrete = _discrete(pooled)
+    pos = 0
+    if discrete:
+        values, counts = discrete
+        for k in _blocks(n_resamples, len(values)):
+            out[pos:pos + k] = rng.multivariate_hypergeometric(counts, n_x, size=k) @ values
+            pos += k
+        return out
+    for k in _blocks(n_resamples, len(pooled)):
+        keys = rng.random((k, len(pooled)), dtype=np.float32)
+        idx = np.argpartition(keys, n_x - 1, axis=1)[:, :n_x]
+        out[pos:pos + k] = pooled[idx].sum(axis=1)
+        pos += k
+    return out
+
+
+def permutation_p_value(x, y, n_resamples=10000, rng=None):
+    """Two-sided permutation-test p-value for mean(x) != mean(y)."""
+    rng = rng if rng is not None else np.random.default_rng()
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    pooled = np.concatenate([x, y])
+    n_x, total = len(x), pooled.sum()
+    observed = abs(x.mean() - y.mean())
+    sum_x = _permuted_sums(pooled, n_x, n_resamples, rng)
+    diffs = np.abs(sum_x / n_x - (total - sum_x) / len(y))
+    hits = int((diffs >= observed - 1e-9).sum())
+    return (hits + 1) / (n_resamples + 1)
+
+
+def compare_means(x, y, n_resamples=10000, confidence=0.95, seed=None):
+    """Difference in means with bootstrap CI and permutation p-value.
+
+    Returns None if either sample is empty.
+    """
+    if len(x) == 0 or len(y) == 0:
+        return None
+    rng = np.random.default_rng(seed)
+    low, high = bootstrap_diff_ci(x, y, n_resamples, confidence, rng)
+    return {
+        "diff": float(np.mean(x) - np.mean(y)),
+        "ci_low": low,
+        "ci_high": high,
+        "confidence": confidence,
+        "p_value": permutation_p_value(x, y, n_resamples, rng),
+        "n_a": len(x),
+        "n_b": len(y),
+        "resamples": n_resamples,
+    }
+
+
+# ─── Quantiles ───────────────────────────────────────────────────────────────
+
+def _rank_index(n, percentiles):
+    """Nearest-rank index used throughout: sorted[min(int(n * p / 100), n - 1)]."""
+    p = np.asarray(percentiles, dtype=np.float64)
+    return np.minimum((n * p / 100).astype(np.int64), n - 1)
+
+
+class Quantiles:
+    """Exact quantiles of a series: sorts once, answers any number of queries."""
+
+    def __init__(self, values):
+        self.sorted = np.sort(np.asarray(values, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def percentile(self, p):
+        if not len(self.sorted):
+            return 0
+        return float(self.sorted[_rank_index(len(self.sorted), p)])
+
+    def percentiles(self, ps):
+        if not len(self.sorted):
+            return [0] * len(ps)
+        return self.sorted[_rank_index(len(self.sorted), ps)].tolist()
+
+
+def grouped_percentiles(groups, values, ps):
+    """Percentiles of `values` for every group with a single lexsort.
+
+    Returns {group: [value at each p]}.
+    """
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(groups):
+        return {}
+    order = np.lexsort((values, groups))
+    g, v = groups[order], values[order]
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    ends = np.r_[starts[1:], len(g)]
+    out = {}
+    for s, e in zip(starts, ends):
+        out[g[s].item()] = v[s + _rank_index(e - s, ps)].tolist()
+    return out
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin–Lang–Liberty).
+
+    Keeps O(k log(n/k)) items instead of the raw series; rank error is
+    roughly 1.7/k. Sketches built per month or per cohort can be merged
+    and queried without the values they came from.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        self._rng = np.random.default_rng(seed)
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(np.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _size(self):
+        return sum(len(c) for c in self.compactors)
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._size() >= self._max_size:
+            for h, items in enumerate(self.compactors):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.compactors):
+                    self._grow()
+                items = sorted(items)
+                keep = [items.pop()] if len(items) % 2 else []
+                self.compactors[h + 1].extend(items[self._rng.integers(2)::2])
+                self.compactors[h] = keep
+                break
+
+    def add(self, x):
+        self.compactors[0].append(float(x))
+        self.n += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        step = max(self._capacity(0), 1)
+        for i in range(0, len(values), step):
+            chunk = values[i:i + step].tolist()
+            self.compactors[0].extend(chunk)
+            self.n += len(chunk)
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for h, items in enumerate(other.compactors):
+            self.compactors[h].extend(items)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.array([x for c in self.compactors for x in c], dtype=np.float64)
+        weights = np.concatenate([np.full(len(c), 2.0 ** h) for h, c in enumerate(self.compactors)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def percentiles(self, ps):
+        if not self.n:
+            return [0] * len(ps)
+        items, cum = self._weighted()
+        ranks = np.asarray(ps, dtype=np.float64) / 100 * cum[-1]
+        idx = np.minimum(np.searchsorted(cum, ranks, side="right"), len(items) - 1)
+        return items[idx].tolist()
+
+    def percentile(self, p):
+        return self.percentiles([p])[0]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": [list(c) for c in self.compactors]}
+
+    @classmethod
+    def from_dict(cls, d):
+        sk = cls(k=d["k"])
+        sk.n = d["n"]
+        sk.compactors = [list(c) for c in d["compactors"]] or [[]]
+        sk._max_size = sum(sk._capacity(h) for h in range(len(sk.compactors)))
+        return sk
+
+
+# Series longer than this are summarized with a KLLSketch instead of sorted
+EXACT_QUANTILE_LIMIT = 1_000_000
+
+
+def quantile_summary(values, exact_limit=EXACT_QUANTILE_LIMIT, k=200):
+    """Quantiles for small series, a KLLSketch for large or streamed ones.
+
+    Both answer percentile()/percentiles(). Iterators (streams) always get
+    a sketch.
+    """
+    if isinstance(values, (list, tuple, np.ndarray)) and len(values) <= exact_limit:
+        return Quantiles(values)
+    sk = KLLSketch(k=k)
+    if isinstance(values, (list, tuple, np.ndarray)):
+        return sk.update(values)
+    block = []
+    for v in values:
+        block.append(v)
+        if len(block) >= 65536:
+            sk.update(block)
+            block = []
+    return sk.update(block)
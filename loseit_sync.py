@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""Lose It! export download helpers used by loseit-sync.sh.
+
+Authentication prefers a cookie cache (~/.config/loseit/export-cookies.json)
+checked with a cheap `requests` probe; Playwright is only launched when the
+cache is missing, expired, or rejected by the server.
+
+The export is streamed to a .part file in fixed-size chunks (bounded
+memory), resumed with a Range request if the connection drops, and only
+renamed over the previous zip once it validates.
+
+Extraction is differential: each member's CRC and size are compared with
+the previous sync's manifest (data/export-manifest.json) and only added or
+changed CSVs are rewritten, so unchanged files keep their mtimes. The
+manifest lists added/changed/unchanged/removed members for downstream jobs.
+
+Downloads are conditional: the previous export's ETag/Last-Modified are
+sent as If-None-Match/If-Modified-Since, and a 200 whose content hash
+matches the current zip is treated the same as a 304 — nothing is
+rewritten (exit code 5). The manifest records the SHA-256 of the zip it
+was extracted from, so an extraction that failed or was killed is redone
+on the next run even though the export itself is unchanged.
+`loseit_sync.py schedule` runs the whole sync in a
+loop with jittered intervals, exponential backoff on errors and a rolling
+history in data/sync-history.json. Each changed export is also added to
+the deduplicated snapshot store (loseit_snapshots).
+
+Set LOSEIT_EXPORT_URL to point the download at a local stand-in server
+(see dev/mock-loseit.py).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+import zipfile
+
+import requests
+
+from loseit_metrics import record_sync
+from loseit_snapshots import SNAPSHOT_DIR, SnapshotStore
+
+EXPORT_URL = os.environ.get("LOSEIT_EXPORT_URL", "https://www.loseit.com/export/data")
+LOSEIT_URL = "https://www.loseit.com"
+COOKIE_CACHE = os.path.expanduser("~/.config/loseit/export-cookies.json")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MANIFEST_FILE = os.path.join(DATA_DIR, "export-manifest.json")
+SYNC_STATE = os.path.join(DATA_DIR, "sync-state.json")
+SYNC_LOG = os.path.join(DATA_DIR, "last-sync.json")
+HISTORY_FILE = os.path.join(DATA_DIR, "sync-history.json")
+
+# Cache lifetime when every cookie is a session cookie (no expiry of its own)
+SESSION_COOKIE_TTL = 12 * 3600
+
+CHUNK_SIZE = 1 << 20     # bytes per write while streaming the export
+MAX_RESUMES = 5          # Range requests after dropped connections, per download
+
+EXIT_UNCHANGED = 5       # download exit code: export identical to the current zip
+
+# Scheduler defaults (seconds)
+SCHEDULE_INTERVAL = 6 * 3600
+SCHEDULE_JITTER = 0.2    # ± fraction applied to every sleep
+RETRY_DELAY = 5 * 60     # first retry after an error; doubles per failure
+MAX_BACKOFF = 12 * 3600
+HISTORY_LIMIT = 500      # runs kept in sync-history.json
+
+
+def log(msg):
+    print(f"[loseit-sync] {msg}", flush=True)
+
+
+def write_json(path, data, indent=None):
+    """Write JSON via a temp file + rename so readers never see a partial file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp, path)
+
+
+def load_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def update_run_info(path, fields):
+    """Merge fields into the JSON run-info file loseit-sync.sh embeds in last-sync.json."""
+    if not path:
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        info = {}
+    info.update(fields)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+
+
+# ─── Cookie cache ────────────────────────────────────────────────────────────
+
+def cookie_expiry(cookies, now=None):
+    """Earliest expiry among cookies that have one, else now + SESSION_COOKIE_TTL."""
+    now = time.time() if now is None else now
+    expiries = [c.get("expires", -1) for c in cookies]
+    expiries = [e for e in expiries if e and e > 0]
+    return min(expiries) if expiries else now + SESSION_COOKIE_TTL
+
+
+def load_cookie_cache(path=COOKIE_CACHE):
+    """Cached cookie list, or None if missing, unreadable or expired."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not cache.get("cookies") or cache.get("expires_at", 0) <= time.time():
+        return None
+    return cache["cookies"]
+
+
+def save_cookie_cache(cookies, path=COOKIE_CACHE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache = {
+        "saved_at": time.time(),
+        "expires_at": cookie_expiry(cookies),
+        "cookies": [{k: c.get(k) for k in ("name", "value", "domain", "path", "expires")} for c in cookies],
+    }
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+def invalidate_cookie_cache(path=COOKIE_CACHE):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def cookie_dict(cookies):
+    return {c["name"]: c["value"] for c in cookies}
+
+
+# ─── Auth ────────────────────────────────────────────────────────────────────
+
+def open_export(cookies, url=EXPORT_URL, timeout=60, headers=None):
+    """Start the export request; return the streaming response if accepted.
+
+    This doubles as the cookie validity probe: only headers are read, so a
+    rejected cookie (login page, 401/403) costs one round trip and no body.
+    Server errors (5xx) raise requests.HTTPError instead: they say nothing
+    about the cookies, so the cache must not be invalidated.
+    """
+    resp = requests.get(url, cookies=cookie_dict(cookies), timeout=timeout,
+                        allow_redirects=True, stream=True, headers=headers)
+    if resp.status_code >= 500:
+        resp.close()
+        resp.raise_for_status()
+    if resp.status_code == 304:
+        return resp
+    content_type = resp.headers.get("content-type", "")
+    # An expired session lands on the HTML login page rather than failing
+    if resp.status_code in (200, 206) and "html" not in content_type:
+        return resp
+    log(f"Export probe rejected (HTTP {resp.status_code}, content-type: {content_type or 'n/a'})")
+    resp.close()
+    return None
+
+
+def browser_cookies(profile):
+    """Launch headless Chromium on the dedicated profile and harvest cookies."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        context = p.chromium.launch_persistent_context(
+            profile,
+            headless=True,
+            args=["--no-sandbox", "--disable-gpu", "--no-first-run"],
+            timeout=30000,
+        )
+        # Navigate to loseit to ensure cookies are fresh
+        page = context.pages[0] if context.pages else context.new_page()
+        page.goto(LOSEIT_URL, wait_until="domcontentloaded", timeout=30000)
+        time.sleep(2)
+
+        cookies = context.cookies(LOSEIT_URL)
+        context.close()
+    return cookies
+
+
+def authenticate(profile, cache_path=COOKIE_CACHE, force_browser=False, url=EXPORT_URL, headers=None):
+    """Return (export response, cookies, info) using cached cookies when possible.
+
+    info records the path taken ("cache" or "browser") and phase timings.
+    The response is None if even fresh browser cookies are rejected; it may
+    be a 304 when conditional `headers` are given.
+    """
+    info = {"auth": None, "cache_rejected": False}
+    t0 = time.monotonic()
+
+    cookies = None if force_browser else load_cookie_cache(cache_path)
+    if cookies:
+        resp = open_export(cookies, url, headers=headers)
+        info["probe_seconds"] = round(time.monotonic() - t0, 3)
+        if resp is not None:
+            info["auth"] = "cache"
+            info["auth_seconds"] = info["probe_seconds"]
+            log(f"Auth: cached cookies accepted ({info['auth_seconds']:.2f}s)")
+            return resp, cookies, info
+        info["cache_rejected"] = True
+        invalidate_cookie_cache(cache_path)
+    else:
+        log("Auth: no valid cookie cache")
+
+    log("Launching Playwright (dedicated profile) to grab cookies...")
+    t_browser = time.monotonic()
+    cookies = browser_cookies(profile)
+    info["browser_seconds"] = round(time.monotonic() - t_browser, 3)
+    info["auth"] = "browser"
+    if not cookies:
+        log("ERROR: No cookies found for loseit.com")
+        info["auth_seconds"] = round(time.monotonic() - t0, 3)
+        return None, cookies, info
+
+    log(f"Got {len(cookies)} cookies ({info['browser_seconds']:.2f}s)")
+    resp = open_export(cookies, url, headers=headers)
+    info["auth_seconds"] = round(time.monotonic() - t0, 3)
+    if resp is not None:
+        save_cookie_cache(cookies, cache_path)
+        log(f"Auth: browser cookies accepted and cached ({info['auth_seconds']:.2f}s)")
+    return resp, cookies, info
+
+
+# ─── Download ────────────────────────────────────────────────────────────────
+
+def _resume_offset(resp):
+    """Start offset of a 206 response (from Content-Range), else None."""
+    m = re.match(r"bytes (\d+)-", resp.headers.get("content-range", ""))
+    return int(m.group(1)) if resp.status_code == 206 and m else None
+
+
+def stream_export(resp, part_path, cookies, url=EXPORT_URL, chunk_size=CHUNK_SIZE,
+                  max_resumes=MAX_RESUMES):
+    """Stream an export response into part_path, resuming on dropped connections.
+
+    Resumes send `Range: bytes=<written>-` plus `If-Range` with the first
+    response's ETag/Last-Modified, so a server that regenerated the export
+    answers 200 and the download restarts from zero instead of splicing two
+    different files. Returns {"bytes", "resumes", "restarts", "etag",
+    "last_modified"} — the validators are those of the bytes actually saved.
+    """
+    validator = resp.headers.get("etag") or resp.headers.get("last-modified")
+    written = resumes = restarts = 0
+    with open(part_path, "wb") as f:
+        while True:
+            expected = resp.headers.get("content-length")
+            expected = written + int(expected) if expected else None
+            try:
+                for chunk in resp.iter_content(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                if expected is None or written >= expected:
+                    break
+                raise requests.exceptions.ChunkedEncodingError(f"short read: {written}/{expected} bytes")
+            except requests.exceptions.RequestException as e:
+                resp.close()
+                if resumes >= max_resumes:
+                    raise
+                resumes += 1
+                log(f"Connection dropped at {written} bytes ({e.__class__.__name__}), resuming...")
+                headers = {"Range": f"bytes={written}-"}
+                if validator:
+                    headers["If-Range"] = validator
+                resp = open_export(cookies, url, headers=headers)
+                if resp is None:
+                    raise
+                offset = _resume_offset(resp)
+                if offset != written:
+                    # Range not honoured (or export changed): start over
+                    restarts += 1
+                    f.seek(0)
+                    f.truncate()
+                    written = 0
+                    if offset is not None:
+                        resp.close()
+                        resp = open_export(cookies, url)
+                        if resp is None:
+                            raise
+                    validator = resp.headers.get("etag") or resp.headers.get("last-modified")
+    resp.close()
+    return {"bytes": written, "resumes": resumes, "restarts": restarts,
+            "etag": resp.headers.get("etag"), "last_modified": resp.headers.get("last-modified")}
+
+
+def validate_zip(path):
+    """None if path is a readable zip with intact CRCs, else an error string."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            bad = zf.testzip()
+            if bad is not None:
+                return f"CRC mismatch in {bad}"
+            if not zf.namelist():
+                return "empty zip"
+    except (zipfile.BadZipFile, OSError) as e:
+        return str(e)
+    return None
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def conditional_headers(state):
+    """If-None-Match / If-Modified-Since from the last saved export's validators."""
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+
+def extracted(state, manifest_path=MANIFEST_FILE):
+    """Whether the manifest was written from the zip described by `state`."""
+    return bool(state.get("sha256")) and load_manifest(manifest_path).get("zip_sha256") == state["sha256"]
+
+
+def download(zip_path, profile, cache_path=COOKIE_CACHE, force_browser=False, run_info=None,
+             url=EXPORT_URL, state_path=SYNC_STATE, conditional=True, info=None,
+             manifest_path=MANIFEST_FILE):
+    """Authenticate and save the export zip. Returns a process exit code.
+
+    0 = new export saved (or the current one still needs extracting),
+    EXIT_UNCHANGED = same export as the current zip (304, or identical
+    content hash) and already extracted, 2 = cookies rejected, 3 = invalid
+    zip, 4 = download failed. Run details are merged into `info` and `run_info`.
+    """
+    info = {} if info is None else info
+    part_path = f"{zip_path}.part"
+    state = load_json(state_path, {}) if os.path.exists(zip_path) else {}
+    headers = conditional_headers(state) if conditional else None
+    try:
+        try:
+            resp, cookies, auth_info = authenticate(profile, cache_path, force_browser, url, headers)
+        except requests.exceptions.RequestException as e:
+            log(f"ERROR: export endpoint unavailable: {e}")
+            info["failed_phase"] = "auth"
+            return 4
+        info.update(auth_info)
+        if resp is None:
+            log("ERROR: export endpoint rejected cookies")
+            info["failed_phase"] = "auth"
+            return 2
+        if resp.status_code == 304:
+            resp.close()
+            info["changed"] = False
+            info["not_modified"] = True
+            log("Export not modified since last sync (304), skipping download")
+            if not extracted(state, manifest_path):
+                info["reextract"] = True
+                log("Last extraction of the current zip didn't finish, extracting again")
+                return 0
+            return EXIT_UNCHANGED
+
+        t0 = time.monotonic()
+        try:
+            stats = stream_export(resp, part_path, cookies, url)
+        except requests.exceptions.RequestException as e:
+            log(f"ERROR: download failed: {e}")
+            info["failed_phase"] = "download"
+            return 4
+        elapsed = time.monotonic() - t0
+        info.update(stats)
+        info["download_seconds"] = round(elapsed, 3)
+        info["throughput_bytes_per_sec"] = round(stats["bytes"] / elapsed) if elapsed > 0 else None
+
+        error = validate_zip(part_path)
+        if error:
+            log(f"ERROR: Response doesn't look like a valid zip ({error}, size: {stats['bytes']})")
+            info["failed_phase"] = "validate"
+            return 3
+
+        digest = file_sha256(part_path)
+        new_state = {"etag": stats["etag"], "last_modified": stats["last_modified"], "sha256": digest,
+                     "bytes": stats["bytes"], "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        if digest == state.get("sha256"):
+            info["changed"] = False
+            write_json(state_path, new_state, indent=2)
+            log("Export content unchanged since last sync (same SHA-256), keeping current zip")
+            if not extracted(new_state, manifest_path):
+                info["reextract"] = True
+                log("Last extraction of the current zip didn't finish, extracting again")
+                return 0
+            return EXIT_UNCHANGED
+
+        os.replace(part_path, zip_path)
+        write_json(state_path, new_state, indent=2)
+        info["changed"] = True
+        rate = stats["bytes"] / elapsed / 1e6 if elapsed > 0 else 0
+        log(f"Saved {stats['bytes']} bytes to {zip_path} ({elapsed:.2f}s, {rate:.1f} MB/s, "
+            f"{stats['resumes']} resumes)")
+        return 0
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        update_run_info(run_info, info)
+
+
+# ─── Differential extraction ─────────────────────────────────────────────────
+
+def load_manifest(path=MANIFEST_FILE):
+    return load_json(path, {})
+
+
+def extract_changed(zip_path, export_dir, manifest_path=MANIFEST_FILE):
+    """Extract only members whose CRC/size changed since the last manifest.
+
+    A member is also rewritten if its extracted file is missing or no longer
+    has the recorded size. Each file is written to a temp name and renamed
+    into place. CSV data rows are counted while copying (and carried over for
+    unchanged members). The manifest, written last, records the zip's
+    SHA-256 so a sync can tell whether extraction completed. Returns the
+    new manifest.
+    """
+    previous = load_manifest(manifest_path).get("members", {})
+    members = {}
+    added, changed, unchanged = [], [], []
+    os.makedirs(export_dir, exist_ok=True)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        for zi in zf.infolist():
+            if zi.is_dir():
+                continue
+            target = os.path.join(export_dir, zi.filename)
+            root = os.path.abspath(export_dir)
+            if os.path.abspath(target) == root or \
+                    os.path.commonpath([root, os.path.abspath(target)]) != root:
+                log(f"Skipping unsafe member path: {zi.filename}")
+                continue
+            # Only members actually written (or kept) go in the manifest
+            entry = {"crc": zi.CRC, "size": zi.file_size}
+            members[zi.filename] = entry
+
+            old = previous.get(zi.filename)
+            on_disk = os.path.exists(target) and os.path.getsize(target) == zi.file_size
+            if old and old["crc"] == zi.CRC and old["size"] == zi.file_size and on_disk:
+                if "rows" in old:
+                    entry["rows"] = old["rows"]
+                unchanged.append(zi.filename)
+                continue
+            (changed if old else added).append(zi.filename)
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = f"{target}.tmp"
+            lines = 0
+            last = b"\n"
+            with zf.open(zi) as src, open(tmp, "wb") as dst:
+                for block in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(block)
+                    lines += block.count(b"\n")
+                    last = block[-1:]
+            os.replace(tmp, target)
+            if zi.filename.lower().endswith(".csv"):
+                # header line excluded; a final line without a newline still counts
+                entry["rows"] = max(lines + (last != b"\n") - 1, 0)
+
+    manifest = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "zip": os.path.abspath(zip_path),
+        "zip_sha256": file_sha256(zip_path),
+        "export_dir": os.path.abspath(export_dir),
+        "members": members,
+        "added": sorted(added),
+        "changed": sorted(changed),
+        "unchanged": sorted(unchanged),
+        "removed": sorted(set(previous) - set(members)),
+    }
+    write_json(manifest_path, manifest, indent=2)
+    return manifest
+
+
+def extract(zip_path, export_dir, manifest_path=MANIFEST_FILE, run_info=None, info=None):
+    """CLI wrapper for extract_changed. Returns a process exit code."""
+    t0 = time.monotonic()
+    try:
+        manifest = extract_changed(zip_path, export_dir, manifest_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        log(f"ERROR: extraction failed: {e}")
+        fields = {"failed_phase": "extract", "error": str(e)}
+        if info is not None:
+            info.update(fields)
+        update_run_info(run_info, fields)
+        return 1
+    counts = {k: len(manifest[k]) for k in ("added", "changed", "unchanged", "removed")}
+    rows = {name: m["rows"] for name, m in manifest["members"].items() if "rows" in m}
+    fields = {"extract_seconds": round(time.monotonic() - t0, 3), "members": counts, "rows": rows}
+    if info is not None:
+        info.update(fields)
+    update_run_info(run_info, fields)
+    log("Extracted: " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+    for name in manifest["added"] + manifest["changed"]:
+        log(f"  updated {name}")
+    return 0
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────────
+
+def write_sync_log(path, status, message, details):
+    """Same shape as the last-sync.json written by loseit-sync.sh."""
+    write_json(path, {
+        "status": status,
+        "message": message,
+        "details": details,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "timestamp_local": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }, indent=2)
+
+
+def append_history(path, record, limit=HISTORY_LIMIT):
+    history = load_json(path, [])
+    history.append(record)
+    write_json(path, history[-limit:], indent=1)
+
+
+def snapshot(zip_path, snapshot_dir=SNAPSHOT_DIR, info=None):
+    """Add the export to the snapshot store; failures are logged, not fatal."""
+    t0 = time.monotonic()
+    try:
+        snap = SnapshotStore(snapshot_dir).save(zip_path)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        log(f"WARNING: snapshot failed: {e}")
+        return None
+    st = snap["stats"]
+    log(f"Snapshot {snap['id']}: {st['new_chunks']} new chunks, {st['stored_bytes']} bytes stored")
+    if info is not None:
+        info["snapshot_seconds"] = round(time.monotonic() - t0, 3)
+        info["snapshot"] = {"id": snap["id"], "new": snap["new"], "new_chunks": st["new_chunks"],
+                            "stored_bytes": st["stored_bytes"]}
+    return snap
+
+
+def sync_once(zip_path, profile, export_dir, manifest_path=MANIFEST_FILE, state_path=SYNC_STATE,
+              sync_log=SYNC_LOG, url=EXPORT_URL, snapshot_dir=SNAPSHOT_DIR):
+    """One conditional download + differential extract (+ snapshot). Returns the history record.
+
+    outcome is "changed", "unchanged" (304 or same hash; extraction skipped)
+    or "error".
+    """
+    started = time.time()
+    t0 = time.monotonic()
+    info = {}
+    try:
+        code = download(zip_path, profile, url=url, state_path=state_path, info=info,
+                        manifest_path=manifest_path)
+    except Exception as e:  # browser launch, DNS, disk full... all count as a failed run
+        log(f"ERROR: {e.__class__.__name__}: {e}")
+        code, info["error"] = 1, str(e)
+
+    if code == 0:
+        code = extract(zip_path, export_dir, manifest_path, info=info)
+        if code:
+            outcome, message = "error", "Extraction failed"
+        else:
+            outcome = "changed"
+            message = f"Export downloaded and extracted ({info.get('bytes', 0)} bytes)"
+            if snapshot_dir:
+                snapshot(zip_path, snapshot_dir, info)
+    elif code == EXIT_UNCHANGED:
+        outcome, message = "unchanged", "Export unchanged since last sync"
+    else:
+        outcome, message = "error", f"Download failed with exit code {code}"
+
+    duration = round(time.monotonic() - t0, 3)
+    status = "error" if outcome == "error" else "success"
+    write_sync_log(sync_log, status, message, info)
+    record_sync(info, status, duration)
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)),
+        "duration_seconds": duration,
+        "outcome": outcome,
+        "exit_code": code,
+        "message": message,
+        "bytes": info.get("bytes", 0),
+        "auth": info.get("auth"),
+    }
+
+
+def next_delay(failures, interval=SCHEDULE_INTERVAL, jitter=SCHEDULE_JITTER,
+               retry_delay=RETRY_DELAY, max_backoff=MAX_BACKOFF, rng=random):
+    """Seconds until the next run: the interval after a success, exponential
+    backoff (retry_delay · 2^(failures-1), capped) after failures, ± jitter."""
+    if failures:
+        base = min(retry_delay * 2 ** (failures - 1), max_backoff)
+    else:
+        base = interval
+    return max(0.0, base * rng.uniform(1 - jitter, 1 + jitter))
+
+
+def schedule(zip_path, profile, export_dir, interval=SCHEDULE_INTERVAL, jitter=SCHEDULE_JITTER,
+             retry_delay=RETRY_DELAY, max_backoff=MAX_BACKOFF, runs=None, history_path=HISTORY_FILE,
+             **paths):
+    """Run sync_once forever (or `runs` times), sleeping next_delay() between runs."""
+    failures = 0
+    done = 0
+    try:
+        while runs is None or done < runs:
+            record = sync_once(zip_path, profile, export_dir, **paths)
+            failures = failures + 1 if record["outcome"] == "error" else 0
+            record["consecutive_failures"] = failures
+            append_history(history_path, record)
+            done += 1
+            log(f"Run {done}: {record['outcome']} in {record['duration_seconds']:.2f}s")
+            if runs is not None and done >= runs:
+                break
+            delay = next_delay(failures, interval, jitter, retry_delay, max_backoff)
+            log(f"Next sync in {delay:.0f}s" + (f" (backoff after {failures} failures)" if failures else ""))
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        log("Scheduler stopped")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lose It! export sync helpers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("download", help="Authenticate and download the export zip")
+    p.add_argument("zip_path")
+    p.add_argument("profile", help="Playwright profile directory")
+    p.add_argument("--run-info", help="JSON file to merge run details into")
+    p.add_argument("--state", default=SYNC_STATE, help="Validators of the last saved export")
+    p.add_argument("--manifest", default=MANIFEST_FILE, help="Extraction manifest (to detect unfinished extracts)")
+    p.add_argument("--no-conditional", dest="conditional", action="store_false",
+                   help="Always download, ignoring ETag/Last-Modified/hash")
+    p.add_argument("--force-browser", action="store_true",
+                   default=os.environ.get("LOSEIT_FORCE_BROWSER") == "1",
+                   help="Skip the cookie cache (also LOSEIT_FORCE_BROWSER=1)")
+
+    p = sub.add_parser("extract", help="Extract changed members and write the manifest")
+    p.add_argument("zip_path")
+    p.add_argument("export_dir")
+    p.add_argument("--manifest", default=MANIFEST_FILE)
+    p.add_argument("--run-info", help="JSON file to merge run details into")
+
+    p = sub.add_parser("schedule", help="Sync in a loop with jitter, backoff and history")
+    p.add_argument("zip_path")
+    p.add_argument("profile", help="Playwright profile directory")
+    p.add_argument("export_dir")
+    p.add_argument("--interval", type=float, default=SCHEDULE_INTERVAL,
+                   help=f"Seconds between successful syncs (default: {SCHEDULE_INTERVAL})")
+    p.add_argument("--jitter", type=float, default=SCHEDULE_JITTER,
+                   help=f"± fraction of random jitter per sleep (default: {SCHEDULE_JITTER})")
+    p.add_argument("--retry-delay", type=float, default=RETRY_DELAY,
+                   help=f"First retry after an error, doubled per failure (default: {RETRY_DELAY})")
+    p.add_argument("--max-backoff", type=float, default=MAX_BACKOFF,
+                   help=f"Backoff cap in seconds (default: {MAX_BACKOFF})")
+    p.add_argument("--runs", type=int, help="Stop after N runs (default: run forever)")
+    p.add_argument("--manifest", default=MANIFEST_FILE)
+    p.add_argument("--state", default=SYNC_STATE)
+    p.add_argument("--sync-log", default=SYNC_LOG)
+    p.add_argument("--history", default=HISTORY_FILE)
+    p.add_argument("--snapshots", default=str(SNAPSHOT_DIR), help="Snapshot store ('' to disable)")
+
+    args = parser.parse_args(argv)
+    if args.command == "download":
+        return download(args.zip_path, args.profile, force_browser=args.force_browser, run_info=args.run_info,
+                        state_path=args.state, conditional=args.conditional, manifest_path=args.manifest)
+    if args.command == "schedule":
+        return schedule(args.zip_path, args.profile, args.export_dir, interval=args.interval,
+                        jitter=args.jitter, retry_delay=args.retry_delay, max_backoff=args.max_backoff,
+                        runs=args.runs, history_path=args.history, manifest_path=args.manifest,
+                        state_path=args.state, sync_log=args.sync_log, snapshot_dir=args.snapshots)
+    return extract(args.zip_path, args.export_dir, args.manifest, run_info=args.run_info)
+
+
+if __name__ == "__main__":
+    sys.exit(main())